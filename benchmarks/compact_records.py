@@ -0,0 +1,101 @@
+"""Memory footprint of list records held as dicts versus compact records.
+
+Usage (from the repository root):
+
+    python -m benchmarks.compact_records [count]
+"""
+import gc
+import sys
+import tracemalloc
+
+from lemon.src.subscriptions.types import SubscriptionData, SubscriptionRecord
+
+
+def raw_subscription(id: int) -> dict:
+    api = "https://api.lemonsqueezy.com/v1"
+    keys = [
+        'store', 'customer', 'order', 'order-item', 'product', 'variant',
+        'subscription-items', 'subscription-invoices',
+    ]
+    return {
+        'type': 'subscriptions',
+        'id': str(id),
+        'attributes': {
+            'store_id': 1,
+            'customer_id': id,
+            'order_id': id,
+            'order_item_id': id,
+            'product_id': id % 7,
+            'variant_id': id % 21,
+            'product_name': f"Product {id % 7}",
+            'variant_name': f"Variant {id % 21}",
+            'user_name': f"User {id}",
+            'user_email': f"user{id}@example.com",
+            'status': ('active', 'cancelled', 'past_due')[id % 3],
+            'status_formatted': ('Active', 'Cancelled', 'Past due')[id % 3],
+            'card_brand': ('visa', 'mastercard')[id % 2],
+            'card_last_four': f"{id % 10000:04d}",
+            'pause': None,
+            'cancelled': False,
+            'trial_ends_at': None,
+            'billing_anchor': id % 28,
+            'first_subscription_item': {
+                'id': id,
+                'subscription_id': id,
+                'price_id': id % 21,
+                'quantity': 1,
+                'is_usage_based': False,
+                'created_at': '2024-01-12T10:00:00.000000Z',
+                'updated_at': '2024-01-12T10:00:00.000000Z',
+            },
+            'urls': {
+                'update_payment_method': f"https://example.com/{id}/update",
+                'customer_portal': f"https://example.com/{id}/portal",
+                'customer_portal_update_subscription':
+                    f"https://example.com/{id}/portal/update",
+            },
+            'renews_at': '2024-02-12T10:00:00.000000Z',
+            'ends_at': None,
+            'created_at': '2024-01-12T10:00:00.000000Z',
+            'updated_at': '2024-01-12T10:00:00.000000Z',
+            'test_mode': False,
+        },
+        'relationships': {
+            key: {
+                'links': {
+                    'related': f"{api}/subscriptions/{id}/{key}",
+                    'self': f"{api}/subscriptions/{id}/relationships/{key}",
+                }
+            } for key in keys
+        },
+        'links': {'self': f"{api}/subscriptions/{id}"},
+    }
+
+
+def measure(label: str, build) -> None:
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<22} {current / 2**20:10.1f} MiB "
+        f"{current / len(records):10.0f} B/record"
+    )
+    del records
+
+
+def main(count: int) -> None:
+    print(f"{count} subscriptions")
+    measure("model_dump() dicts", lambda: [
+        SubscriptionData.model_validate(raw_subscription(i)).model_dump()
+        for i in range(count)
+    ])
+    measure("SubscriptionRecord", lambda: [
+        SubscriptionRecord.from_raw(raw_subscription(i))
+        for i in range(count)
+    ])
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
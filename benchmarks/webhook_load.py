@@ -0,0 +1,319 @@
+"""Sustained throughput and latency of the webhook receiver.
+
+Generates signed deliveries of every `Events` type, with realistic objects,
+and replays them at a fixed rate against an in-process `WebhookReceiver`.
+Reports the deliveries accepted per second, the latency of the `200`
+acknowledgements and the latency from sending a delivery to its handler
+finishing, to size the receiver workers for a given load.
+
+With `--url`, the deliveries are sent to a receiver already running at
+that URL instead, e.g. behind uvicorn with several processes and a shared
+idempotency backend, signed with `--secret`. Only the acknowledgements are
+measured then; `--workers`, `--max-queue`, `--handler-ms` and
+`--idempotency` are ignored.
+
+Usage (from the repository root):
+
+    python -m benchmarks.webhook_load [--deliveries N] [--rate PER_SECOND]
+        [--concurrency N] [--workers N] [--max-queue N] [--handler-ms MS]
+        [--idempotency] [--url URL] [--secret SECRET]
+
+A rate of `0` sends as fast as the concurrency allows.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from typing import get_args
+
+import httpx
+
+from lemon.src.webhooks import (
+    IdempotencyStore,
+    WebhookEvent,
+    WebhookReceiver,
+    sign,
+)
+from lemon.src.webhooks.types import Events
+
+from .compact_records import raw_subscription
+
+SECRET = 'webhook-secret'
+API = "https://api.lemonsqueezy.com/v1"
+
+
+def raw_object(event: str, id: int) -> dict:
+    if event.startswith('subscription_payment_'):
+        return {
+            'type': 'subscription-invoices',
+            'id': str(id),
+            'attributes': {
+                'store_id': 1,
+                'subscription_id': id,
+                'customer_id': id,
+                'user_name': f"User {id}",
+                'user_email': f"user{id}@example.com",
+                'billing_reason': 'renewal',
+                'card_brand': 'visa',
+                'card_last_four': f"{id % 10000:04d}",
+                'currency': 'USD',
+                'currency_rate': '1.00000000',
+                'status': 'paid',
+                'status_formatted': 'Paid',
+                'refunded': event == 'subscription_payment_refunded',
+                'refunded_at': None,
+                'subtotal': 999,
+                'discount_total': 0,
+                'tax': 200,
+                'total': 1199,
+                'subtotal_usd': 999,
+                'discount_total_usd': 0,
+                'tax_usd': 200,
+                'total_usd': 1199,
+                'subtotal_formatted': '$9.99',
+                'discount_total_formatted': '$0.00',
+                'tax_formatted': '$2.00',
+                'total_formatted': '$11.99',
+                'urls': {'invoice_url': f"https://example.com/{id}/invoice"},
+                'created_at': '2024-01-12T10:00:00.000000Z',
+                'updated_at': '2024-01-12T10:00:00.000000Z',
+                'test_mode': False,
+            },
+            'links': {'self': f"{API}/subscription-invoices/{id}"},
+        }
+    if event.startswith('subscription_'):
+        return raw_subscription(id)
+    if event.startswith('license_key_'):
+        return {
+            'type': 'license-keys',
+            'id': str(id),
+            'attributes': {
+                'store_id': 1,
+                'customer_id': id,
+                'order_id': id,
+                'order_item_id': id,
+                'product_id': id % 7,
+                'user_name': f"User {id}",
+                'user_email': f"user{id}@example.com",
+                'key': f"{id:08X}-0000-4000-8000-000000000000",
+                'key_short': f"XXXX-{id % 10**12:012d}",
+                'activation_limit': 5,
+                'instances_count': 0,
+                'disabled': False,
+                'status': 'inactive',
+                'status_formatted': 'Inactive',
+                'expires_at': None,
+                'created_at': '2024-01-12T10:00:00.000000Z',
+                'updated_at': '2024-01-12T10:00:00.000000Z',
+                'test_mode': False,
+            },
+            'links': {'self': f"{API}/license-keys/{id}"},
+        }
+    return {
+        'type': 'orders',
+        'id': str(id),
+        'attributes': {
+            'store_id': 1,
+            'customer_id': id,
+            'identifier': f"{id:08x}-0000-4000-8000-000000000000",
+            'order_number': id,
+            'user_name': f"User {id}",
+            'user_email': f"user{id}@example.com",
+            'currency': 'USD',
+            'currency_rate': '1.00000000',
+            'subtotal': 999,
+            'discount_total': 0,
+            'tax': 200,
+            'total': 1199,
+            'status': 'refunded' if event == 'order_refunded' else 'paid',
+            'status_formatted': 'Paid',
+            'refunded': event == 'order_refunded',
+            'refunded_at': None,
+            'first_order_item': {
+                'id': id,
+                'order_id': id,
+                'product_id': id % 7,
+                'variant_id': id % 21,
+                'product_name': f"Product {id % 7}",
+                'variant_name': f"Variant {id % 21}",
+                'price': 999,
+                'created_at': '2024-01-12T10:00:00.000000Z',
+                'updated_at': '2024-01-12T10:00:00.000000Z',
+                'test_mode': False,
+            },
+            'urls': {'receipt': f"https://example.com/{id}/receipt"},
+            'created_at': '2024-01-12T10:00:00.000000Z',
+            'updated_at': '2024-01-12T10:00:00.000000Z',
+            'test_mode': False,
+        },
+        'links': {'self': f"{API}/orders/{id}"},
+    }
+
+
+def deliveries(count: int) -> list[bytes]:
+    """Bodies cycling through every event, each about a new object.
+
+    `custom_data` holds a placeholder replaced with the send time by `send`.
+    """
+    events = get_args(Events.__value__)
+    bodies = []
+    for i in range(count):
+        event = events[i % len(events)]
+        body = json.dumps({
+            'meta': {
+                'event_name': event,
+                'test_mode': False,
+                'webhook_id': f"{i:08x}-0000-4000-8000-000000000000",
+                'custom_data': {'sent_at': 0.0},
+            },
+            'data': raw_object(event, i + 1),
+        }).encode()
+        bodies.append(body)
+    return bodies
+
+
+def percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "n/a"
+    ordered = sorted(samples)
+    values = [
+        (f"p{p}", ordered[min(len(ordered) - 1, len(ordered) * p // 100)])
+        for p in (50, 90, 99)
+    ]
+    values.append(("max", ordered[-1]))
+    return "  ".join(
+        f"{label} {value * 1000:7.2f}" for label, value in values
+    ) + " ms"
+
+
+async def send_all(
+        client: httpx.AsyncClient,
+        url: str,
+        args: argparse.Namespace,
+) -> tuple[list[float], dict[int, int], float]:
+    """Send the deliveries to `url`, returning the ack latencies, the number of
+    responses by status code and the seconds taken to send them all.
+    """
+    bodies = deliveries(args.deliveries)
+    placeholder = b'"sent_at": 0.0'
+    acks: list[float] = []
+    statuses: dict[int, int] = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def send(body: bytes) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            body = body.replace(placeholder, f'"sent_at": {start!r}'.encode())
+            response = await client.post(
+                url, content=body,
+                headers={'X-Signature': sign(body, args.secret)}
+            )
+            acks.append(time.perf_counter() - start)
+            statuses[response.status_code] = (
+                statuses.get(response.status_code, 0) + 1
+            )
+
+    tasks = []
+    start = time.perf_counter()
+    for i, body in enumerate(bodies):
+        if args.rate:
+            delay = start + i / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(send(body)))
+        if len(tasks) >= 4 * args.concurrency:
+            await tasks.pop(0)
+    await asyncio.gather(*tasks)
+    return acks, statuses, time.perf_counter() - start
+
+
+def report(
+        args: argparse.Namespace,
+        acks: list[float],
+        statuses: dict[int, int],
+) -> None:
+    print(
+        f"{args.deliveries} deliveries of {len(get_args(Events.__value__))} "
+        f"events to {args.url or 'an in-process receiver'}, rate "
+        f"{args.rate or 'unlimited'}/s, concurrency {args.concurrency}"
+    )
+    print(f"{'responses':<18} " + "  ".join(
+        f"{status}: {count}" for status, count in sorted(statuses.items())
+    ))
+
+
+async def run_remote(args: argparse.Namespace) -> None:
+    """Send the deliveries to the receiver served at `args.url`.
+
+    Only the acknowledgements can be measured: the handlers, queue and
+    workers are those of the server.
+    """
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits) as client:
+        acks, statuses, sent = await send_all(client, args.url, args)
+    report(args, acks, statuses)
+    print(f"{'acknowledged/s':<18} {statuses.get(200, 0) / sent:10.0f}")
+    print(f"{'ack latency':<18} {percentiles(acks)}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.url:
+        return await run_remote(args)
+    receiver = WebhookReceiver(
+        args.secret,
+        max_queue=args.max_queue,
+        workers=args.workers,
+        idempotency=IdempotencyStore() if args.idempotency else None,
+    )
+    handled: list[float] = []
+
+    @receiver.on()
+    async def handler(event: WebhookEvent) -> None:
+        # Forces the validation of the data object, as a real handler would.
+        _ = event.data
+        if args.handler_ms:
+            await asyncio.sleep(args.handler_ms / 1000)
+        handled.append(
+            time.perf_counter() - event['meta']['custom_data']['sent_at']
+        )
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=receiver)
+    ) as client:
+        await receiver.start()
+        start = time.perf_counter()
+        acks, statuses, sent = await send_all(client, 'http://test/', args)
+        await receiver.join()
+        elapsed = time.perf_counter() - start
+    await receiver.stop()
+
+    stats = receiver.stats()
+    report(args, acks, statuses)
+    print(
+        f"{'receiver':<18} {args.workers} workers, handler "
+        f"{args.handler_ms} ms"
+    )
+    print(f"{'accepted/s':<18} {stats['accepted'] / sent:10.0f}")
+    print(f"{'handled/s':<18} {len(handled) / elapsed:10.0f}")
+    print(f"{'ack latency':<18} {percentiles(acks)}")
+    print(f"{'handler latency':<18} {percentiles(handled)}")
+    print(f"{'max queue depth':<18} {stats['max_queue_depth']:10d}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deliveries', type=int, default=5_000)
+    parser.add_argument('--rate', type=float, default=0)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-queue', type=int, default=1000)
+    parser.add_argument('--handler-ms', type=float, default=0)
+    parser.add_argument('--idempotency', action='store_true')
+    parser.add_argument('--url')
+    parser.add_argument('--secret', default=SECRET)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
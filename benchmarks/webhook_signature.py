@@ -0,0 +1,87 @@
+"""Throughput of webhook signature verification on large payloads.
+
+Compares the usual approach (decode the body, re-encode it and build a new
+HMAC per delivery) with `SignatureVerifier` hashing the raw bytes with a
+precomputed keyed HMAC.
+
+Usage (from the repository root):
+
+    python -m benchmarks.webhook_signature [size_kib] [deliveries]
+"""
+import hashlib
+import hmac
+import json
+import sys
+import time
+
+from lemon.src.webhooks import SignatureVerifier, sign
+
+
+def payload(size: int) -> bytes:
+    items = []
+    body = b''
+    while len(body) < size:
+        items.append({'id': len(items), 'name': f"Item {len(items)}", 'é': 'ü'})
+        body = json.dumps({
+            'meta': {'event_name': 'order_created'},
+            'data': {'type': 'orders', 'id': '1', 'attributes': {'items': items}},
+        }).encode()
+    return body
+
+
+def naive(body: bytes, signature: str, secret: str) -> bool:
+    text = body.decode()
+    digest = hmac.new(secret.encode(), text.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(digest, signature)
+
+
+def measure(label: str, verify, deliveries: int, size: int) -> None:
+    start = time.perf_counter()
+    for _ in range(deliveries):
+        assert verify()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} {deliveries / elapsed:10.0f} deliveries/s "
+        f"{deliveries * size / elapsed / 2**20:10.1f} MiB/s"
+    )
+
+
+def main(size_kib: int, deliveries: int) -> None:
+    body = payload(size_kib * 1024)
+    secret = 'webhook-secret'
+    signature = sign(body, secret)
+    view = memoryview(body)
+    print(f"{len(body) / 1024:.0f} KiB payload, {deliveries} deliveries")
+    measure(
+        "decode + re-encode + hmac.new",
+        lambda: naive(body, signature, secret),
+        deliveries,
+        len(body)
+    )
+    verifier = SignatureVerifier(secret)
+    measure(
+        "SignatureVerifier (bytes)",
+        lambda: verifier.verify(body, signature),
+        deliveries,
+        len(body)
+    )
+    measure(
+        "SignatureVerifier (view)",
+        lambda: verifier.verify(view, signature),
+        deliveries,
+        len(body)
+    )
+    rotating = SignatureVerifier(['next-secret', secret])
+    measure(
+        "SignatureVerifier (2 keys)",
+        lambda: rotating.verify(view, signature),
+        deliveries,
+        len(body)
+    )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 512,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2_000,
+    )
@@ -0,0 +1,8 @@
+from .columnar import Categorical, columns
+from .revenue import (
+    MONTHS_PER_UNIT,
+    REVENUE_STATUSES,
+    revenue,
+    revenue_movements,
+    subscription_mrr,
+)
@@ -0,0 +1,234 @@
+from collections.abc import Iterable, Mapping, Sequence
+from types import NoneType, UnionType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Literal,
+    TypeAliasType,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+    is_typeddict,
+)
+
+from pydantic import BaseModel
+
+from ..types.response import CompactRecord, LazyRecords
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError(
+            "Columnar views require numpy. Install it with "
+            "`uv pip install lemon[analytics]`."
+        ) from exc
+    return numpy
+
+
+class Categorical:
+    """Column of values drawn from a fixed set of categories.
+
+    `codes[i]` is the index of the `i`th value in `categories`, or `-1` if
+    the value is missing.
+    """
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes: 'np.ndarray', categories: Sequence[str]) -> None:
+        self.codes = codes
+        self.categories = tuple(categories)
+
+    def code(self, category: str) -> int:
+        """The code of a category."""
+        return self.categories.index(category)
+
+    def mask(self, *categories: str) -> 'np.ndarray':
+        """Boolean mask of the rows holding any of the given categories."""
+        np = _numpy()
+        return np.isin(self.codes, [self.code(c) for c in categories])
+
+    def counts(self) -> dict[str, int]:
+        """Number of rows holding each category."""
+        np = _numpy()
+        counts = np.bincount(
+            self.codes[self.codes >= 0],
+            minlength=len(self.categories)
+        )
+        return dict(zip(self.categories, counts.tolist()))
+
+    def decode(self) -> 'np.ndarray':
+        """The column as an array of strings, `None` where missing."""
+        np = _numpy()
+        values = np.array([*self.categories, None], dtype=object)
+        return values[self.codes]
+
+    def __getitem__(self, index) -> 'Categorical':
+        return Categorical(self.codes[index], self.categories)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __repr__(self) -> str:
+        return f"Categorical({len(self)} rows, categories={self.categories})"
+
+
+def _unwrap(annotation: Any) -> tuple[Any, bool]:
+    """Strip type aliases and `None` from an annotation.
+
+    Returns:
+        The remaining annotation and whether `None` was part of it.
+    """
+    if isinstance(annotation, TypeAliasType):
+        return _unwrap(annotation.__value__)
+    if get_origin(annotation) in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not NoneType]
+        optional = len(args) < len(get_args(annotation))
+        if len(args) == 1:
+            inner, inner_optional = _unwrap(args[0])
+            return inner, optional or inner_optional
+        literals = [_unwrap(arg)[0] for arg in args]
+        if all(get_origin(arg) is Literal for arg in literals):
+            values = [value for arg in literals for value in get_args(arg)]
+            return Literal[tuple(values)], optional
+        return annotation, optional
+    return annotation, False
+
+
+def _field_type(attributes: type, field: str) -> tuple[Any, bool]:
+    annotation: Any = attributes
+    optional = False
+    for part in field.split('.'):
+        if not is_typeddict(annotation):
+            raise KeyError(f"Unknown attribute `{field}`")
+        hints = get_type_hints(annotation)
+        if part not in hints:
+            raise KeyError(f"Unknown attribute `{field}`")
+        annotation, part_optional = _unwrap(hints[part])
+        optional = optional or part_optional
+    return annotation, optional
+
+
+def _rows(source: Any) -> Iterable[Any]:
+    """Flatten pages, responses and record sequences into records."""
+    if source is None:
+        # The data of an error response.
+        return ()
+    if isinstance(source, Mapping):
+        if 'jsonapi' in source or 'status_code' in source:
+            return _rows(source['data'])
+        return (source,)
+    if isinstance(source, LazyRecords):
+        return source.raw
+    if isinstance(source, (BaseModel, CompactRecord)):
+        return (source,)
+    return (row for item in source for row in _rows(item))
+
+
+def _attributes(record: Any) -> Any:
+    if isinstance(record, CompactRecord):
+        return record
+    return record['attributes']
+
+
+def _value(attributes: Any, path: list[str]) -> Any:
+    value = attributes
+    for part in path:
+        if value is None:
+            return None
+        value = value[part]
+    return value
+
+
+def columns(
+        source: Any,
+        attributes: type,
+        fields: Iterable[str],
+) -> dict[str, 'np.ndarray | Categorical']:
+    """Build NumPy columns from list responses.
+
+    Args:
+        `source`: A response returned by a `list_*` function, a compound
+        document, a sequence of records (dictionaries, `Data` models or
+        `CompactRecord` instances), or any iterable of these, e.g. the pages
+        yielded by `paginate_pages`.
+        `attributes`: The `Attributes` TypedDict of the resource, which
+        determines the type of each column.
+        `fields`: The attributes to convert. Nested attributes are separated
+        by dots, e.g. `first_subscription_item.price_id`. The resource id is
+        available as `id`.
+
+    Returns:
+        Dictionary of columns keyed by field. Integer attributes become
+        `int64` arrays and booleans `bool` arrays (masked arrays where the
+        attribute is nullable), `Literal` attributes `Categorical` columns,
+        timestamps (`*_at`) `datetime64[us]` arrays and any other attribute an
+        `object` array.
+
+    Raises:
+        `ImportError`: If numpy is not installed.
+        `KeyError`: If a field is not an attribute of the resource.
+    """
+    np = _numpy()
+    fields = list(fields)
+    records = list(_rows(source))
+    result: dict[str, np.ndarray | Categorical] = {}
+
+    for field in fields:
+        if field == 'id':
+            result[field] = np.fromiter(
+                (int(record['id']) for record in records),
+                dtype=np.int64,
+                count=len(records),
+            )
+            continue
+
+        annotation, optional = _field_type(attributes, field)
+        path = field.split('.')
+        values = [_value(_attributes(record), path) for record in records]
+
+        if get_origin(annotation) is Literal:
+            categories = get_args(annotation)
+            lookup = {category: code for code, category in enumerate(categories)}
+            result[field] = Categorical(
+                np.fromiter(
+                    (lookup.get(value, -1) for value in values),
+                    dtype=np.int16,
+                    count=len(values),
+                ),
+                categories
+            )
+        elif annotation is str and path[-1].endswith('_at'):
+            result[field] = np.array(
+                [value.removesuffix('Z') if value else 'NaT' for value in values],
+                dtype='datetime64[us]'
+            )
+        elif annotation in (bool, int) and optional:
+            mask = np.fromiter(
+                (value is None for value in values),
+                dtype=np.bool_,
+                count=len(values),
+            )
+            data = np.fromiter(
+                (value or 0 for value in values),
+                dtype=np.bool_ if annotation is bool else np.int64,
+                count=len(values),
+            )
+            result[field] = np.ma.MaskedArray(data, mask=mask)
+        elif annotation is bool:
+            result[field] = np.array(
+                [bool(value) for value in values],
+                dtype=np.bool_
+            )
+        elif annotation is int:
+            result[field] = np.fromiter(values, dtype=np.int64, count=len(values))
+        else:
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            result[field] = column
+
+    return result
@@ -0,0 +1,323 @@
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from ..prices.types import Attributes as PriceAttributes
+from ..subscriptions.types import Attributes as SubscriptionAttributes
+from .columnar import Categorical, _numpy, columns
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Statuses of subscriptions counting towards recurring revenue.
+REVENUE_STATUSES = ('active', 'past_due')
+
+# Months in one unit of `renewal_interval_unit`.
+MONTHS_PER_UNIT = {'day': 12 / 365, 'week': 12 / 52, 'month': 1, 'year': 12}
+
+_PRICE_FIELDS = (
+    'id',
+    'scheme',
+    'unit_price',
+    'package_size',
+    'tiers',
+    'renewal_interval_unit',
+    'renewal_interval_quantity',
+)
+_SUBSCRIPTION_FIELDS = (
+    'id',
+    'status',
+    'first_subscription_item.price_id',
+    'first_subscription_item.quantity',
+)
+
+
+def _tiered(
+        quantities: 'np.ndarray',
+        tiers: list[dict[str, Any]],
+        scheme: str,
+) -> 'np.ndarray':
+    """Charge of each quantity under a graduated or volume price."""
+    np = _numpy()
+    bounds = np.array([
+        np.inf if tier['last_unit'] == 'inf' else float(tier['last_unit'])
+        for tier in tiers
+    ])
+    unit_prices = np.array(
+        [tier['unit_price'] for tier in tiers],
+        dtype=float
+    )
+    fees = np.array(
+        [tier.get('fixed_fee') or 0 for tier in tiers],
+        dtype=float
+    )
+    if scheme == 'volume':
+        # Every unit is charged at the price of the tier the quantity is in.
+        tier = np.minimum(
+            np.searchsorted(bounds, quantities, side='left'),
+            len(tiers) - 1
+        )
+        return quantities * unit_prices[tier] + fees[tier]
+    # Each unit is charged at the price of the tier it falls in.
+    lower = np.concatenate(([0.0], bounds[:-1]))
+    units = np.clip(quantities[:, None] - lower, 0, bounds - lower)
+    return (units * unit_prices + (units > 0) * fees).sum(axis=1)
+
+
+def subscription_mrr(
+        subscriptions: Any,
+        prices: Any,
+        statuses: Iterable[str] = REVENUE_STATUSES,
+) -> dict[str, 'np.ndarray']:
+    """Monthly recurring revenue of each subscription.
+
+    Subscriptions are joined with the price of their first subscription
+    item. The charge of a renewal follows the pricing scheme of the price
+    (`unit_price` per unit, per package of `package_size` units, or per
+    graduated or volume tier) and is normalised to a month using its
+    renewal interval, e.g. a yearly charge is divided by 12.
+
+    Args:
+        `subscriptions`: Subscription records, in any form accepted by
+        `columns`, e.g. the pages yielded by `paginate_pages`.
+        `prices`: Price records, in any form accepted by `columns`.
+        `statuses`: (Optional) Statuses of the subscriptions bringing in
+        revenue; the others have no MRR.
+
+    Returns:
+        Columns `id`, `mrr` and `priced`, whether the price of the
+        subscription was found, as `int64`, `float64` (in cents) and `bool`
+        arrays in the order of the subscriptions.
+
+    Raises:
+        `ImportError`: If numpy is not installed.
+    """
+    subs = columns(subscriptions, SubscriptionAttributes, _SUBSCRIPTION_FIELDS)
+    price = columns(prices, PriceAttributes, _PRICE_FIELDS)
+    return _mrr(subs, price, statuses)
+
+
+def _mrr(
+        subs: dict[str, Any],
+        price: dict[str, Any],
+        statuses: Iterable[str],
+) -> dict[str, 'np.ndarray']:
+    np = _numpy()
+    price_ids = np.ma.getdata(subs['first_subscription_item.price_id'])
+    quantities = np.ma.getdata(
+        subs['first_subscription_item.quantity']
+    ).astype(float)
+    has_item = ~np.ma.getmaskarray(subs['first_subscription_item.price_id'])
+
+    # Join on the price id with a binary search over the sorted prices.
+    order = np.argsort(price['id'], kind='stable')
+    sorted_ids = price['id'][order]
+    position = np.searchsorted(sorted_ids, price_ids)
+    position = np.minimum(position, max(len(sorted_ids) - 1, 0))
+    priced = has_item & (len(sorted_ids) > 0)
+    if len(sorted_ids):
+        priced &= sorted_ids[position] == price_ids
+    row = order[position] if len(order) else position
+
+    scheme: Categorical = price['scheme']
+    unit_price = price['unit_price'].astype(float)
+    package_size = np.maximum(price['package_size'], 1)
+    charge = np.zeros(len(price_ids))
+    if len(sorted_ids):
+        codes = scheme.codes[row]
+        standard = priced & (codes == scheme.code('standard'))
+        charge[standard] = unit_price[row[standard]] * quantities[standard]
+        package = priced & (codes == scheme.code('package'))
+        charge[package] = unit_price[row[package]] * np.ceil(
+            quantities[package] / package_size[row[package]]
+        )
+        for name in ('graduated', 'volume'):
+            tiered = priced & (codes == scheme.code(name))
+            # Tiered prices are few, so each is applied to its subscriptions
+            # at once.
+            for p in np.unique(row[tiered]):
+                rows = tiered & (row == p)
+                tiers = price['tiers'][p] or []
+                if tiers:
+                    charge[rows] = _tiered(quantities[rows], tiers, name)
+
+        unit: Categorical = price['renewal_interval_unit']
+        months_per_unit = np.array(
+            [MONTHS_PER_UNIT[u] for u in unit.categories] + [np.inf]
+        )
+        interval = np.ma.filled(price['renewal_interval_quantity'], 1)
+        months = months_per_unit[unit.codes] * np.maximum(interval, 1)
+        charge = charge / months[row]
+
+    status: Categorical = subs['status']
+    earning = priced & status.mask(*statuses)
+    return {
+        'id': subs['id'],
+        'mrr': np.where(earning, charge, 0.0),
+        'priced': priced,
+    }
+
+
+def _keys(column: Any) -> tuple['np.ndarray', Any]:
+    """Comparable keys of a group column and a function decoding them."""
+    np = _numpy()
+    if isinstance(column, Categorical):
+        categories = column.categories
+        return column.codes, lambda keys: np.array(
+            [categories[k] if k >= 0 else None for k in keys.tolist()],
+            dtype=object
+        )
+    if isinstance(column, np.ma.MaskedArray):
+        missing = np.iinfo(np.int64).min
+        keys = np.ma.filled(column.astype(np.int64), missing)
+        return keys, lambda keys: np.array(
+            [None if k == missing else k for k in keys.tolist()],
+            dtype=object
+        )
+    if column.dtype == object:
+        keys = np.array(
+            ['' if value is None else str(value) for value in column]
+        )
+        return keys, lambda keys: keys
+    return column, lambda keys: keys
+
+
+def revenue(
+        subscriptions: Any,
+        prices: Any,
+        by: str = 'product_id',
+        statuses: Iterable[str] = REVENUE_STATUSES,
+) -> dict[str, 'np.ndarray']:
+    """MRR and ARR grouped by an attribute of the subscriptions.
+
+    Args:
+        `subscriptions`: Subscription records, in any form accepted by
+        `columns`.
+        `prices`: Price records, in any form accepted by `columns`.
+        `by`: (Optional) The attribute grouped by, e.g. `variant_id` or
+        `status`. Nested attributes are separated by dots.
+        `statuses`: (Optional) Statuses of the subscriptions bringing in
+        revenue.
+
+    Returns:
+        Columns, one row per group sorted by group: the values of `by`, and
+        `subscriptions` (number of subscriptions bringing in revenue),
+        `mrr` and `arr` in cents.
+
+    Raises:
+        `ImportError`: If numpy is not installed.
+        `KeyError`: If `by` is not an attribute of subscriptions.
+    """
+    np = _numpy()
+    subs = columns(
+        subscriptions,
+        SubscriptionAttributes,
+        {*_SUBSCRIPTION_FIELDS, by}
+    )
+    mrr = _mrr(subs, columns(prices, PriceAttributes, _PRICE_FIELDS), statuses)
+    keys, decode = _keys(subs[by])
+    groups, inverse = np.unique(keys, return_inverse=True)
+    total = np.bincount(inverse, weights=mrr['mrr'], minlength=len(groups))
+    return {
+        by: decode(groups),
+        'subscriptions': np.bincount(
+            inverse,
+            weights=mrr['mrr'] > 0,
+            minlength=len(groups)
+        ).astype(np.int64),
+        'mrr': total,
+        'arr': total * 12,
+    }
+
+
+def revenue_movements(
+        before: Any,
+        after: Any,
+        prices: Any,
+        by: str = 'product_id',
+        statuses: Iterable[str] = REVENUE_STATUSES,
+) -> dict[str, 'np.ndarray']:
+    """Changes of MRR between two snapshots of the subscriptions.
+
+    Comparing the subscriptions of consecutive days, the MRR of each
+    subscription is attributed to one movement:
+
+    - `new`: MRR of subscriptions that brought in none before.
+    - `expansion`: Increase of MRR of subscriptions bringing in more.
+    - `contraction`: Decrease of MRR of subscriptions bringing in less.
+    - `churn`: MRR lost from subscriptions that no longer bring in any.
+
+    Args:
+        `before`: The earlier subscription records.
+        `after`: The later subscription records.
+        `prices`: Price records, in any form accepted by `columns`.
+        `by`: (Optional) The attribute grouped by, taken from the later
+        snapshot unless the subscription is only in the earlier one.
+        `statuses`: (Optional) Statuses of the subscriptions bringing in
+        revenue.
+
+    Returns:
+        Columns, one row per group sorted by group: the values of `by`,
+        `mrr_before`, `mrr_after`, `new`, `expansion`, `contraction`,
+        `churn` and `net_new` in cents, `churned`, the number of churned
+        subscriptions, and `churn_rate`, the share of the MRR before that
+        churned.
+
+    Raises:
+        `ImportError`: If numpy is not installed.
+        `KeyError`: If `by` is not an attribute of subscriptions.
+    """
+    np = _numpy()
+    fields = {*_SUBSCRIPTION_FIELDS, by}
+    price = columns(prices, PriceAttributes, _PRICE_FIELDS)
+    old = columns(before, SubscriptionAttributes, fields)
+    new = columns(after, SubscriptionAttributes, fields)
+    old_mrr = _mrr(old, price, statuses)['mrr']
+    new_mrr = _mrr(new, price, statuses)['mrr']
+    old_keys, decode = _keys(old[by])
+    new_keys, _ = _keys(new[by])
+
+    # Align both snapshots on the union of their subscription ids.
+    ids = np.union1d(old['id'], new['id'])
+    before_mrr = np.zeros(len(ids))
+    after_mrr = np.zeros(len(ids))
+    keys = np.empty(len(ids), dtype=np.result_type(old_keys, new_keys))
+    before_mrr[np.searchsorted(ids, old['id'])] = old_mrr
+    keys[np.searchsorted(ids, old['id'])] = old_keys
+    after_mrr[np.searchsorted(ids, new['id'])] = new_mrr
+    keys[np.searchsorted(ids, new['id'])] = new_keys
+
+    delta = after_mrr - before_mrr
+    earning_before = before_mrr > 0
+    earning_after = after_mrr > 0
+    both = earning_before & earning_after
+    churned = earning_before & ~earning_after
+    movements = {
+        'new': np.where(~earning_before & earning_after, after_mrr, 0.0),
+        'expansion': np.where(both & (delta > 0), delta, 0.0),
+        'contraction': np.where(both & (delta < 0), -delta, 0.0),
+        'churn': np.where(churned, before_mrr, 0.0),
+    }
+
+    groups, inverse = np.unique(keys, return_inverse=True)
+
+    def total(weights: 'np.ndarray') -> 'np.ndarray':
+        return np.bincount(inverse, weights=weights, minlength=len(groups))
+
+    result = {
+        by: decode(groups),
+        'mrr_before': total(before_mrr),
+        'mrr_after': total(after_mrr),
+        **{name: total(values) for name, values in movements.items()},
+    }
+    result['net_new'] = (
+        result['new'] + result['expansion']
+        - result['contraction'] - result['churn']
+    )
+    result['churned'] = total(churned).astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['churn_rate'] = np.where(
+            result['mrr_before'] > 0,
+            result['churn'] / result['mrr_before'],
+            0.0
+        )
+    return result
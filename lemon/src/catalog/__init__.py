@@ -0,0 +1 @@
+from .catalog import Catalog
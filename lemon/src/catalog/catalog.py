@@ -0,0 +1,343 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+from collections.abc import Iterable
+from typing import Any
+
+from ..internal.request import paginate_pages
+from ..prices import list_prices
+from ..products import list_products
+from ..types.response import LazyRecords
+
+# Version of the snapshot file layout written by `Catalog.save`.
+SNAPSHOT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def _raw(records: Any) -> list[dict[str, Any]]:
+    if isinstance(records, LazyRecords):
+        return list(records.raw)
+    return [
+        record if isinstance(record, dict) else record.model_dump()
+        for record in records or ()
+    ]
+
+
+class Catalog:
+    """Products, variants and prices of a store with in-memory indexes.
+
+    A catalog is loaded once from the API with `Catalog.load`, or from a
+    snapshot written by `save` with `Catalog.open`, and answers the lookups
+    of a checkout flow (variant → product → price → store) without further
+    requests. Records are kept as returned by the API.
+
+    `refresh` fetches the catalog again and swaps in the records that
+    changed; `start_refresh` does so periodically in the background. The
+    list endpoints cannot be filtered on `updated_at`, so a refresh reads
+    every page, concurrently, and keeps the records that did not change.
+    """
+
+    def __init__(
+            self,
+            products: Iterable[dict[str, Any]] = (),
+            variants: Iterable[dict[str, Any]] = (),
+            prices: Iterable[dict[str, Any]] = (),
+            store_id: int | str | None = None,
+            fetched_at: float | None = None,
+    ) -> None:
+        """
+        Args:
+            products: (Optional) Product objects.
+            variants: (Optional) Variant objects, as included in product
+            responses.
+            prices: (Optional) Price objects.
+            store_id: (Optional) The store the catalog was loaded for, or
+            `None` for every store the API key has access to.
+            fetched_at: (Optional) Time the records were fetched at.
+        """
+        self.store_id = None if store_id is None else str(store_id)
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self._index(list(products), list(variants), list(prices))
+
+    def _index(
+            self,
+            products: list[dict[str, Any]],
+            variants: list[dict[str, Any]],
+            prices: list[dict[str, Any]],
+    ) -> None:
+        by_id = {product['id']: product for product in products}
+        by_slug = {
+            product['attributes']['slug']: product for product in products
+        }
+        by_store: dict[str, list[dict[str, Any]]] = {}
+        for product in products:
+            store = str(product['attributes']['store_id'])
+            by_store.setdefault(store, []).append(product)
+
+        variant_by_id = {variant['id']: variant for variant in variants}
+        price_by_id = {price['id']: price for price in prices}
+        by_variant: dict[str, list[dict[str, Any]]] = {}
+        for price in prices:
+            variant = str(price['attributes']['variant_id'])
+            by_variant.setdefault(variant, []).append(price)
+        # Sorted once here rather than on every checkout lookup.
+        for listed in by_variant.values():
+            listed.sort(
+                key=lambda price: price['attributes']['created_at'],
+                reverse=True
+            )
+
+        # Indexes are replaced together so readers never see a mix of old
+        # and new records.
+        (
+            self._products,
+            self._product_by_slug,
+            self._products_by_store,
+            self._variants,
+            self._prices,
+            self._prices_by_variant,
+        ) = by_id, by_slug, by_store, variant_by_id, price_by_id, by_variant
+
+    @classmethod
+    async def load(
+            cls,
+            store_id: int | str | None = None,
+            page_size: int = 100,
+            concurrency: int = 4,
+    ) -> 'Catalog':
+        """Fetch the catalog of a store from the API.
+
+        The pages of products, along with their variants, and of prices are
+        requested concurrently.
+
+        Args:
+            `store_id`: (Optional) Only load the products of this store. Prices
+            are kept only for the variants of the loaded products.
+            `page_size`: (Optional) Number of records per page, at most 100.
+            `concurrency`: (Optional) Maximum number of pages of each resource
+            requested at once.
+
+        Returns:
+            The loaded catalog.
+
+        Raises:
+            `RuntimeError`: If the response of a page holds an error.
+        """
+        catalog = cls(store_id=store_id)
+        await catalog._fetch(page_size, concurrency)
+        return catalog
+
+    async def _fetch(self, page_size: int, concurrency: int) -> int:
+        params: dict[str, Any] = {'include': ['variants']}
+        if self.store_id is not None:
+            params['filter'] = {'store_id': self.store_id}
+
+        async def fetch_products():
+            products, variants = [], []
+            async for response in paginate_pages(
+                lambda p: list_products(p, lazy=True),
+                params,
+                page_size=page_size,
+                concurrency=concurrency
+            ):
+                products.extend(_raw(response['data']['data']))
+                variants.extend(
+                    record for record in _raw(response['data'].get('included'))
+                    if record['type'] == 'variants'
+                )
+            return products, variants
+
+        async def fetch_prices():
+            return [
+                price
+                async for response in paginate_pages(
+                    list_prices,
+                    page_size=page_size,
+                    concurrency=concurrency
+                )
+                for price in _raw(response['data']['data'])
+            ]
+
+        fetched_at = time.time()
+        (products, variants), prices = await asyncio.gather(
+            fetch_products(),
+            fetch_prices()
+        )
+        if self.store_id is not None:
+            known = {variant['id'] for variant in variants}
+            prices = [
+                price for price in prices
+                if str(price['attributes']['variant_id']) in known
+            ]
+        return self._merge(products, variants, prices, fetched_at)
+
+    def _merge(
+            self,
+            products: list[dict[str, Any]],
+            variants: list[dict[str, Any]],
+            prices: list[dict[str, Any]],
+            fetched_at: float,
+    ) -> int:
+        changed = 0
+        merged = []
+        for records, current in (
+            (products, self._products),
+            (variants, self._variants),
+            (prices, self._prices),
+        ):
+            kept = []
+            for record in records:
+                old = current.get(record['id'])
+                if old is not None and old == record:
+                    kept.append(old)
+                else:
+                    kept.append(record)
+                    changed += 1
+            ids = {record['id'] for record in records}
+            changed += sum(1 for id in current if id not in ids)
+            merged.append(kept)
+        self._index(*merged)
+        self.fetched_at = fetched_at
+        return changed
+
+    async def refresh(self, page_size: int = 100, concurrency: int = 4) -> int:
+        """Fetch the catalog again and replace the records that changed.
+
+        Every page is read again, as the API cannot list the records changed
+        since a given time. Unchanged records keep their identity, so
+        references held by callers stay valid.
+
+        Returns:
+            The number of records added, changed or removed.
+
+        Raises:
+            `RuntimeError`: If the response of a page holds an error.
+        """
+        return await self._fetch(page_size, concurrency)
+
+    def start_refresh(
+            self,
+            interval: float,
+            path: str | os.PathLike | None = None,
+    ) -> asyncio.Task:
+        """Refresh the catalog every `interval` seconds in the background.
+
+        A refresh that fails, whatever the error, is logged and leaves the
+        catalog as it was; the next one is attempted after another
+        `interval`.
+
+        Args:
+            `interval`: Number of seconds between two refreshes.
+            `path`: (Optional) Save a snapshot to this file after every
+            refresh that changed the catalog.
+
+        Returns:
+            The task running the refreshes. Cancel it to stop them.
+        """
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    changed = await self.refresh()
+                    if changed and path is not None:
+                        self.save(path)
+                except Exception:
+                    logger.exception("Catalog refresh failed")
+        return asyncio.ensure_future(run())
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Write a snapshot of the catalog to `path`.
+
+        The file is replaced atomically so workers opening it concurrently
+        read either the previous or the new snapshot.
+        """
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'store_id': self.store_id,
+            'fetched_at': self.fetched_at,
+            'products': list(self._products.values()),
+            'variants': list(self._variants.values()),
+            'prices': list(self._prices.values()),
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(snapshot, file, separators=(',', ':'))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def open(cls, path: str | os.PathLike) -> 'Catalog':
+        """Load a catalog from a snapshot written by `save`.
+
+        Raises:
+            `ValueError`: If the file is not a catalog snapshot of a supported
+            version.
+        """
+        with open(path, 'rb') as file:
+            snapshot = json.loads(file.read())
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Unsupported catalog snapshot version: {snapshot.get('version')}"
+            )
+        return cls(
+            snapshot['products'],
+            snapshot['variants'],
+            snapshot['prices'],
+            store_id=snapshot['store_id'],
+            fetched_at=snapshot['fetched_at'],
+        )
+
+    def product(self, product_id: int | str) -> dict[str, Any] | None:
+        return self._products.get(str(product_id))
+
+    def product_by_slug(self, slug: str) -> dict[str, Any] | None:
+        return self._product_by_slug.get(slug)
+
+    def products_for_store(self, store_id: int | str) -> list[dict[str, Any]]:
+        return list(self._products_by_store.get(str(store_id), ()))
+
+    def variant(self, variant_id: int | str) -> dict[str, Any] | None:
+        return self._variants.get(str(variant_id))
+
+    def product_for_variant(self, variant_id: int | str) -> dict[str, Any] | None:
+        variant = self.variant(variant_id)
+        if variant is None:
+            return None
+        return self.product(variant['attributes']['product_id'])
+
+    def price(self, price_id: int | str) -> dict[str, Any] | None:
+        return self._prices.get(str(price_id))
+
+    def prices_for_variant(self, variant_id: int | str) -> list[dict[str, Any]]:
+        """The prices of a variant, most recently created first."""
+        return list(self._prices_by_variant.get(str(variant_id), ()))
+
+    def price_for_variant(self, variant_id: int | str) -> dict[str, Any] | None:
+        """The current price of a variant, i.e. its most recent one."""
+        prices = self._prices_by_variant.get(str(variant_id))
+        return prices[0] if prices else None
+
+    def store_for_variant(self, variant_id: int | str) -> str | None:
+        product = self.product_for_variant(variant_id)
+        if product is None:
+            return None
+        return str(product['attributes']['store_id'])
+
+    def __len__(self) -> int:
+        return len(self._products) + len(self._variants) + len(self._prices)
+
+    def __repr__(self) -> str:
+        return (
+            f"Catalog(store_id={self.store_id!r}, "
+            f"products={len(self._products)}, variants={len(self._variants)}, "
+            f"prices={len(self._prices)})"
+        )
@@ -10,7 +10,8 @@ from ..types.response import (
     MetaPage,
     Params,
     RelationshipKeys,
-    Pick
+    Pick,
+    compact_record,
 )
 
 
@@ -181,4 +182,6 @@ class ListCheckouts(
         Data[dict[str, Any], Any]
     ]
 ):
-    pass
\ No newline at end of file
+    pass
+
+CheckoutRecord = compact_record('CheckoutRecord', 'checkouts', Attributes)
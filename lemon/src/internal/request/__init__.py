@@ -1,2 +1,13 @@
-from .make_request import fetch, FetchOptions, HTTPVerbEnum
-from .types import FetchResponse
\ No newline at end of file
+from .make_request import fetch, send, FetchOptions, HTTPVerbEnum
+from .types import FetchResponse
+from .paginate import paginate, paginate_pages
+from .cache import (
+    CacheBackend,
+    CacheStats,
+    MemoryBackend,
+    ResponseCache,
+    cache_key,
+)
+from .sqlite_cache import SQLiteBackend
+from .loader import Loader
+from .ratelimit import RateLimiter, RateLimiterStats
@@ -0,0 +1,379 @@
+import asyncio
+import copy
+import logging
+import time
+
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, NamedTuple, Protocol, TypeVar, TypedDict
+
+import httpx
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats(TypedDict):
+    hits: int
+    misses: int
+    stale_hits: int
+    revalidations: int
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+
+class Lookup(NamedTuple):
+    value: dict[str, Any] | None
+    stale: bool
+
+class Entry(NamedTuple):
+    value: dict[str, Any]
+    resource: str
+    size: int
+    stored_at: float
+    expires_at: float
+
+
+def resource_of(path: str) -> str:
+    """The resource type of an API path, e.g. `products` for `/v1/products/1`."""
+    parts = path.strip('/').split('/')
+    return parts[1] if len(parts) > 1 else parts[0]
+
+def resource_id_of(path: str) -> str | None:
+    """The resource id of an API path, e.g. `1` for `/v1/products/1`."""
+    parts = path.strip('/').split('/')
+    return parts[2] if len(parts) > 2 else None
+
+def object_paths(resource: str, id: str | int) -> tuple[str, ...]:
+    """Paths of the list queries of `resource` and of its object `id`."""
+    return (f"/v1/{resource}", f"/v1/{resource}/{id}")
+
+def cache_key(path: str, params: Mapping[str, Any] | None = None) -> str:
+    """Cache key of a request made to `path` with the query `params`."""
+    query = httpx.QueryParams(sorted(
+        (key, value) for key, value in (params or {}).items()
+        if value is not None
+    ))
+    return f"{path}?{query}" if query else path
+
+
+class CacheBackend(Protocol):
+    """Storage of the entries of a `ResponseCache`.
+
+    Backends own the entries and enforce the `max_entries` and `max_bytes`
+    limits by evicting the least recently used entries.
+
+    Backends doing I/O set `blocking` so that their methods are called from
+    a thread rather than on the event loop.
+    """
+
+    blocking: bool
+    max_bytes: int
+
+    def get(self, key: str) -> Entry | None:
+        """Return the entry for `key`, marking it as recently used."""
+        ...
+
+    def set(self, key: str, entry: Entry) -> int:
+        """Store `entry` under `key`.
+
+        Returns:
+            The number of entries evicted to stay within the limits.
+        """
+        ...
+
+    def delete(self, key: str) -> bool:
+        ...
+
+    def delete_paths(self, resource: str, paths: tuple[str, ...] | None) -> int:
+        """Delete the entries of `resource`, or only those of `paths`."""
+        ...
+
+    def keys(self) -> list[str]:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+    @property
+    def nbytes(self) -> int:
+        ...
+
+
+class MemoryBackend:
+    """In-process LRU storage of cache entries."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, Entry] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: Entry) -> int:
+        self.delete(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        evicted = 0
+        while (
+            len(self._entries) > self.max_entries
+            or self._bytes > self.max_bytes
+        ):
+            self.delete(next(iter(self._entries)))
+            evicted += 1
+        return evicted
+
+    def delete(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        return True
+
+    def delete_paths(self, resource: str, paths: tuple[str, ...] | None) -> int:
+        keys = [
+            key for key, entry in self._entries.items()
+            if entry.resource == resource
+            and (paths is None or key.partition('?')[0] in paths)
+        ]
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def keys(self) -> list[str]:
+        return list(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+
+class ResponseCache:
+    """Cache of `GET` responses with TTL and LRU eviction.
+
+    Entries expire after the TTL of their resource and the least recently
+    used entries are evicted once either `max_entries` or `max_bytes` is
+    exceeded. The size of an entry is the size of the response body.
+
+    With `stale_while_revalidate` set, an expired entry is still served for
+    that many seconds while a single background request refreshes it. An
+    entry older than `max_stale` is never served.
+
+    Entries are kept in memory unless another `backend` is given, e.g. a
+    `SQLiteBackend` shared by the worker processes of a host.
+
+    Pass an instance to `Config(cache=...)` to have `fetch` serve `GET`
+    requests from it.
+    """
+
+    def __init__(
+            self,
+            ttl: Mapping[str, float] | None = None,
+            default_ttl: float = 0,
+            max_entries: int = 1024,
+            max_bytes: int = 32 * 2**20,
+            stale_while_revalidate: float = 0,
+            max_stale: float | None = None,
+            backend: CacheBackend | None = None,
+    ) -> None:
+        """
+        Args:
+            ttl: (Optional) Time to live in seconds per resource type, e.g.
+            `{'products': 300, 'prices': 300}`.
+            default_ttl: (Optional) Time to live of resources without an
+            entry in `ttl`. Responses with a time to live of 0 are not cached.
+            max_entries: (Optional) Maximum number of cached responses.
+            max_bytes: (Optional) Maximum total size of the cached responses.
+            stale_while_revalidate: (Optional) Number of seconds past its
+            expiry during which an entry is served while being refreshed.
+            max_stale: (Optional) Maximum age in seconds of a served entry,
+            stale or not, measured from when it was cached.
+            backend: (Optional) Storage of the entries. `max_entries` and
+            `max_bytes` only apply to the default in-memory backend; other
+            backends enforce their own limits.
+        """
+        self.ttl = dict(ttl or {})
+        self.default_ttl = default_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_stale = max_stale
+        if backend is None:
+            backend = MemoryBackend(max_entries, max_bytes)
+        self.backend: CacheBackend = backend
+        self.max_bytes = getattr(backend, 'max_bytes', max_bytes)
+        self._refreshing: dict[str, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._revalidations = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    async def _call(self, method: Callable[..., T], *args: Any) -> T:
+        """Call a method of the backend, from a thread if it blocks."""
+        if getattr(self.backend, 'blocking', False):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def key(self, path: str, params: Mapping[str, Any] | None = None) -> str:
+        return cache_key(path, params)
+
+    def ttl_for(self, resource: str) -> float:
+        return self.ttl.get(resource, self.default_ttl)
+
+    async def lookup(self, key: str) -> Lookup:
+        """Look up the cached response for `key`.
+
+        The response returned is a copy that the caller may modify.
+
+        Returns:
+            The cached response, or `None` if there is none that may be
+            served, and whether it is stale and should be revalidated.
+        """
+        if self.ttl_for(resource_of(key.partition('?')[0])) <= 0:
+            # Never cached, so not worth a trip to the backend.
+            return Lookup(None, False)
+        entry = await self._call(self.backend.get, key)
+        if entry is None:
+            self._misses += 1
+            return Lookup(None, False)
+        now = time.time()
+        too_old = self.max_stale is not None and now - entry.stored_at > self.max_stale
+        if entry.expires_at <= now or too_old:
+            if not too_old and now < entry.expires_at + self.stale_while_revalidate:
+                self._stale_hits += 1
+                return Lookup(copy.deepcopy(entry.value), True)
+            await self._call(self.backend.delete, key)
+            self._expirations += 1
+            self._misses += 1
+            return Lookup(None, False)
+        self._hits += 1
+        return Lookup(copy.deepcopy(entry.value), False)
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached response for `key`, if it may be served."""
+        return (await self.lookup(key)).value
+
+    def revalidate(
+            self,
+            key: str,
+            refresh: Callable[[], Awaitable[tuple[dict[str, Any], int]]]
+    ) -> asyncio.Future:
+        """Refresh the entry for `key` in the background.
+
+        Only one refresh per key runs at a time; while it is pending further
+        calls return the same future. The entry is replaced only if the
+        refresh succeeds, otherwise the stale entry is kept.
+
+        Args:
+            key: The key of the entry.
+            refresh: Coroutine function returning the fresh response and the
+            size of its body.
+
+        Returns:
+            The future of the pending refresh.
+        """
+        if (pending := self._refreshing.get(key)) is not None:
+            return pending
+        self._revalidations += 1
+        future = asyncio.ensure_future(self._revalidate(key, refresh))
+        self._refreshing[key] = future
+        future.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return future
+
+    async def _revalidate(
+            self,
+            key: str,
+            refresh: Callable[[], Awaitable[tuple[dict[str, Any], int]]]
+    ) -> None:
+        try:
+            response, size = await refresh()
+        except Exception:
+            logger.exception("Revalidating %s failed", key)
+            return
+        if response.get('error') is None:
+            await self.set(key, response, size)
+
+    async def set(self, key: str, value: dict[str, Any], size: int) -> None:
+        """Cache the response `value` of `size` bytes under `key`.
+
+        Responses of resources with a time to live of 0 and responses larger
+        than the `max_bytes` of the backend are not cached.
+        """
+        resource = resource_of(key.partition('?')[0])
+        ttl = self.ttl_for(resource)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        now = time.time()
+        self._evictions += await self._call(
+            self.backend.set,
+            key,
+            Entry(copy.deepcopy(value), resource, size, now, now + ttl)
+        )
+
+    async def invalidate(
+            self,
+            key: str | None = None,
+            resource: str | None = None,
+            id: str | int | None = None,
+    ) -> int:
+        """Evict cached responses.
+
+        Args:
+            key: (Optional) Evict the response cached under this key.
+            resource: (Optional) Evict the responses of this resource type.
+            id: (Optional) Together with `resource`, evict only the responses
+            of that resource object along with the list queries of the
+            resource type.
+
+        Returns:
+            The number of evicted responses.
+        """
+        if key is not None:
+            return int(await self._call(self.backend.delete, key))
+        if resource is None:
+            return 0
+        return await self._call(
+            self.backend.delete_paths,
+            resource,
+            None if id is None else object_paths(resource, id)
+        )
+
+    async def clear(self) -> None:
+        await self._call(self.backend.clear)
+
+    async def stats(self) -> CacheStats:
+        """Counters of the cache, with the size of its backend."""
+        entries = await self._call(len, self.backend)
+        nbytes = await self._call(lambda: self.backend.nbytes)
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'stale_hits': self._stale_hits,
+            'revalidations': self._revalidations,
+            'evictions': self._evictions,
+            'expirations': self._expirations,
+            'entries': entries,
+            'bytes': nbytes,
+        }
+
+    def __len__(self) -> int:
+        return len(self.backend)
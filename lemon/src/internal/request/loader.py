@@ -0,0 +1,113 @@
+import asyncio
+
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Mapping
+from typing import Any, Generic, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+type BatchFunction = Callable[[list[Any]], Awaitable[Mapping[Any, Any]]]
+
+
+class Loader(Generic[K, V]):
+    """Batch and deduplicate lookups made in the same event loop tick.
+
+    Every key passed to `load` before the event loop gets back to the
+    loader is handed to a single call of `batch_fn`. Results are memoized
+    for the lifetime of the loader, so create one loader per request or
+    job rather than sharing one across them.
+    """
+
+    def __init__(
+            self,
+            batch_fn: BatchFunction,
+            max_batch_size: int | None = None,
+            key: Callable[[Any], K] | None = None,
+    ) -> None:
+        """
+        Args:
+            batch_fn: Coroutine function mapping a list of distinct keys to
+            their values. Keys missing from the mapping load as `None`.
+            max_batch_size: (Optional) Maximum number of keys passed to a
+            single call of `batch_fn`.
+            key: (Optional) Function normalising the keys passed to `load`,
+            e.g. `str` so that `1` and `'1'` share an entry.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.key = key
+        self._futures: dict[K, asyncio.Future] = {}
+        self._queue: list[K] = []
+        # The event loop only keeps weak references to tasks.
+        self._running: set[asyncio.Task] = set()
+        self._batches = 0
+
+    def load(self, key: Any) -> 'asyncio.Future[V | None]':
+        """Schedule the lookup of `key`.
+
+        Returns:
+            A future resolving to the value of `key`, or `None` if
+            `batch_fn` did not return one.
+        """
+        if self.key is not None:
+            key = self.key(key)
+        if (future := self._futures.get(key)) is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[Any]) -> list[V | None]:
+        """Look up several keys at once, in the order given."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Any, value: V) -> None:
+        """Memoize `value` for `key` unless it is already loaded or pending."""
+        if self.key is not None:
+            key = self.key(key)
+        if key in self._futures:
+            return
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._futures[key] = future
+
+    def clear(self, key: Any = None) -> None:
+        """Forget the memoized value of `key`, or of every key."""
+        if key is None:
+            self._futures.clear()
+            return
+        if self.key is not None:
+            key = self.key(key)
+        self._futures.pop(key, None)
+
+    @property
+    def batches(self) -> int:
+        """Number of calls made to `batch_fn` so far."""
+        return self._batches
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        size = self.max_batch_size or len(keys)
+        for start in range(0, len(keys), size):
+            self._batches += 1
+            task = asyncio.ensure_future(self._run(keys[start:start + size]))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, keys: list[K]) -> None:
+        try:
+            values = await self.batch_fn(keys)
+        except Exception as exc:
+            for key in keys:
+                future = self._futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+            return
+        for key in keys:
+            future = self._futures.get(key)
+            if future is not None and not future.done():
+                future.set_result(values.get(key))
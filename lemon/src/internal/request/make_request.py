@@ -1,13 +1,16 @@
 import sys
+import time
 
+from email.utils import parsedate_to_datetime
 from enum import Enum
-from typing import Any, cast, Generic, TypeVar
+from typing import Any, Callable, cast, Generic, TypeVar
 
 import httpx
 
 from pydantic import BaseModel
 
 from ..utils import get_kv, CONFIG_KEY, API_BASE_URL, Error, JSONAPIError
+from .cache import resource_of, resource_id_of
 
 
 P = TypeVar('P')
@@ -36,6 +39,21 @@ def create_lemon_error(
     return error
 
 
+def _retry_after(value: str | None, default: float = 60.0) -> float:
+    """Seconds to wait from a `Retry-After` header, in seconds or a date."""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(date.timestamp() - time.time(), 0.0)
+
+
 async def fetch(options: FetchOptions, requiresApiKey = True):
     """Customisation of request object.
 
@@ -47,6 +65,11 @@ async def fetch(options: FetchOptions, requiresApiKey = True):
         requiresApiKey: boolean. Whether or not the api endpoint needs an
         accompanying api key to be sent with the request.
 
+    If a response cache is configured, `GET` requests are served from it
+    while fresh, or while stale within its revalidation window in which case
+    the entry is refreshed in the background. Any other request evicts the
+    cached responses of the resource it targets.
+
     Returns:
         Response: `dict`. Includes `status_code`, `data` and `error` as the keys
         to the response dictionary.
@@ -74,6 +97,67 @@ async def fetch(options: FetchOptions, requiresApiKey = True):
             err_fn(response["error"])
         return response
     
+    cache = config.get('cache')
+    on_error = config.get('on_error')
+    if cache is None:
+        response, _ = await send(options, requiresApiKey, on_error)
+        return response
+
+    if options.method != HTTPVerbEnum.GET:
+        response, _ = await send(options, requiresApiKey, on_error)
+        if response["error"] is None:
+            await cache.invalidate(
+                resource=resource_of(options.path),
+                id=resource_id_of(options.path)
+            )
+        return response
+
+    cache_key = cache.key(options.path, options_valid.get('param'))
+    cached, stale = await cache.lookup(cache_key)
+    if cached is not None:
+        if stale:
+            cache.revalidate(
+                cache_key,
+                lambda: send(options, requiresApiKey, None)
+            )
+        return cached
+
+    response, size = await send(options, requiresApiKey, on_error)
+    if response["error"] is None:
+        await cache.set(cache_key, response, size)
+    return response
+
+
+async def send(
+        options: FetchOptions,
+        requiresApiKey: bool = True,
+        on_error: Callable[[Error], Any] | None = None
+) -> tuple[dict, int]:
+    """Send a request to the lemon squeezy api, bypassing the response cache.
+
+    Args:
+        options: options to pass to httpx.
+        requiresApiKey: boolean. Whether or not the api endpoint needs an
+        accompanying api key to be sent with the request.
+        on_error: (Optional) callable invoked with the error of an erroneous
+        response.
+
+    If a rate limiter is configured, the request waits for its turn first,
+    and a `429` response holds every request for its `Retry-After` seconds.
+
+    Returns:
+        The response `dict`, as returned by `fetch`, and the size of the
+        response body in bytes.
+    """
+    options_valid = options.model_dump()
+    response = {
+        "status_code": None,
+        "data": None,
+        "error": cast(None | Error, None),
+    }
+    size = 0
+    config: dict = cast(dict, get_kv(CONFIG_KEY))
+
     headers = {
         "Accept": "application/vnd.api+json",
         "Content-Type": "application/vnd.api+json",
@@ -83,6 +167,9 @@ async def fetch(options: FetchOptions, requiresApiKey = True):
         headers["Authorization"] = f"Bearer {config["api_key"]}"
 
     data = options.body if options.method in {"PATCH", "POST"} else None
+    limiter = config.get("rate_limiter")
+    if limiter is not None:
+        await limiter.acquire()
     async with httpx.AsyncClient(
         base_url=API_BASE_URL,
         headers=headers,
@@ -106,17 +193,22 @@ async def fetch(options: FetchOptions, requiresApiKey = True):
                         f"Unrecognised HTTP verb: {options.method}",
                         "unknown HTTP verb"
                     )
-                    return response
+                    return response, size
             res.raise_for_status()
             response["status_code"] = res.status_code
             response["data"] = res.json() if res.status_code != 204 else None
+            size = len(res.content)
         except httpx.RequestError as exc:
             response["error"] = create_lemon_error(
                 f"{exc}", f"Error while requesting {exc.request.url!r}"
             )
-            if (err_fn := config.get('on_error')):
-                err_fn(response["error"])
+            if on_error:
+                on_error(response["error"])
         except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 429 and limiter is not None:
+                limiter.pause(
+                    _retry_after(exc.response.headers.get("retry-after"))
+                )
             _data = exc.response.json()
             _error = _data.get("errors") or \
             _data.get("error") or \
@@ -125,7 +217,8 @@ async def fetch(options: FetchOptions, requiresApiKey = True):
             response["status_code"] = exc.response.status_code
             response["data"] = _data
             response["error"] = create_lemon_error(f"{exc}", _error)
-            if (err_fn := config.get('on_error')):
-                err_fn(response["error"])
+            if on_error:
+                on_error(response["error"])
+
+    return response, size
 
-    return response
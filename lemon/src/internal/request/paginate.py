@@ -0,0 +1,113 @@
+import asyncio
+
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from ..utils import Error
+from ...types.response import CompactRecord, LazyRecords
+
+type ListFunction = Callable[[dict], Awaitable[dict]]
+
+MAX_PAGE_SIZE = 100
+
+
+def _page_params(params: dict, number: int, size: int) -> dict:
+    return {**params, 'page': {'number': number, 'size': size}}
+
+def _raise_for_error(response: dict) -> None:
+    error: Error | None = response.get('error')
+    if error is not None:
+        raise RuntimeError(repr(error))
+
+def _records(response: dict, record: type[CompactRecord] | None) -> list:
+    data = response['data']['data']
+    if record is None:
+        return list(data)
+    if isinstance(data, LazyRecords):
+        data = data.raw
+    return record.from_iterable(data)
+
+async def paginate_pages(
+        list_fn: ListFunction,
+        params: dict = {},
+        page_size: int = MAX_PAGE_SIZE,
+        concurrency: int = 4,
+) -> AsyncIterator[dict]:
+    """Iterate over every page of a list endpoint.
+
+    The first page is requested on its own to learn the number of pages. The
+    remaining pages are then requested concurrently, at most `concurrency`
+    at a time, and yielded in page order.
+
+    Args:
+        `list_fn`: The list function, e.g. `list_subscriptions`.
+        `params`: (Optional) The parameters passed to `list_fn` on every call.
+        Any `page` parameter is overridden.
+        `page_size`: (Optional) Number of records per page, at most 100.
+        `concurrency`: (Optional) Maximum number of pages requested at once.
+
+    Returns:
+        An async iterator over the response objects of each page.
+
+    Raises:
+        `RuntimeError`: If the response of a page holds an error.
+    """
+    page_size = min(page_size, MAX_PAGE_SIZE)
+    first = await list_fn(_page_params(params, 1, page_size))
+    _raise_for_error(first)
+    yield first
+
+    last_page = first['data']['meta']['page']['lastPage']
+    pending: deque[asyncio.Future] = deque()
+    try:
+        for number in range(2, last_page + 1):
+            pending.append(asyncio.ensure_future(
+                list_fn(_page_params(params, number, page_size))
+            ))
+            if len(pending) < concurrency:
+                continue
+            response = await pending.popleft()
+            _raise_for_error(response)
+            yield response
+        while pending:
+            response = await pending.popleft()
+            _raise_for_error(response)
+            yield response
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def paginate(
+        list_fn: ListFunction,
+        params: dict = {},
+        record: type[CompactRecord] | None = None,
+        page_size: int = MAX_PAGE_SIZE,
+        concurrency: int = 4,
+) -> AsyncIterator[Any]:
+    """Iterate over every record of a list endpoint.
+
+    Args:
+        `list_fn`: The list function, e.g. `list_subscriptions`.
+        `params`: (Optional) The parameters passed to `list_fn` on every call.
+        `record`: (Optional) A `CompactRecord` class, e.g.
+        `SubscriptionRecord`. When given, every record is converted into an
+        instance of that class instead of being yielded as returned by
+        `list_fn`.
+        `page_size`: (Optional) Number of records per page, at most 100.
+        `concurrency`: (Optional) Maximum number of pages requested at once.
+
+    Returns:
+        An async iterator over the records of every page.
+
+    Raises:
+        `RuntimeError`: If the response of a page holds an error.
+    """
+    async for response in paginate_pages(
+        list_fn,
+        params,
+        page_size=page_size,
+        concurrency=concurrency
+    ):
+        for item in _records(response, record):
+            yield item
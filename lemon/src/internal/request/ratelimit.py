@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from typing import TypedDict
+
+
+class RateLimiterStats(TypedDict):
+    requests: int
+    waits: int
+    waited: float
+    pauses: int
+
+
+class RateLimiter:
+    """Token bucket shared by every request sent to the API.
+
+    Up to `burst` requests are sent at once, after which requests are spaced
+    out to `rate` requests per `period` seconds. The Lemon Squeezy API
+    allows 300 requests per minute, the default.
+
+    Configure it with `lemon_squeezy_setup` to throttle every request, e.g.
+    the mutations of `sync_webhooks` running in parallel::
+
+        lemon_squeezy_setup(Config(api_key=..., rate_limiter=RateLimiter()))
+    """
+
+    def __init__(
+            self,
+            rate: int = 300,
+            period: float = 60.0,
+            burst: int | None = None,
+    ) -> None:
+        """
+        Args:
+            rate: (Optional) Number of requests allowed per `period`.
+            period: (Optional) Number of seconds over which `rate` applies.
+            burst: (Optional) Number of requests sent at once before being
+            throttled, by default `rate`.
+        """
+        self.rate = rate
+        self.period = period
+        self.burst = rate if burst is None else burst
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        # Created on first use, for the running loop, so a limiter kept in
+        # a long-lived `Config` works across event loops.
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._requests = 0
+        self._waits = 0
+        self._waited = 0.0
+        self._pauses = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._tokens = min(
+            self.burst,
+            self._tokens + elapsed * self.rate / self.period
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        # Waiters queue on the lock, so requests are sent in arrival order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self._paused_until - now
+                if delay <= 0 and self._tokens >= 1:
+                    break
+                if delay <= 0:
+                    delay = (1 - self._tokens) * self.period / self.rate
+                self._waits += 1
+                self._waited += delay
+                await asyncio.sleep(delay)
+            self._tokens -= 1
+            self._requests += 1
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request for `seconds`, e.g. after a `429` response."""
+        self._pauses += 1
+        self._paused_until = max(
+            self._paused_until,
+            time.monotonic() + seconds
+        )
+
+    def stats(self) -> RateLimiterStats:
+        return {
+            'requests': self._requests,
+            'waits': self._waits,
+            'waited': self._waited,
+            'pauses': self._pauses,
+        }
@@ -0,0 +1,223 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from typing import Any
+
+from .cache import Entry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_path ON responses (resource, path);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+# Values larger than this many bytes are stored zlib compressed.
+COMPRESS_THRESHOLD = 1024
+_RAW, _ZLIB = b'j', b'z'
+
+
+def encode(value: dict[str, Any]) -> bytes:
+    """Serialise a cached response into a compact blob."""
+    data = json.dumps(
+        {'status_code': value.get('status_code'), 'data': value.get('data')},
+        separators=(',', ':'),
+        ensure_ascii=False,
+    ).encode()
+    if len(data) > COMPRESS_THRESHOLD:
+        return _ZLIB + zlib.compress(data)
+    return _RAW + data
+
+def decode(blob: bytes) -> dict[str, Any]:
+    """Deserialise a blob produced by `encode`."""
+    data = blob[1:]
+    if blob[:1] == _ZLIB:
+        data = zlib.decompress(data)
+    return {**json.loads(data), 'error': None}
+
+
+class SQLiteBackend:
+    """Cache entries stored in a SQLite database on local disk.
+
+    The database runs in WAL mode so any number of processes on the host can
+    read it while one of them writes. Every worker pointing a
+    `ResponseCache` at the same file shares its entries.
+
+    `max_entries` and `max_bytes` bound the whole database; the size of an
+    entry is the size of its stored, possibly compressed, value. Reading an
+    entry refreshes its recency at most once every `touch_interval` seconds
+    to keep reads from turning into writes.
+
+    Its methods block on disk and on the locks of other processes, so
+    `ResponseCache` calls them from a thread.
+    """
+
+    blocking = True
+
+    def __init__(
+            self,
+            path: str | os.PathLike,
+            max_entries: int = 16384,
+            max_bytes: int = 256 * 2**20,
+            touch_interval: float = 1.0,
+            timeout: float = 5.0,
+    ) -> None:
+        """
+        Args:
+            path: Location of the database file.
+            max_entries: (Optional) Maximum number of stored responses.
+            max_bytes: (Optional) Maximum total size of the stored responses.
+            touch_interval: (Optional) Minimum number of seconds between two
+            recency updates of an entry.
+            timeout: (Optional) Number of seconds to wait for a lock held by
+            another process.
+        """
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def get(self, key: str) -> Entry | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT resource, value, size, stored_at, expires_at, accessed_at "
+                "FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            resource, blob, size, stored_at, expires_at, accessed_at = row
+            now = time.time()
+            if now - accessed_at >= self.touch_interval:
+                self._db.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                    (now, key)
+                )
+        return Entry(decode(blob), resource, size, stored_at, expires_at)
+
+    def set(self, key: str, entry: Entry) -> int:
+        blob = encode(entry.value)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        key.partition('?')[0],
+                        entry.resource,
+                        blob,
+                        len(blob),
+                        entry.stored_at,
+                        entry.expires_at,
+                        time.time(),
+                    )
+                )
+                evicted = self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return evicted
+
+    def _evict(self) -> int:
+        count, total = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        evicted = 0
+        while count > self.max_entries or total > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT ?",
+                (max(count - self.max_entries, 16),)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                count -= 1
+                total -= size
+                evicted += 1
+        return evicted
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM responses WHERE key = ?",
+                (key,)
+            )
+        return cursor.rowcount > 0
+
+    def delete_paths(self, resource: str, paths: tuple[str, ...] | None) -> int:
+        with self._lock:
+            if paths is None:
+                cursor = self._db.execute(
+                    "DELETE FROM responses WHERE resource = ?",
+                    (resource,)
+                )
+            else:
+                cursor = self._db.execute(
+                    "DELETE FROM responses WHERE resource = ? AND path IN "
+                    f"({', '.join('?' * len(paths))})",
+                    (resource, *paths)
+                )
+        return cursor.rowcount
+
+    def purge(self, before: float | None = None) -> int:
+        """Delete the entries that expired before `before`, default now."""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM responses WHERE expires_at < ?",
+                (time.time() if before is None else before,)
+            )
+        return cursor.rowcount
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            return [
+                key for key, in self._db.execute(
+                    "SELECT key FROM responses ORDER BY accessed_at"
+                )
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
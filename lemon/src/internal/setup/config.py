@@ -1,19 +1,24 @@
 from typing import Callable, NoReturn
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
+from ..request import RateLimiter, ResponseCache
 from ..utils import CONFIG_KEY, set_kv, Error
 
 class Config(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
     api_key: str | None = None
     on_error: Callable[[Error], NoReturn] | None = None
+    cache: ResponseCache | None = None
+    rate_limiter: RateLimiter | None = None
 
 def lemon_squeezy_setup(config: Config) -> Config:
     """Lemon Squeezy configuration.
 
     Args:
-        config: the configuration object. Includes the api key and a callable
-        if available to call if an error occurs.
+        config: the configuration object. Includes the api key, a callable
+        if available to call if an error occurs, an optional response cache
+        and an optional rate limiter.
 
     Returns:
         the configuraton object.
@@ -22,7 +27,9 @@ def lemon_squeezy_setup(config: Config) -> Config:
         CONFIG_KEY,
         {
             "api_key": config.api_key,
-            "on_error": config.on_error
+            "on_error": config.on_error,
+            "cache": config.cache,
+            "rate_limiter": config.rate_limiter,
         }
     )
     return config
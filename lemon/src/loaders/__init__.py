@@ -0,0 +1,2 @@
+from .loaders import Loaders
+from .planner import IncludePlan, allowed_includes, plan_includes
@@ -0,0 +1,162 @@
+import asyncio
+
+from collections.abc import Awaitable, Callable
+from contextlib import aclosing
+from typing import Any
+
+from ..internal.request import Loader, paginate
+from ..prices import get_price, list_prices
+from ..products import get_product, list_products
+
+type GetFunction = Callable[..., Awaitable[dict]]
+type ListFunction = Callable[[dict], Awaitable[dict]]
+
+
+class Loaders:
+    """Batched lookups of the objects related to a set of records.
+
+    Walking the subscriptions of a store and reading the price or product
+    of each one takes a request per subscription with `get_price` or
+    `get_product`. The loaders of this class collect the lookups made in the
+    same event loop tick and answer them with as few list requests as the
+    available filters allow, so the number of requests grows with the number
+    of pages rather than the number of records::
+
+        loaders = Loaders()
+        products = await asyncio.gather(*(
+            loaders.products.load(s['attributes']['product_id'])
+            for s in subscriptions
+        ))
+
+    Values are memoized, so create one instance per request or job. Objects
+    are returned as dictionaries, `None` for ids that do not exist.
+
+    Attributes:
+        `products`: Product objects by id.
+        `prices`: Price objects by id.
+        `products_by_store`: Lists of product objects by store id.
+        `prices_by_variant`: Lists of price objects by variant id, most
+        recently created first.
+    """
+
+    def __init__(
+            self,
+            store_id: int | str | None = None,
+            list_threshold: int = 8,
+            concurrency: int = 4,
+    ) -> None:
+        """
+        Args:
+            store_id: (Optional) Restrict the product listings used to
+            answer lookups to this store.
+            list_threshold: (Optional) Batches of more ids than this are
+            answered by listing the resource page by page; smaller ones by
+            concurrent `get_*` requests.
+            concurrency: (Optional) Maximum number of requests made at once
+            by a single batch.
+        """
+        self.store_id = None if store_id is None else str(store_id)
+        self.list_threshold = list_threshold
+        self.concurrency = concurrency
+        self.products: Loader[str, dict[str, Any]] = Loader(
+            lambda ids: self._by_id(
+                ids, self.products, get_product, list_products,
+                {} if self.store_id is None
+                else {'filter': {'store_id': self.store_id}}
+            ),
+            key=str
+        )
+        self.prices: Loader[str, dict[str, Any]] = Loader(
+            lambda ids: self._by_id(ids, self.prices, get_price, list_prices, {}),
+            key=str
+        )
+        self.products_by_store: Loader[str, list[dict[str, Any]]] = Loader(
+            lambda ids: self._by_filter(
+                ids, self.products, list_products, 'store_id'
+            ),
+            key=str
+        )
+        self.prices_by_variant: Loader[str, list[dict[str, Any]]] = Loader(
+            lambda ids: self._by_filter(
+                ids, self.prices, list_prices, 'variant_id', newest_first=True
+            ),
+            key=str
+        )
+
+    async def _gather(self, calls: list[Callable[[], Awaitable[Any]]]) -> list:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(call):
+            async with semaphore:
+                return await call()
+        return list(await asyncio.gather(*(limited(call) for call in calls)))
+
+    async def _by_id(
+            self,
+            ids: list[str],
+            loader: Loader,
+            get_fn: GetFunction,
+            list_fn: ListFunction,
+            params: dict,
+    ) -> dict[str, dict[str, Any]]:
+        if len(ids) <= self.list_threshold:
+            responses = await self._gather([
+                lambda id=id: get_fn(id) for id in ids
+            ])
+            found = {}
+            for id, response in zip(ids, responses):
+                if response['error'] is not None:
+                    if response['status_code'] == 404:
+                        continue
+                    raise RuntimeError(repr(response['error']))
+                found[id] = response['data']['data']
+            return found
+
+        wanted = set(ids)
+        found = {}
+        # Closed on leaving the loop, so the pages still requested are
+        # cancelled once every object was found.
+        async with aclosing(paginate(
+            list_fn,
+            params,
+            concurrency=self.concurrency
+        )) as records:
+            async for record in records:
+                if record['id'] in wanted:
+                    found[record['id']] = record
+                    if len(found) == len(wanted):
+                        break
+                else:
+                    # Objects listed on the way are free; keep them for
+                    # later lookups.
+                    loader.prime(record['id'], record)
+        return found
+
+    async def _by_filter(
+            self,
+            ids: list[str],
+            loader: Loader,
+            list_fn: ListFunction,
+            filter: str,
+            newest_first: bool = False,
+    ) -> dict[str, list[dict[str, Any]]]:
+        async def records(id: str) -> list[dict[str, Any]]:
+            listed = [
+                record async for record in paginate(
+                    list_fn,
+                    {'filter': {filter: id}},
+                    concurrency=self.concurrency
+                )
+            ]
+            if newest_first:
+                listed.sort(
+                    key=lambda record: record['attributes']['created_at'],
+                    reverse=True
+                )
+            return listed
+
+        lists = await self._gather([lambda id=id: records(id) for id in ids])
+        for listed in lists:
+            for record in listed:
+                loader.prime(record['id'], record)
+        return dict(zip(ids, lists))
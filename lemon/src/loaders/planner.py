@@ -0,0 +1,212 @@
+import math
+
+from collections.abc import Iterable
+from typing import Any, Literal, NamedTuple, get_args, get_origin, get_type_hints
+
+from pydantic import BaseModel
+
+from ..checkouts import types as checkouts
+from ..prices import types as prices
+from ..products import types as products
+from ..subscriptions import types as subscriptions
+from ..webhooks import types as webhooks
+
+# Parameters of the get and list functions, and attributes, of each resource.
+RESOURCES: dict[str, tuple[type[BaseModel], type[BaseModel], type]] = {
+    'checkouts': (
+        checkouts.GetCheckoutParams,
+        checkouts.ListCheckoutParams,
+        checkouts.Attributes,
+    ),
+    'prices': (prices.GetPriceParams, prices.ListPriceParams, prices.Attributes),
+    'products': (
+        products.GetProductParams,
+        products.ListProductParams,
+        products.Attributes,
+    ),
+    'subscriptions': (
+        subscriptions.GetSubscriptionParams,
+        subscriptions.ListSubscriptionParams,
+        subscriptions.Attributes,
+    ),
+    'webhooks': (
+        webhooks.GetWebhookParams,
+        webhooks.ListWebhookParams,
+        webhooks.Attributes,
+    ),
+}
+
+# Expected number of distinct related objects of a relationship: per page of
+# records when `shared`, otherwise per record.
+FANOUT: dict[str, tuple[float, bool]] = {
+    'store': (1, True),
+    'product': (4, True),
+    'variant': (8, True),
+    'price': (8, True),
+    'variants': (3, False),
+    'customer': (1, False),
+    'order': (1, False),
+    'order-item': (1, False),
+    'subscription-items': (1, False),
+    'subscription-invoices': (12, False),
+}
+
+# Relationships whose objects `Loaders` can fetch in batches.
+BATCHED = {'product', 'price'}
+
+# Related objects that cannot be included but are referenced by an id
+# attribute of the resource, which a follow-up request can look up.
+REFERENCES: dict[str, dict[str, str]] = {
+    'subscriptions': {'price': 'first_subscription_item.price_id'},
+}
+
+# Attributes of the primary resource that duplicate a field of a related one.
+ALIASES: dict[str, str] = {
+    'customer.name': 'user_name',
+    'customer.email': 'user_email',
+}
+
+# Average size in bytes of an included object, and the cost of an extra
+# request expressed in bytes of payload taking as long to transfer.
+OBJECT_BYTES = 1500
+REQUEST_BYTES = 64 * 1024
+PAGE_SIZE = 100
+
+
+class IncludePlan(NamedTuple):
+    """How to read a set of fields of a resource.
+
+    Attributes:
+        `include`: Values to pass as the `include` parameter.
+        `follow_up`: Relationships to fetch after the primary request, e.g.
+        with `Loaders`, along with the id attribute referencing them when
+        they are not relationships of the resource.
+        `attributes`: Fields read from the attributes of the primary
+        resource, including fields of related objects duplicated there, e.g.
+        `product.name` from `product_name`.
+        `bytes`: Estimated size of the included objects.
+        `requests`: Estimated number of follow-up requests.
+    """
+    include: list[str]
+    follow_up: dict[str, str | None]
+    attributes: list[str]
+    bytes: int
+    requests: int
+
+    def params(self, params: dict | None = None) -> dict:
+        """`params` with the `include` parameter of the plan added."""
+        params = dict(params or {})
+        if self.include:
+            params['include'] = list(self.include)
+        return params
+
+
+def allowed_includes(params: type[BaseModel]) -> tuple[str, ...]:
+    """The values allowed in the `include` parameter of a params model."""
+    annotation = params.model_fields['include'].annotation
+    stack = [annotation]
+    while stack:
+        annotation = stack.pop()
+        if get_origin(annotation) is Literal:
+            return get_args(annotation)
+        stack.extend(get_args(annotation))
+    return ()
+
+
+def _attribute(
+        attributes: dict[str, Any],
+        relationship: str,
+        field: str,
+) -> str | None:
+    """The attribute duplicating `field` of a related object, if any."""
+    name = f"{relationship}.{field}"
+    if name in ALIASES and ALIASES[name] in attributes:
+        return ALIASES[name]
+    prefix = relationship.replace('-', '_')
+    if f"{prefix}_{field}" in attributes:
+        return f"{prefix}_{field}"
+    return None
+
+
+def plan_includes(
+        resource: str,
+        reads: Iterable[str],
+        records: int = PAGE_SIZE,
+) -> IncludePlan:
+    """Choose the cheapest way to read fields of a resource and its relations.
+
+    Fields of related objects duplicated in the attributes of the resource
+    cost nothing. For the other relationships, including them grows every
+    response by the related objects while fetching them afterwards costs
+    extra requests: one per page of objects for relationships `Loaders` can
+    batch, one per record (or per shared object) otherwise. Each relationship
+    is fetched the cheapest way among those allowed by the `Get*Params` or
+    `List*Params` of the resource.
+
+    Args:
+        `resource`: The resource type, e.g. `subscriptions`.
+        `reads`: Fields the caller will read. Attributes are given by name,
+        fields of object attributes as `attribute.field`, e.g.
+        `urls.customer_portal`, fields of related objects as
+        `relationship.field`, e.g. `product.name`, and whole related objects
+        by relationship name.
+        `records`: (Optional) Number of records fetched. Planning for `1`
+        uses the parameters of the get function.
+
+    Returns:
+        The plan.
+
+    Raises:
+        `KeyError`: If the resource is unknown or a field is neither an
+        attribute nor a relationship of the resource.
+    """
+    get_params, list_params, attributes_type = RESOURCES[resource]
+    allowed = allowed_includes(get_params if records == 1 else list_params)
+    references = REFERENCES.get(resource, {})
+    attributes = get_type_hints(attributes_type)
+    pages = max(1, math.ceil(records / PAGE_SIZE))
+
+    served: list[str] = []
+    needed: list[str] = []
+    for read in reads:
+        relationship, _, field = read.partition('.')
+        if relationship in attributes:
+            # An attribute, or a field of an object attribute, e.g.
+            # `urls.customer_portal`.
+            served.append(read)
+            continue
+        if relationship not in allowed and relationship not in references:
+            raise KeyError(f"Unknown field `{read}` of `{resource}`")
+        if field and (attribute := _attribute(attributes, relationship, field)):
+            served.append(attribute)
+        elif relationship not in needed:
+            needed.append(relationship)
+
+    include: list[str] = []
+    follow_up: dict[str, str | None] = {}
+    size = requests = 0
+    for relationship in needed:
+        fanout, shared = FANOUT.get(relationship, (1, False))
+        objects = math.ceil(
+            min(fanout, records) * pages if shared else fanout * records
+        )
+        if relationship in BATCHED:
+            fetches = math.ceil(objects / PAGE_SIZE)
+        else:
+            fetches = objects if shared else records
+        if (
+            relationship in allowed
+            and objects * OBJECT_BYTES <= fetches * REQUEST_BYTES
+        ):
+            include.append(relationship)
+            size += objects * OBJECT_BYTES
+        else:
+            follow_up[relationship] = references.get(relationship)
+            requests += fetches
+    return IncludePlan(
+        include,
+        follow_up,
+        list(dict.fromkeys(served)),
+        size,
+        requests,
+    )
@@ -0,0 +1,7 @@
+from .index import (
+    ENTITLED_STATUSES,
+    INDEXES,
+    SubscriptionEntry,
+    SubscriptionIndex,
+)
+from .mirror import SubscriptionMirror, Watermark
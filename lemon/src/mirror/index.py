@@ -0,0 +1,338 @@
+import asyncio
+import logging
+import time
+
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from typing import Any, TypedDict
+
+from ..subscriptions.types import SubscriptionStatus
+from ..types.response import compact_record
+from ..webhooks import EventRouter, SUBSCRIPTION_EVENTS, WebhookEvent
+from .mirror import subscription_pages
+
+logger = logging.getLogger(__name__)
+
+# Attributes looked up by `SubscriptionIndex`.
+INDEXES = (
+    'user_email',
+    'customer_id',
+    'order_id',
+    'product_id',
+    'variant_id',
+    'status',
+)
+
+# Statuses of subscriptions granting access. Cancelled subscriptions do so
+# until they expire at `ends_at`, past due ones while payment is retried.
+ENTITLED_STATUSES = ('on_trial', 'active', 'past_due', 'cancelled')
+
+
+class EntryAttributes(TypedDict):
+    store_id: int
+    customer_id: int
+    order_id: int
+    product_id: int
+    variant_id: int
+    user_email: str
+    status: SubscriptionStatus
+    trial_ends_at: str | None
+    renews_at: str
+    ends_at: str | None
+    updated_at: str
+
+
+# Only the attributes needed to answer entitlement checks are kept, in
+# slots, with the statuses interned.
+SubscriptionEntry = compact_record(
+    'SubscriptionEntry',
+    'subscriptions',
+    EntryAttributes
+)
+
+
+def _key(field: str, value: Any) -> Any:
+    if field == 'user_email':
+        return value.lower()
+    if field == 'status':
+        return value
+    return int(value)
+
+
+class SubscriptionIndex:
+    """In-memory index of the subscriptions of the API.
+
+    Subscriptions are held in dictionaries keyed by id and by each of
+    `user_email`, `customer_id`, `order_id`, `product_id`, `variant_id` and
+    `status`, so a lookup is a hash lookup instead of a `list_subscriptions`
+    round trip. Like the `SubscriptionMirror`, the index is filled by
+    `backfill`, kept up to date by the subscription webhook events it is
+    subscribed to with `track`, and swept periodically with `start_sync` to
+    catch missed events. A sweep reads every subscription, see `sweep`::
+
+        index = SubscriptionIndex(store_id=store_id)
+        await index.backfill()
+        index.track(receiver.router)
+        index.start_sync(interval=6 * 3600)
+
+        if index.entitled(user_email=email, product_id=product_id):
+            ...
+
+    Memory is bounded by the attributes kept, see `SubscriptionEntry`, and
+    by `statuses`: subscriptions leaving them, e.g. on expiring, are dropped
+    from the index. Their `updated_at` is only remembered for `dropped_ttl`
+    seconds, to ignore older versions delivered late.
+
+    Updates are applied without locking, from the event loop; lookups may
+    be made from any thread.
+    """
+
+    def __init__(
+            self,
+            store_id: int | str | None = None,
+            statuses: Iterable[str] | None = None,
+            page_size: int = 100,
+            concurrency: int = 4,
+            dropped_ttl: float = 86400.0,
+    ) -> None:
+        """
+        Args:
+            store_id: (Optional) Only index the subscriptions of this store.
+            statuses: (Optional) Only index the subscriptions with these
+            statuses, e.g. `ENTITLED_STATUSES`. All are indexed by default.
+            dropped_ttl: (Optional) Number of seconds the `updated_at` of a
+            subscription dropped for its status is remembered.
+            page_size: (Optional) Number of subscriptions per page requested.
+            concurrency: (Optional) Maximum number of pages requested at
+            once.
+        """
+        self.store_id = None if store_id is None else int(store_id)
+        self.statuses = None if statuses is None else frozenset(statuses)
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.dropped_ttl = dropped_ttl
+        self.synced_at: float | None = None
+        self.event_at: float | None = None
+        self._entries: dict[str, SubscriptionEntry] = {}
+        self._indexes: dict[str, dict[Any, dict[str, SubscriptionEntry]]] = {
+            field: {} for field in INDEXES
+        }
+        # `updated_at` of the subscriptions recently dropped for their
+        # status, and when they were, oldest first, so an older version
+        # delivered late does not bring them back.
+        self._dropped: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def apply(self, records: Iterable[Mapping[str, Any]]) -> int:
+        """Index subscription objects newer than their indexed version.
+
+        Any subscription object is accepted, e.g. those of a webhook event,
+        a `list_subscriptions` page or a `SubscriptionMirror`.
+
+        Returns:
+            The number of subscriptions added, changed or dropped.
+        """
+        now = time.monotonic()
+        self._expire(now)
+        changed = 0
+        for raw in records:
+            entry = SubscriptionEntry.from_raw(raw)
+            if self.store_id is not None and entry.store_id != self.store_id:
+                continue
+            current = self._entries.get(entry.id)
+            if current is not None:
+                updated_at = current.updated_at
+            else:
+                dropped = self._dropped.get(entry.id)
+                updated_at = None if dropped is None else dropped[0]
+            if updated_at is not None and entry.updated_at <= updated_at:
+                continue
+            if self.statuses is None or entry.status in self.statuses:
+                if current is not None:
+                    self._remove(current)
+                self._dropped.pop(entry.id, None)
+                self._add(entry)
+            elif current is not None:
+                self._remove(current)
+                self._dropped[entry.id] = (entry.updated_at, now)
+            else:
+                # Never indexed, e.g. expired long ago: nothing to remember.
+                continue
+            changed += 1
+        return changed
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.dropped_ttl
+        while self._dropped:
+            _, dropped_at = next(iter(self._dropped.values()))
+            if dropped_at > cutoff:
+                break
+            self._dropped.popitem(last=False)
+
+    def _add(self, entry: SubscriptionEntry) -> None:
+        self._entries[entry.id] = entry
+        for field, index in self._indexes.items():
+            key = _key(field, getattr(entry, field))
+            bucket = index.get(key)
+            if bucket is None:
+                bucket = index[key] = {}
+            bucket[entry.id] = entry
+
+    def _remove(self, entry: SubscriptionEntry) -> None:
+        del self._entries[entry.id]
+        for field, index in self._indexes.items():
+            key = _key(field, getattr(entry, field))
+            bucket = index[key]
+            del bucket[entry.id]
+            if not bucket:
+                del index[key]
+
+    async def sweep(self) -> int:
+        """Fetch every subscription and index those that changed.
+
+        The list endpoint cannot be filtered on `updated_at`, so there are no
+        deltas to fetch: every page is read, concurrently, and only the
+        subscriptions newer than their indexed version are applied. Webhook
+        events keep the index current between sweeps, which only catch the
+        events missed, so sweep rarely, e.g. every few hours.
+
+        Returns:
+            The number of subscriptions added, changed or dropped.
+
+        Raises:
+            `RuntimeError`: If a page could not be fetched. The subscriptions
+            of the pages already fetched are kept, but `synced_at` does not
+            move.
+        """
+        started_at = time.time()
+        changed = 0
+        async for records in subscription_pages(
+            self.store_id,
+            self.page_size,
+            self.concurrency,
+        ):
+            changed += self.apply(records)
+        self.synced_at = started_at
+        return changed
+
+    backfill = sweep
+
+    def start_sync(self, interval: float) -> asyncio.Task:
+        """Sweep the index every `interval` seconds in the background.
+
+        A sweep that fails, whatever the error, is logged and attempted again
+        after another `interval`.
+
+        Returns:
+            The task running the sweeps. Cancel it to stop them.
+        """
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.sweep()
+                except Exception:
+                    logger.exception("Subscription index sweep failed")
+        return asyncio.ensure_future(run())
+
+    def track(self, router: EventRouter) -> None:
+        """Apply the subscription events handled by `router`."""
+        router.on(*SUBSCRIPTION_EVENTS)(self.observe)
+
+    async def observe(self, event: WebhookEvent) -> None:
+        """Apply the subscription of a webhook event."""
+        self.apply([event['data']])
+        self.event_at = time.time()
+
+    def get(self, subscription_id: int | str) -> SubscriptionEntry | None:
+        """The indexed subscription with the given id, if any."""
+        return self._entries.get(str(subscription_id))
+
+    def lookup(self, field: str, value: Any) -> list[SubscriptionEntry]:
+        """The indexed subscriptions whose `field` is `value`.
+
+        `user_email` is matched case-insensitively.
+
+        Raises:
+            `TypeError`: If `field` is not one of `INDEXES`.
+        """
+        index = self._indexes.get(field)
+        if index is None:
+            raise TypeError(f"Unknown index: {field}")
+        bucket = index.get(_key(field, value))
+        return [] if bucket is None else list(bucket.values())
+
+    def find(self, **filters: Any) -> list[SubscriptionEntry]:
+        """The indexed subscriptions matching every filter.
+
+        Args:
+            `filters`: Values of `user_email`, `customer_id`, `order_id`,
+            `product_id`, `variant_id` or `status`.
+
+        Raises:
+            `TypeError`: If a filter is not one of those.
+        """
+        unknown = set(filters) - set(INDEXES)
+        if unknown:
+            raise TypeError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        if not filters:
+            return list(self._entries.values())
+        buckets = []
+        for field, value in filters.items():
+            bucket = self._indexes[field].get(_key(field, value))
+            if bucket is None:
+                return []
+            buckets.append(bucket)
+        # Scan the smallest bucket, checking membership in the others.
+        smallest = min(buckets, key=len)
+        return [
+            entry for id, entry in list(smallest.items())
+            if all(id in bucket for bucket in buckets)
+        ]
+
+    def entitled(
+            self,
+            user_email: str | None = None,
+            customer_id: int | str | None = None,
+            product_id: int | str | None = None,
+            variant_id: int | str | None = None,
+            statuses: Iterable[str] = ENTITLED_STATUSES,
+    ) -> bool:
+        """Whether a customer has a subscription granting access.
+
+        Args:
+            `user_email`: The email of the customer, or
+            `customer_id`: Its id.
+            `product_id`: (Optional) Only count subscriptions to this
+            product.
+            `variant_id`: (Optional) Only count subscriptions to this variant.
+            `statuses`: (Optional) Statuses of the subscriptions granting
+            access.
+
+        Raises:
+            `TypeError`: If neither `user_email` nor `customer_id` is given.
+        """
+        if user_email is not None:
+            bucket = self._indexes['user_email'].get(user_email.lower())
+        elif customer_id is not None:
+            bucket = self._indexes['customer_id'].get(int(customer_id))
+        else:
+            raise TypeError("Either user_email or customer_id is required")
+        if bucket is None:
+            return False
+        product_id = None if product_id is None else int(product_id)
+        variant_id = None if variant_id is None else int(variant_id)
+        # Copied, as the bucket may change while a sweep runs.
+        for entry in list(bucket.values()):
+            if (
+                entry.status in statuses
+                and (product_id is None or entry.product_id == product_id)
+                and (variant_id is None or entry.variant_id == variant_id)
+            ):
+                return True
+        return False
+
+    def __contains__(self, subscription_id: int | str) -> bool:
+        return str(subscription_id) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,369 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from collections.abc import AsyncIterator, Iterable, Mapping
+from typing import Any, NamedTuple
+
+from ..internal.request import paginate_pages
+from ..subscriptions import list_subscriptions
+from ..types.response import LazyRecords
+from ..webhooks import EventRouter, SUBSCRIPTION_EVENTS, WebhookEvent
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id INTEGER PRIMARY KEY,
+    store_id INTEGER NOT NULL,
+    customer_id INTEGER NOT NULL,
+    user_email TEXT NOT NULL COLLATE NOCASE,
+    status TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    variant_id INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS subscriptions_customer_id
+    ON subscriptions (customer_id);
+CREATE INDEX IF NOT EXISTS subscriptions_user_email
+    ON subscriptions (user_email);
+CREATE INDEX IF NOT EXISTS subscriptions_status ON subscriptions (status);
+CREATE INDEX IF NOT EXISTS subscriptions_variant_id
+    ON subscriptions (variant_id);
+CREATE INDEX IF NOT EXISTS subscriptions_updated_at
+    ON subscriptions (updated_at);
+CREATE TABLE IF NOT EXISTS watermarks (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+# Only newer versions replace a row, so late or replayed webhook deliveries
+# and sweeps racing them never roll a subscription back.
+UPSERT = """
+INSERT INTO subscriptions (
+    id, store_id, customer_id, user_email, status, product_id, variant_id,
+    created_at, updated_at, data
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    store_id = excluded.store_id,
+    customer_id = excluded.customer_id,
+    user_email = excluded.user_email,
+    status = excluded.status,
+    product_id = excluded.product_id,
+    variant_id = excluded.variant_id,
+    created_at = excluded.created_at,
+    updated_at = excluded.updated_at,
+    data = excluded.data
+WHERE excluded.updated_at > subscriptions.updated_at
+"""
+
+logger = logging.getLogger(__name__)
+
+# Columns `find` and `count` filter on.
+FILTERS = (
+    'store_id',
+    'customer_id',
+    'user_email',
+    'status',
+    'product_id',
+    'variant_id',
+)
+
+
+class Watermark(NamedTuple):
+    """Freshness of a `SubscriptionMirror`.
+
+    Attributes:
+        `synced_at`: Start time of the last complete backfill or sweep. Every
+        change made before it is in the mirror.
+        `event_at`: Time the last webhook event was applied.
+        `updated_at`: Latest `updated_at` of the mirrored subscriptions.
+    """
+    synced_at: float | None
+    event_at: float | None
+    updated_at: str | None
+
+
+def _row(record: Mapping[str, Any]) -> tuple:
+    attributes = record['attributes']
+    return (
+        int(record['id']),
+        attributes['store_id'],
+        attributes['customer_id'],
+        attributes['user_email'],
+        attributes['status'],
+        attributes['product_id'],
+        attributes['variant_id'],
+        attributes['created_at'],
+        attributes['updated_at'],
+        json.dumps(record, separators=(',', ':'), ensure_ascii=False),
+    )
+
+
+async def _list_subscriptions(params: dict) -> dict:
+    return await list_subscriptions(params, lazy=True)
+
+
+async def subscription_pages(
+        store_id: int | str | None = None,
+        page_size: int = 100,
+        concurrency: int = 4,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Iterate over the pages of every subscription, as raw objects.
+
+    Raises:
+        `RuntimeError`: If a page could not be fetched.
+    """
+    params = {}
+    if store_id is not None:
+        params['filter'] = {'store_id': str(store_id)}
+    async for response in paginate_pages(
+        _list_subscriptions,
+        params,
+        page_size=page_size,
+        concurrency=concurrency,
+    ):
+        records = response['data']['data']
+        if isinstance(records, LazyRecords):
+            records = records.raw
+        yield records
+
+
+class SubscriptionMirror:
+    """Local SQLite mirror of the subscriptions of the API.
+
+    Subscriptions are stored as returned by the API and indexed by id,
+    `customer_id`, `user_email`, `status` and `variant_id`, so dashboards
+    query them at local-disk latency instead of calling
+    `list_subscriptions` on every page view.
+
+    The mirror is filled by `backfill`, kept up to date by the subscription
+    webhook events it is subscribed to with `track`, and swept periodically
+    with `start_sync` to catch any event that was missed::
+
+        mirror = SubscriptionMirror('subscriptions.db', store_id=store_id)
+        await mirror.backfill()
+        mirror.track(receiver.router)
+        mirror.start_sync(interval=900)
+
+        mirror.find(status='past_due', variant_id=variant_id)
+
+    The database runs in WAL mode, so other processes on the host can query
+    the mirror while one of them keeps it up to date. Sweeps and events
+    write to it from a thread, so a write waiting for the lock of another
+    process never blocks the event loop.
+    """
+
+    def __init__(
+            self,
+            path: str | os.PathLike,
+            store_id: int | str | None = None,
+            page_size: int = 100,
+            concurrency: int = 4,
+            timeout: float = 5.0,
+    ) -> None:
+        """
+        Args:
+            path: Location of the database file.
+            store_id: (Optional) Only mirror the subscriptions of this store.
+            page_size: (Optional) Number of subscriptions per page requested.
+            concurrency: (Optional) Maximum number of pages requested at
+            once.
+            timeout: (Optional) Number of seconds to wait for a lock held by
+            another process.
+        """
+        self.path = os.fspath(path)
+        self.store_id = None if store_id is None else str(store_id)
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def apply(self, records: Iterable[Mapping[str, Any]]) -> int:
+        """Store subscription objects newer than their mirrored version.
+
+        Returns:
+            The number of subscriptions added or changed.
+        """
+        rows = [_row(record) for record in records]
+        if not rows:
+            return 0
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(UPSERT, rows)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return self._db.total_changes - before
+
+    async def sweep(self) -> int:
+        """Fetch every subscription and store those that changed.
+
+        The list endpoint cannot be filtered on `updated_at`, so every page
+        is read, concurrently, but only subscriptions whose `updated_at` is
+        newer than the mirrored one are written. A sweep on an empty mirror
+        is a full backfill.
+
+        Returns:
+            The number of subscriptions added or changed.
+
+        Raises:
+            `RuntimeError`: If a page could not be fetched. The subscriptions
+            of the pages already fetched are kept, but the watermark does not
+            move.
+        """
+        started_at = time.time()
+        changed = 0
+        async for records in subscription_pages(
+            self.store_id,
+            self.page_size,
+            self.concurrency,
+        ):
+            changed += await asyncio.to_thread(self.apply, records)
+        await asyncio.to_thread(self._set_watermark, 'synced_at', started_at)
+        return changed
+
+    backfill = sweep
+
+    def start_sync(self, interval: float) -> asyncio.Task:
+        """Sweep the mirror every `interval` seconds in the background.
+
+        A sweep that fails, whatever the error, is logged and attempted again
+        after another `interval`.
+
+        Returns:
+            The task running the sweeps. Cancel it to stop them.
+        """
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.sweep()
+                except Exception:
+                    logger.exception("Subscription mirror sweep failed")
+        return asyncio.ensure_future(run())
+
+    def track(self, router: EventRouter) -> None:
+        """Apply the subscription events handled by `router`."""
+        router.on(*SUBSCRIPTION_EVENTS)(self.observe)
+
+    async def observe(self, event: WebhookEvent) -> None:
+        """Apply the subscription of a webhook event."""
+        store_id = event['data']['attributes']['store_id']
+        if self.store_id is not None and str(store_id) != self.store_id:
+            return
+        await asyncio.to_thread(self._observe, event['data'], time.time())
+
+    def _observe(self, record: Mapping[str, Any], event_at: float) -> None:
+        self.apply([record])
+        self._set_watermark('event_at', event_at)
+
+    def _set_watermark(self, name: str, value: float) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO watermarks (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                (name, value)
+            )
+
+    @property
+    def watermark(self) -> Watermark:
+        with self._lock:
+            marks = dict(self._db.execute(
+                "SELECT name, value FROM watermarks"
+            ).fetchall())
+            updated_at, = self._db.execute(
+                "SELECT MAX(updated_at) FROM subscriptions"
+            ).fetchone()
+        return Watermark(
+            marks.get('synced_at'),
+            marks.get('event_at'),
+            updated_at
+        )
+
+    def get(self, subscription_id: int | str) -> dict[str, Any] | None:
+        """The mirrored subscription object with the given id, if any."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM subscriptions WHERE id = ?",
+                (int(subscription_id),)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _where(self, filters: dict[str, Any]) -> tuple[str, list[Any]]:
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise TypeError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        clauses, values = [], []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            clauses.append(f"{column} = ?")
+            values.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, values
+
+    def find(
+            self,
+            limit: int | None = None,
+            offset: int = 0,
+            **filters: Any,
+    ) -> list[dict[str, Any]]:
+        """The mirrored subscription objects matching every filter.
+
+        Subscriptions are ordered by `created_at` (descending), as returned
+        by `list_subscriptions`. `user_email` is matched case-insensitively.
+
+        Args:
+            `limit`: (Optional) Maximum number of subscriptions returned.
+            `offset`: (Optional) Number of subscriptions skipped.
+            `filters`: Values of `store_id`, `customer_id`, `user_email`,
+            `status`, `product_id` or `variant_id`.
+
+        Raises:
+            `TypeError`: If a filter is not one of those.
+        """
+        where, values = self._where(filters)
+        query = (
+            f"SELECT data FROM subscriptions{where} "
+            "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+        )
+        with self._lock:
+            rows = self._db.execute(
+                query,
+                (*values, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def count(self, **filters: Any) -> int:
+        """The number of mirrored subscriptions matching every filter."""
+        where, values = self._where(filters)
+        with self._lock:
+            count, = self._db.execute(
+                f"SELECT COUNT(*) FROM subscriptions{where}",
+                values
+            ).fetchone()
+        return count
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -7,6 +7,7 @@ from ..types.response import (
     Params,
     Pick,
     RelationshipKeys,
+    compact_record,
 )
 
 type Category = Literal["one_time", "subscription", "lead_magnet", "pwyw"]
@@ -78,4 +79,6 @@ class ListPrices(
         Data[dict[str, Any], Any]
     ]
 ):
-    pass
\ No newline at end of file
+    pass
+
+PriceRecord = compact_record('PriceRecord', 'prices', Attributes)
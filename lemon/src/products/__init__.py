@@ -1,2 +1,8 @@
-from .types import ListProducts, Product, GetProductParams, ListProductParams
+from .types import (
+    GetProductParams,
+    LazyListProducts,
+    ListProductParams,
+    ListProducts,
+    Product,
+)
 from .product import list_products, get_product
\ No newline at end of file
@@ -1,6 +1,12 @@
 from ..internal.request import fetch, FetchOptions, FetchResponse
 from ..internal.utils import params_to_query_string, include_to_query_string
-from .types import GetProductParams, ListProductParams, Product, ListProducts
+from .types import (
+    GetProductParams,
+    LazyListProducts,
+    ListProductParams,
+    ListProducts,
+    Product,
+)
 
 async def get_product(
         product_id: int | str,
@@ -33,7 +39,7 @@ async def get_product(
     )
     return FetchResponse[Product](**await fetch(options)).model_dump()
 
-async def list_products(params: dict = {}):
+async def list_products(params: dict = {}, lazy: bool = False):
     """Retrieve a list of products.
 
     Makes a `GET` request with an optional set of path parameters to the
@@ -50,6 +56,9 @@ async def list_products(params: dict = {}):
         `params['page']['size']`: (Optional) The parameter to determine how many
         results to return per page.
         `params['include']`: (Optional) Related resources.
+        `lazy`: (Optional) Validate only the list envelope up front. The
+        product objects are held in a `LazyRecords` sequence and each one is
+        validated into a `ProductData` the first time it is accessed.
 
     Returns:
         Response object with the keys `data`, `error`, and `status_code`. The
@@ -65,4 +74,8 @@ async def list_products(params: dict = {}):
         path="/v1/products",
         param=params_to_query_string(ListProductParams(**params))
     )
+    if lazy:
+        return FetchResponse[LazyListProducts](
+            **await fetch(options)
+        ).model_dump()
     return FetchResponse[ListProducts](**await fetch(options)).model_dump()
\ No newline at end of file
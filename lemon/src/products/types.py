@@ -3,10 +3,12 @@ from typing import Literal, TypedDict, Any, NotRequired, ClassVar
 from ..types.response import (
     RelationshipKeys,
     Data,
+    LazyRecords,
     LemonSqueezyResponse,
     MetaPage,
     Params,
-    Pick
+    Pick,
+    compact_record,
 )
 
 class Attributes(TypedDict):
@@ -67,4 +69,16 @@ class ListProducts(
         Data[dict[str, Any], Any]
     ]
 ):
-    pass
\ No newline at end of file
+    pass
+
+class LazyListProducts(
+    LemonSqueezyResponse[
+        LazyRecords[ProductData],
+        ListLink,
+        Meta,
+        Data[dict[str, Any], Any]
+    ]
+):
+    pass
+
+ProductRecord = compact_record('ProductRecord', 'products', Attributes)
@@ -3,4 +3,10 @@ from .subscription import (
      get_subscription,
      list_subscriptions,
      update_subscription
-)
\ No newline at end of file
+)
+from .bulk import (
+     BulkResult,
+     bulk_update_subscriptions,
+     read_journal,
+     write_report
+)
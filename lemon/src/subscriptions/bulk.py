@@ -0,0 +1,215 @@
+import asyncio
+import csv
+import json
+import os
+import random
+import time
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, Literal, NamedTuple
+
+from .subscription import cancel_subscription, update_subscription
+from .types import UpdateSubscription
+
+type Mutation = UpdateSubscription | Literal['cancel']
+
+# Status codes of responses worth retrying. Requests that never got a
+# response have no status code and are retried too.
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class BulkResult(NamedTuple):
+    """Outcome of the mutation of one subscription.
+
+    Attributes:
+        `subscription_id`: The subscription mutated.
+        `action`: `'update'` or `'cancel'`.
+        `status`: `'succeeded'` or `'failed'`.
+        `status_code`: Status code of the last response, if any.
+        `attempts`: Number of requests made.
+        `error`: The error of the last response, if it failed.
+        `finished_at`: When the mutation finished, as a UNIX timestamp.
+        `resumed`: Whether the result was read from the journal of an
+        earlier run rather than obtained by this one.
+    """
+    subscription_id: str
+    action: Literal['update', 'cancel']
+    status: Literal['succeeded', 'failed']
+    status_code: int | None
+    attempts: int
+    error: str | None
+    finished_at: float
+    resumed: bool = False
+
+
+def read_journal(path: str | os.PathLike) -> dict[str, BulkResult]:
+    """The results recorded in a journal, by subscription id.
+
+    A line cut short by a crash is ignored, and the last result of a
+    subscription wins.
+    """
+    results: dict[str, BulkResult] = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding='utf-8') as journal:
+        for line in journal:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            result = BulkResult(**{**entry, 'resumed': True})
+            results[result.subscription_id] = result
+    return results
+
+
+def _open_journal(path: str | os.PathLike):
+    journal = open(path, 'a+b')
+    if journal.tell() > 0:
+        journal.seek(-1, os.SEEK_END)
+        if journal.read(1) != b'\n':
+            # Terminate a line cut short by a crash so it stays on its own.
+            journal.write(b'\n')
+    return journal
+
+
+def write_report(
+        path: str | os.PathLike,
+        results: Iterable[BulkResult],
+) -> None:
+    """Write the results of a bulk mutation as CSV, one row per item."""
+    with open(path, 'w', newline='', encoding='utf-8') as report:
+        writer = csv.writer(report)
+        writer.writerow(BulkResult._fields)
+        writer.writerows(results)
+
+
+def _transient(response: dict[str, Any]) -> bool:
+    status_code = response['status_code']
+    return status_code is None or status_code in TRANSIENT_STATUS_CODES
+
+
+async def _mutate(subscription_id: str, mutation: Mutation) -> dict:
+    if mutation == 'cancel':
+        return await cancel_subscription(subscription_id)
+    return await update_subscription(subscription_id, mutation)
+
+
+async def bulk_update_subscriptions(
+        items: Iterable[tuple[int | str, Mutation]],
+        journal: str | os.PathLike | None = None,
+        report: str | os.PathLike | None = None,
+        concurrency: int = 8,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        retry_failed: bool = False,
+        on_result: Callable[[BulkResult], Any] | None = None,
+) -> list[BulkResult]:
+    """Update or cancel many subscriptions concurrently.
+
+    At most `concurrency` requests are in flight at once, and every request
+    goes through the configured rate limiter, if any, so a large run keeps
+    within the API limits. Requests failing with a transient error, i.e. a
+    network error, `429` or `5xx`, are retried with exponential backoff.
+
+    With a `journal`, every result is appended to it as soon as it is
+    known. Running again with the same journal, e.g. after a crash, skips
+    the subscriptions already done and returns their recorded results::
+
+        await bulk_update_subscriptions(
+            ((id, {'variant_id': new_variant}) for id in ids),
+            journal='migration.jsonl',
+            report='migration.csv',
+        )
+
+    Args:
+        `items`: Pairs of a subscription id and its `UpdateSubscription`,
+        or `'cancel'` to cancel it. Consumed lazily.
+        `journal`: (Optional) Path of the JSON lines progress journal.
+        `report`: (Optional) Path of the CSV report written at the end.
+        `concurrency`: (Optional) Maximum number of requests made at once.
+        `max_retries`: (Optional) Number of times a transient error is
+        retried.
+        `backoff`: (Optional) Seconds waited before the first retry, doubled
+        on every retry.
+        `retry_failed`: (Optional) Retry the subscriptions the journal
+        records as failed.
+        `on_result`: (Optional) Called with every result, e.g. to report
+        progress.
+
+    Returns:
+        The result of every item, in the order they finished. Items already
+        done have the result recorded in the journal.
+    """
+    done = {} if journal is None else read_journal(journal)
+    if retry_failed:
+        done = {
+            id: result for id, result in done.items()
+            if result.status == 'succeeded'
+        }
+    results: list[BulkResult] = []
+    skipped: set[str] = set()
+    log = None if journal is None else _open_journal(journal)
+
+    def record(result: BulkResult) -> None:
+        results.append(result)
+        if log is not None and not result.resumed:
+            entry = result._asdict()
+            del entry['resumed']
+            log.write(json.dumps(entry).encode() + b'\n')
+            # Flushed at once so a crash loses at most the requests in flight.
+            log.flush()
+        if on_result is not None:
+            on_result(result)
+
+    async def apply(subscription_id: str, mutation: Mutation) -> None:
+        action = 'cancel' if mutation == 'cancel' else 'update'
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                response = await _mutate(subscription_id, mutation)
+            except Exception as exc:
+                # E.g. a `ValidationError`, which retrying would not fix.
+                response = {'status_code': None, 'error': exc}
+                break
+            if response['error'] is None or attempts > max_retries:
+                break
+            if not _transient(response):
+                break
+            delay = backoff * 2 ** (attempts - 1)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        error = response['error']
+        record(BulkResult(
+            subscription_id,
+            action,
+            'succeeded' if error is None else 'failed',
+            response['status_code'],
+            attempts,
+            None if error is None else repr(error),
+            time.time(),
+        ))
+
+    def pending(items: Iterator[tuple[int | str, Mutation]]):
+        for subscription_id, mutation in items:
+            subscription_id = str(subscription_id)
+            if subscription_id in done:
+                if subscription_id not in skipped:
+                    skipped.add(subscription_id)
+                    record(done[subscription_id])
+                continue
+            yield subscription_id, mutation
+
+    async def work(queue: Iterator[tuple[str, Mutation]]) -> None:
+        # Workers share one iterator, so `items` is never held in memory.
+        for subscription_id, mutation in queue:
+            await apply(subscription_id, mutation)
+
+    try:
+        queue = pending(iter(items))
+        await asyncio.gather(*(work(queue) for _ in range(concurrency)))
+    finally:
+        if log is not None:
+            log.close()
+    if report is not None:
+        write_report(report, results)
+    return results
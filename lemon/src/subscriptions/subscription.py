@@ -2,6 +2,7 @@ from ..internal.request import fetch, FetchOptions, FetchResponse, HTTPVerbEnum
 from ..internal.utils import include_to_query_string, params_to_query_string
 from .types import (
     GetSubscriptionParams,
+    LazyListSubscriptions,
     ListSubscriptions,
     ListSubscriptionParams,
     Subscription,
@@ -91,7 +92,7 @@ async def cancel_subscription(subscription_id: int | str):
     )
     return FetchResponse[Subscription](**await fetch(options)).model_dump()
 
-async def list_subscriptions(params: dict = {}):
+async def list_subscriptions(params: dict = {}, lazy: bool = False):
     """Retrieve a list of subscriptions.
 
     Makes a `GET` request with an optional set of path parameters to the
@@ -118,6 +119,9 @@ async def list_subscriptions(params: dict = {}):
         `params['page']['size']`: (Optional) The parameter to determine how many
         results to return per page.
         `params['include']`: (Optional) Related resources.
+        `lazy`: (Optional) Validate only the list envelope up front. The
+        subscription objects are held in a `LazyRecords` sequence and each one
+        is validated into a `SubscriptionData` the first time it is accessed.
 
     Returns:
         Response object with the keys `data`, `error`, and `status_code`. The
@@ -133,4 +137,8 @@ async def list_subscriptions(params: dict = {}):
         path='/v1/subscriptions',
         param=params_to_query_string(ListSubscriptionParams(**params))
     )
+    if lazy:
+        return FetchResponse[LazyListSubscriptions](
+            **await fetch(options)
+        ).model_dump()
     return FetchResponse[ListSubscriptions](**await fetch(options)).model_dump()
\ No newline at end of file
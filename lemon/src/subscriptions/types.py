@@ -3,10 +3,12 @@ from typing import Any, ClassVar, Literal, NotRequired, TypedDict
 from ..types.response import (
     RelationshipKeys,
     Data,
+    LazyRecords,
     LemonSqueezyResponse,
     MetaPage,
     Params,
-    Pick
+    Pick,
+    compact_record,
 )
 
 type SubscriptionStatus = Literal[
@@ -162,3 +164,15 @@ class ListSubscriptions(
     ]
 ):
     pass
+
+class LazyListSubscriptions(
+    LemonSqueezyResponse[
+        LazyRecords[SubscriptionData],
+        ListLink,
+        Meta,
+        Data[dict[str, Any], Any]
+    ]
+):
+    pass
+
+SubscriptionRecord = compact_record('SubscriptionRecord', 'subscriptions', Attributes)
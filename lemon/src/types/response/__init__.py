@@ -1,8 +1,18 @@
 from .data import Data, Generic, BaseModel, TypeVar, TypedDict
-from .relationships import Relationship, RelationshipLinks, RelationshipKeys, Pick
+from .relationships import (
+    LazyRelationships,
+    Relationship,
+    RelationshipLinks,
+    RelationshipKeys,
+    Pick,
+    relationship_links,
+)
 from .params import Params
 from .meta import Meta, MetaPage, MetaUrls
 from .links import Links
+from .lazy import LazyRecords
+from .compact import CompactRecord, compact_record
+from .included import IncludedMap
 
 D = TypeVar('D')
 I = TypeVar('I')
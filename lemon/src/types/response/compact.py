@@ -0,0 +1,135 @@
+import sys
+
+from collections.abc import Iterable, Mapping
+from types import UnionType
+from typing import (
+    Any,
+    ClassVar,
+    Literal,
+    Self,
+    TypeAliasType,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from pydantic import BaseModel
+
+from .relationships import Links, relationship_links
+
+
+class CompactRecord:
+    """Slotted, attribute-only representation of a resource object.
+
+    Instances keep the `id` and the attributes of a JSON:API resource object
+    in slots rather than in nested dictionaries. Strings drawn from a small
+    set of values are interned so that every record shares one copy of them.
+    Relationship links are not stored; they are derived from the resource
+    type and id on request.
+    """
+    __slots__ = ('id',)
+
+    type: ClassVar[str]
+    fields: ClassVar[tuple[str, ...]]
+    interned: ClassVar[frozenset[str]]
+
+    id: str
+
+    @classmethod
+    def from_raw(cls, raw: Mapping[str, Any] | BaseModel) -> Self:
+        """Build a record from a resource object.
+
+        Args:
+            raw: The resource object, either as returned by the API, as a
+            dumped model or as a validated `Data` model.
+
+        Returns:
+            The compact record.
+        """
+        if isinstance(raw, BaseModel):
+            raw = raw.model_dump()
+        attributes = raw['attributes']
+        record = object.__new__(cls)
+        record.id = raw['id']
+        interned = cls.interned
+        for name in cls.fields:
+            value = attributes.get(name)
+            if name in interned and value.__class__ is str:
+                value = sys.intern(value)
+            setattr(record, name, value)
+        return record
+
+    @classmethod
+    def from_iterable(
+        cls,
+        records: Iterable[Mapping[str, Any] | BaseModel]
+    ) -> list[Self]:
+        return [cls.from_raw(raw) for raw in records]
+
+    def attributes(self) -> dict[str, Any]:
+        """The attributes of the record as a dictionary."""
+        return {name: getattr(self, name) for name in self.fields}
+
+    def links(self, key: str) -> Links:
+        """The links of the relationship `key` of the record."""
+        return relationship_links(self.type, self.id, key)
+
+    def __getitem__(self, item: str) -> Any:
+        return getattr(self, item)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactRecord) or other.type != self.type:
+            return NotImplemented
+        return other.id == self.id and other.attributes() == self.attributes()
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id={self.id!r})"
+
+
+def _is_enumerated(annotation: Any) -> bool:
+    if isinstance(annotation, TypeAliasType):
+        return _is_enumerated(annotation.__value__)
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return True
+    if origin in (Union, UnionType):
+        return any(_is_enumerated(arg) for arg in get_args(annotation))
+    return False
+
+
+def compact_record(
+        name: str,
+        resource: str,
+        attributes: type,
+        intern: Iterable[str] | None = None
+) -> type[CompactRecord]:
+    """Generate a compact record class from an `Attributes` TypedDict.
+
+    Args:
+        name: Name of the generated class.
+        resource: The JSON:API type of the resource, e.g. `subscriptions`.
+        attributes: The `Attributes` TypedDict of the resource. Each of its
+        keys becomes a slot of the generated class.
+        intern: (Optional) Attributes whose string values are interned. By
+        default these are the attributes typed as a `Literal` and the
+        `*_formatted` attributes.
+
+    Returns:
+        A `CompactRecord` subclass.
+    """
+    hints = get_type_hints(attributes)
+    if intern is None:
+        intern = [
+            field for field, annotation in hints.items()
+            if _is_enumerated(annotation) or field.endswith('_formatted')
+        ]
+    fields = tuple(hints)
+    return type(name, (CompactRecord,), {
+        '__slots__': fields,
+        'type': resource,
+        'fields': fields,
+        'interned': frozenset(intern),
+    })
@@ -1,7 +1,9 @@
-from typing import Generic, TypedDict, TypeVar
+from typing import Any, Generic, TypedDict, TypeVar
 
 from pydantic import BaseModel
 
+from .relationships import LazyRelationships
+
 
 A = TypeVar('A')
 R = TypeVar('R')
@@ -15,3 +17,10 @@ class Data(BaseModel, Generic[A, R]):
     attributes: A
     relationships: R
     links: Links
+
+    def model_post_init(self, context: Any) -> None:
+        if isinstance(self.relationships, LazyRelationships):
+            self.relationships.bind(self.type, self.id)
+
+    def __getitem__(self, item):
+        return getattr(self, item)
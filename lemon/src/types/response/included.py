@@ -0,0 +1,114 @@
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any
+
+from pydantic import BaseModel
+
+from .data import Data
+
+
+type Identity = tuple[str, str]
+type Resource = Mapping[str, Any] | BaseModel
+
+GenericData = Data[dict[str, Any], Any]
+
+
+def _identity(resource: Resource) -> Identity:
+    return (resource['type'], str(resource['id']))  # type: ignore
+
+
+class IncludedMap:
+    """Identity map over the `included` resources of compound documents.
+
+    Resources are keyed by `(type, id)` so a resource included on several
+    pages is stored once. Each one is validated the first time it is
+    resolved and the instance is reused afterwards.
+    """
+
+    def __init__(
+            self,
+            models: Mapping[str, type[BaseModel]] | None = None
+    ) -> None:
+        """
+        Args:
+            models: (Optional) The model to validate each resource type into,
+            e.g. `{'subscriptions': SubscriptionData}`. Types without a model
+            are validated into a generic `Data`.
+        """
+        self._models = dict(models or {})
+        self._raw: dict[Identity, Any] = {}
+        self._resolved: dict[Identity, BaseModel] = {}
+
+    def add(self, resources: Iterable[Resource] | None) -> None:
+        """Add included resources, keeping the first copy of each."""
+        for resource in resources or ():
+            identity = _identity(resource)
+            if identity not in self._raw:
+                self._raw[identity] = resource
+
+    def add_response(self, response: Mapping[str, Any]) -> None:
+        """Add the included resources of a response.
+
+        Args:
+            response: Either the response object returned by a `get_*` or
+            `list_*` function or the compound document itself.
+        """
+        document = response.get('data')
+        if isinstance(document, Mapping) and 'jsonapi' in document:
+            response = document
+        self.add(response.get('included'))
+
+    def get(self, type: str, id: str | int) -> BaseModel | None:
+        """Look up an included resource by its type and id."""
+        identity = (type, str(id))
+        if (resolved := self._resolved.get(identity)) is not None:
+            return resolved
+        if (raw := self._raw.get(identity)) is None:
+            return None
+        model = self._models.get(type, GenericData)
+        if isinstance(raw, model):
+            resolved = raw
+        else:
+            if isinstance(raw, BaseModel):
+                raw = raw.model_dump()
+            resolved = model.model_validate(raw)
+        self._resolved[identity] = resolved
+        return resolved
+
+    def resolve(
+            self,
+            resource: Resource,
+            key: str
+    ) -> BaseModel | list[BaseModel] | None:
+        """Resolve a relationship of a resource to the included resources.
+
+        Args:
+            resource: A primary resource, as a dictionary or a `Data` model.
+            key: The relationship to resolve, e.g. `customer`.
+
+        Returns:
+            The included resource for a to-one relationship, a list of them
+            for a to-many relationship, or `None` if the relationship was not
+            included.
+        """
+        relationship = resource['relationships'][key]  # type: ignore
+        linkage = (
+            relationship.get('data')
+            if isinstance(relationship, Mapping) else relationship.data
+        )
+        if linkage is None:
+            return None
+        if isinstance(linkage, list):
+            return [
+                found for item in linkage
+                if (found := self.get(item['type'], item['id'])) is not None
+            ]
+        return self.get(linkage['type'], linkage['id'])
+
+    def __contains__(self, identity: Identity) -> bool:
+        return identity in self._raw
+
+    def __iter__(self) -> Iterator[Identity]:
+        return iter(self._raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
@@ -0,0 +1,85 @@
+from collections.abc import Iterator, Sequence
+from typing import Any, Generic, TypeVar, get_args, overload
+
+from pydantic import BaseModel, GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+
+T = TypeVar('T', bound=BaseModel)
+
+class LazyRecords(Sequence[T], Generic[T]):
+    """Sequence of records validated on first access.
+
+    The raw JSON objects are kept as returned by the API. Each one is
+    validated against the record model the first time it is read and the
+    resulting instance is cached, so records that are never read are never
+    parsed.
+    """
+    __slots__ = ('_raw', '_model', '_cache')
+
+    def __init__(self, raw: list[dict[str, Any]], model: type[T]) -> None:
+        self._raw = raw
+        self._model = model
+        self._cache: list[T | None] = [None] * len(raw)
+
+    @property
+    def raw(self) -> list[dict[str, Any]]:
+        """The unvalidated JSON objects backing the sequence."""
+        return self._raw
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._raw)))]
+        record = self._cache[index]
+        if record is None:
+            record = self._model.model_validate(self._raw[index])
+            self._cache[index] = record
+        return record
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __iter__(self) -> Iterator[T]:
+        for index in range(len(self._raw)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        validated = sum(record is not None for record in self._cache)
+        return (
+            f"LazyRecords[{self._model.__name__}]"
+            f"({validated}/{len(self._raw)} validated)"
+        )
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls,
+        source: Any,
+        handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        model, = get_args(source)
+
+        def validate(value: Any) -> LazyRecords:
+            if isinstance(value, LazyRecords):
+                return value
+            return cls(value, model)
+
+        def serialize(value: LazyRecords, info: core_schema.SerializationInfo):
+            return value.raw if info.mode_is_json() else value
+
+        return core_schema.no_info_after_validator_function(
+            validate,
+            core_schema.union_schema([
+                core_schema.is_instance_schema(cls),
+                core_schema.list_schema(core_schema.is_instance_schema(dict)),
+            ]),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                serialize,
+                info_arg=True
+            )
+        )
@@ -1,11 +1,19 @@
-from collections.abc import Iterator, Sequence
-from typing import Literal, Generic, TypedDict, TypeVar
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, ClassVar, Literal, Generic, Self, TypedDict, TypeVar
 
-from pydantic import BaseModel, create_model, ConfigDict, RootModel
+from pydantic import (
+    BaseModel,
+    PrivateAttr,
+    RootModel,
+    model_serializer,
+    model_validator,
+)
 
 
 T = TypeVar('T')
 
+LINKS_BASE_URL = "https://api.lemonsqueezy.com/v1"
+
 type Types = Literal[
     "stores",
     "customers",
@@ -60,6 +68,18 @@ class RelationshipLinks(BaseModel, revalidate_instances='always'):
         return getattr(self, item)
 
 
+def relationship_links(resource: str, id: str, key: str) -> Links:
+    """Build the links of a relationship from its owning resource.
+
+    The API always derives these urls from the resource type and id so
+    they need not be stored alongside every record.
+    """
+    return {
+        'related': f"{LINKS_BASE_URL}/{resource}/{id}/{key}",
+        'self': f"{LINKS_BASE_URL}/{resource}/{id}/relationships/{key}",
+    }
+
+
 class Relationship(RootModel):
     root: dict[RelationshipKeys, RelationshipLinks]
 
@@ -69,23 +89,77 @@ class Relationship(RootModel):
     def __iter__(self) -> Iterator[RelationshipKeys]:
         return iter(self.root)
 
+# Relationship names of the records validated, shared between records.
+_NAMES: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+class LazyRelationships(RootModel):
+    """Relationships of a resource object, materialised on access.
+
+    Only the presence of the expected keys is checked on validation. Links
+    are not stored: they are derived from the owning resource type and id
+    when a relationship is read, and validated into `RelationshipLinks`
+    then. Only the resource linkage (`data`), sent when related objects are
+    included, is kept per record.
+    """
+    root: dict[str, Any] | None = None
+
+    keys: ClassVar[tuple[str, ...]] = ()
+    _owner: tuple[str, str] | None = PrivateAttr(default=None)
+    _names: tuple[str, ...] = PrivateAttr(default=())
+    _links: dict[str, RelationshipLinks] | None = PrivateAttr(default=None)
+
+    @model_validator(mode='wrap')
+    @classmethod
+    def _strip(cls, value: Any, handler: Any) -> Self:
+        if not isinstance(value, Mapping):
+            return handler(value)
+        missing = [key for key in cls.keys if key not in value]
+        if missing:
+            raise ValueError(f"missing relationships: {', '.join(missing)}")
+        linkage = {
+            key: raw['data'] for key, raw in value.items()
+            if isinstance(raw, Mapping) and raw.get('data') is not None
+        }
+        self = handler(linkage or None)
+        names = tuple(value)
+        self._names = _NAMES.setdefault(names, names)
+        return self
+
+    def bind(self, resource: str, id: str) -> None:
+        """Record the resource the relationships belong to."""
+        self._owner = (resource, id)
+
+    def __getitem__(self, item) -> RelationshipLinks:
+        if self._links is None:
+            self._links = {}
+        if (links := self._links.get(item)) is None:
+            if item not in self._names:
+                raise KeyError(item)
+            if self._owner is None:
+                raise ValueError("Relationships are not bound to a resource")
+            links = self._links[item] = RelationshipLinks.model_validate({
+                'links': relationship_links(*self._owner, item),
+                'data': None if self.root is None else self.root.get(item),
+            })
+        return links
+
+    def __iter__(self) -> Iterator[str]: # type: ignore
+        return iter(self._names)
+
+    @model_serializer(mode='wrap')
+    def _dump(self, handler: Any, info: Any) -> dict[str, Any]:
+        return {
+            key: self[key].model_dump(mode=info.mode) for key in self._names
+        }
+
 class Pick(BaseModel, Generic[T]):
     keys: Sequence[T]
 
-    def pick(self):
-        keys_model = create_model(
-            'Keys',
-            **{key: (RelationshipLinks, ...) for key in self.keys}
-        ) # type: ignore
-        class Keys(RootModel):
-            root: keys_model # type: ignore
-
-            def __getitem__(self, item) -> RelationshipLinks:
-                return getattr(self.root, item)
+    def pick(self) -> type[LazyRelationships]:
+        class Keys(LazyRelationships):
+            keys = tuple(self.keys) # type: ignore
 
-            def __iter__(self) -> Iterator[T]:
-                return iter(self.root)
-        
         return Keys
 
 
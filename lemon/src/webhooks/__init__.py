@@ -1,8 +1,36 @@
-from .types import UpdateWebhook, NewWebhook, Webhook
+from .types import UpdateWebhook, NewWebhook, Webhook, WebhookPayload
 from .webhook import (
     create_webhook,
     delete_webhook,
     get_webhook,
     list_webhooks,
     update_webhook,
-)
\ No newline at end of file
+)
+from .invalidation import invalidate_from_webhook, stale_resources
+from .signature import (
+    SIGNATURE_HEADER,
+    SignatureVerifier,
+    sign,
+    verify_signature,
+)
+from .batch import BatchFailed, BatchStats, EventBatcher
+from .events import EVENT_MODELS, EventRouter, WebhookEvent
+from .coalesce import EventCoalescer, TERMINAL_EVENTS, coalesce
+from .receiver import ReceiverStats, WebhookReceiver
+from .reconcile import ReconcileReport, Reconciler, SUBSCRIPTION_EVENTS
+from .sync import (
+    WebhookChange,
+    WebhookResult,
+    apply_webhooks,
+    fingerprint,
+    plan_webhooks,
+    sync_webhooks,
+)
+from .idempotency import (
+    BloomFilter,
+    IdempotencyBackend,
+    IdempotencyStats,
+    IdempotencyStore,
+    SQLiteIdempotencyBackend,
+    event_key,
+)
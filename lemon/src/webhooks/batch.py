@@ -0,0 +1,166 @@
+import asyncio
+
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from typing import TYPE_CHECKING, TypedDict
+
+if TYPE_CHECKING:
+    from .events import WebhookEvent
+
+type BatchHandler = Callable[
+    [list[WebhookEvent]],
+    Awaitable[Iterable[WebhookEvent] | Mapping[WebhookEvent, Exception] | None]
+]
+type FailureCallback = Callable[[WebhookEvent, Exception], object]
+
+
+class BatchStats(TypedDict):
+    batches: int
+    events: int
+    retried: int
+    failed: int
+    pending: int
+
+
+class BatchFailed(Exception):
+    """Raised for an event a batch handler reported as failed."""
+
+
+class EventBatcher:
+    """Deliver webhook events to a handler in batches.
+
+    Events are buffered and handed to `handler` as a list once `max_size`
+    events are waiting or the oldest one has waited `max_latency` seconds.
+    Batches are delivered one at a time, in the order events were pushed.
+
+    The handler returns the events of the batch that failed, either as an
+    iterable or as a mapping to their errors, or `None` if all succeeded;
+    raising fails the whole batch. Failed events are retried in a later
+    batch up to `max_retries` times, then passed to `on_failure`.
+    """
+
+    def __init__(
+            self,
+            handler: BatchHandler,
+            max_size: int = 100,
+            max_latency: float = 0.5,
+            max_retries: int = 3,
+            on_failure: FailureCallback | None = None,
+    ) -> None:
+        """
+        Args:
+            handler: Coroutine function receiving a list of events.
+            max_size: (Optional) Maximum number of events in a batch.
+            max_latency: (Optional) Maximum number of seconds an event waits
+            for its batch to be delivered.
+            max_retries: (Optional) Number of times a failed event is retried.
+            on_failure: (Optional) Called with an event and its error once it
+            has failed `max_retries` retries.
+        """
+        self.handler = handler
+        self.max_size = max_size
+        self.max_latency = max_latency
+        self.max_retries = max_retries
+        self.on_failure = on_failure
+        self._pending: list['WebhookEvent'] = []
+        self._attempts: dict['WebhookEvent', int] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._lock = asyncio.Lock()
+        self._flushes: set[asyncio.Task] = set()
+        self._batches = 0
+        self._events = 0
+        self._retried = 0
+        self._failed = 0
+
+    async def push(self, event: 'WebhookEvent') -> None:
+        """Buffer an event, delivering the batch if it is full."""
+        self._pending.append(event)
+        if len(self._pending) >= self.max_size:
+            await self.flush(full_only=True)
+        else:
+            self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is None and self._pending:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_latency, self._expire
+            )
+
+    def _expire(self) -> None:
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self, full_only: bool = False) -> None:
+        """Deliver the buffered events now.
+
+        Events failing during the flush are retried in a later batch.
+
+        Args:
+            full_only: (Optional) Only deliver batches of `max_size` events.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            remaining = len(self._pending)
+            while remaining > 0 and self._pending:
+                if full_only and len(self._pending) < self.max_size:
+                    break
+                batch = self._pending[:self.max_size]
+                del self._pending[:self.max_size]
+                remaining -= len(batch)
+                await self._deliver(batch)
+        self._schedule()
+
+    async def _deliver(self, batch: list['WebhookEvent']) -> None:
+        self._batches += 1
+        self._events += len(batch)
+        try:
+            failed = await self.handler(batch)
+        except Exception as exc:
+            failed = {event: exc for event in batch}
+        if failed is None:
+            failed = {}
+        elif not isinstance(failed, Mapping):
+            failed = {
+                event: BatchFailed(f"{event!r} failed in its batch")
+                for event in failed
+            }
+
+        retry = []
+        for event in batch:
+            if event not in failed:
+                self._attempts.pop(event, None)
+                continue
+            attempts = self._attempts.get(event, 0) + 1
+            if attempts <= self.max_retries:
+                self._attempts[event] = attempts
+                self._retried += 1
+                retry.append(event)
+                continue
+            self._attempts.pop(event, None)
+            self._failed += 1
+            if self.on_failure is not None:
+                self.on_failure(event, failed[event])
+        # Retried events go ahead of the ones pushed since, keeping order.
+        self._pending[:0] = retry
+
+    async def drain(self) -> None:
+        """Wait until every buffered event has been delivered."""
+        while self._pending or self._flushes:
+            if self._flushes:
+                flushes = list(self._flushes)
+                await asyncio.gather(*flushes, return_exceptions=True)
+                self._flushes.difference_update(flushes)
+            else:
+                await asyncio.sleep(self.max_latency / 10)
+
+    def stats(self) -> BatchStats:
+        return {
+            'batches': self._batches,
+            'events': self._events,
+            'retried': self._retried,
+            'failed': self._failed,
+            'pending': len(self._pending),
+        }
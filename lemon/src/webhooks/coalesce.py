@@ -0,0 +1,135 @@
+import asyncio
+
+from collections.abc import Awaitable, Callable, Iterable
+
+from .events import WebhookEvent
+from .types import Events
+
+type Deliver = Callable[[WebhookEvent], Awaitable[object]]
+
+# Events after which no further event of their object is expected.
+TERMINAL_EVENTS: frozenset[Events] = frozenset({
+    'subscription_expired',
+    'order_refunded',
+})
+
+
+def resource_key(event: WebhookEvent) -> tuple[str, str]:
+    """The object an event is about, for grouping.
+
+    Subscription invoice events are grouped with their subscription.
+    """
+    data = event['data']
+    subscription_id = (data.get('attributes') or {}).get('subscription_id')
+    if data['type'] == 'subscription-invoices' and subscription_id is not None:
+        return ('subscriptions', str(subscription_id))
+    return (data['type'], str(data['id']))
+
+
+def _updated_at(event: WebhookEvent) -> str:
+    return (event['data'].get('attributes') or {}).get('updated_at') or ''
+
+
+class EventCoalescer:
+    """Coalesce bursts of webhook events about the same object.
+
+    The first event about an object opens a window of `window` seconds.
+    Events about the object received during the window are grouped, and
+    when it closes only the latest event of each event name is delivered,
+    in `updated_at` order. The events it superseded are attached to it as
+    `coalesced`, oldest first, so handlers can still see the whole burst.
+
+    A terminal event, e.g. `subscription_expired`, closes the window of its
+    object at once.
+    """
+
+    def __init__(
+            self,
+            deliver: Deliver,
+            window: float = 1.0,
+            terminal: Iterable[str] = TERMINAL_EVENTS,
+    ) -> None:
+        """
+        Args:
+            deliver: Coroutine function receiving the coalesced events.
+            window: (Optional) Number of seconds events are held for.
+            terminal: (Optional) Events closing the window of their object.
+        """
+        self.deliver = deliver
+        self.window = window
+        self.terminal = frozenset(terminal)
+        self._groups: dict[tuple[str, str], list[WebhookEvent]] = {}
+        self._timers: dict[tuple[str, str], asyncio.TimerHandle] = {}
+        self._deliveries: set[asyncio.Task] = set()
+        self._received = 0
+        self._delivered = 0
+
+    async def push(self, event: WebhookEvent) -> None:
+        """Add an event to the group of its object."""
+        self._received += 1
+        key = resource_key(event)
+        group = self._groups.setdefault(key, [])
+        group.append(event)
+        if event.name in self.terminal:
+            await self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.window, self._expire, key
+            )
+
+    def _expire(self, key: tuple[str, str]) -> None:
+        task = asyncio.ensure_future(self._flush(key))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _flush(self, key: tuple[str, str]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._groups.pop(key, [])
+        for event in coalesce(group):
+            self._delivered += 1
+            await self.deliver(event)
+
+    async def flush(self) -> None:
+        """Deliver every pending group now."""
+        for key in list(self._groups):
+            await self._flush(key)
+        await self.drain()
+
+    async def drain(self) -> None:
+        """Wait until the open windows have closed and been delivered."""
+        while self._groups or self._deliveries:
+            if self._deliveries:
+                deliveries = list(self._deliveries)
+                await asyncio.gather(*deliveries, return_exceptions=True)
+                self._deliveries.difference_update(deliveries)
+            else:
+                await asyncio.sleep(self.window / 10)
+
+    @property
+    def pending(self) -> int:
+        """Number of events waiting for their window to close."""
+        return sum(len(group) for group in self._groups.values())
+
+    @property
+    def superseded(self) -> int:
+        """Number of events superseded so far."""
+        return self._received - self._delivered - self.pending
+
+
+def coalesce(events: list[WebhookEvent]) -> list[WebhookEvent]:
+    """The latest event of each name among `events`, in `updated_at` order.
+
+    Ties keep the order the events were received in.
+    """
+    ordered = sorted(events, key=_updated_at)
+    latest: dict[str, list[WebhookEvent]] = {}
+    for event in ordered:
+        latest.setdefault(event.name, []).append(event)
+    result = []
+    for burst in latest.values():
+        event = burst[-1]
+        event.coalesced = tuple(burst[:-1])
+        result.append(event)
+    return sorted(result, key=_updated_at)
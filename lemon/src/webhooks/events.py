@@ -0,0 +1,250 @@
+import asyncio
+import inspect
+
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, Generic, TypeVar, cast
+
+from pydantic import BaseModel, TypeAdapter
+
+from ..subscriptions.types import SubscriptionData
+from ..types.response import Data
+from .batch import BatchHandler, EventBatcher, FailureCallback
+from .types import EventMeta, Events, WebhookPayload
+
+D = TypeVar('D', bound=BaseModel)
+
+type EventHandler = Callable[['WebhookEvent'], Awaitable[Any] | Any]
+type SuccessCallback = Callable[['WebhookEvent'], None]
+
+# Model of the `data` object of each event. Resources the SDK has no types
+# for yet, and events it does not know, are validated as generic resource
+# objects.
+EVENT_MODELS: dict[Events, type[BaseModel]] = {
+    'order_created': Data[dict[str, Any], Any],
+    'order_refunded': Data[dict[str, Any], Any],
+    'subscription_created': SubscriptionData,
+    'subscription_updated': SubscriptionData,
+    'subscription_cancelled': SubscriptionData,
+    'subscription_resumed': SubscriptionData,
+    'subscription_expired': SubscriptionData,
+    'subscription_paused': SubscriptionData,
+    'subscription_unpaused': SubscriptionData,
+    'subscription_payment_success': Data[dict[str, Any], Any],
+    'subscription_payment_failed': Data[dict[str, Any], Any],
+    'subscription_payment_recovered': Data[dict[str, Any], Any],
+    'subscription_payment_refunded': Data[dict[str, Any], Any],
+    'license_key_created': Data[dict[str, Any], Any],
+    'license_key_updated': Data[dict[str, Any], Any],
+}
+
+_meta = TypeAdapter(EventMeta)
+_payload = TypeAdapter(WebhookPayload)
+
+
+class WebhookEvent(Generic[D]):
+    """A webhook delivery whose `data` is validated on first access.
+
+    Only the `meta` envelope is validated when the event is created, so
+    routing on `name` costs no more than a dictionary lookup. `data`
+    validates the event object into the model of the event, e.g.
+    `SubscriptionData` for `subscription_updated`, and caches it.
+
+    Indexing the event reads the raw payload, e.g. `event['data']['id']`.
+
+    Attributes:
+        `key`: Identity of the event in an `IdempotencyStore`, if any.
+        `coalesced`: Earlier events of the same name and object superseded
+        by this one in an `EventCoalescer`, oldest first.
+    """
+    __slots__ = ('meta', 'raw', 'key', 'coalesced', '_model', '_data')
+
+    def __init__(
+            self,
+            payload: Mapping[str, Any],
+            model: type[D] | None = None,
+    ) -> None:
+        """
+        Args:
+            payload: The body of the delivery, parsed from JSON.
+            model: (Optional) Model of `data`, by default the one registered
+            for the event in `EVENT_MODELS`.
+
+        Raises:
+            ValidationError: If `meta` is not a valid event envelope.
+        """
+        self.meta: EventMeta = _meta.validate_python(payload['meta'])
+        self.raw = payload
+        self.key: str | None = None
+        self.coalesced: tuple[WebhookEvent, ...] = ()
+        self._model = model or cast(
+            type[D],
+            EVENT_MODELS.get(
+                self.meta['event_name'],
+                Data[dict[str, Any], Any]
+            )
+        )
+        self._data: D | None = None
+
+    @classmethod
+    def parse(cls, body: str | bytes | bytearray) -> 'WebhookEvent':
+        """Parse the raw body of a delivery."""
+        return cls(_payload.validate_json(body))
+
+    @property
+    def name(self) -> Events | str:
+        return self.meta['event_name']
+
+    @property
+    def data(self) -> D:
+        """The event object, validated into the model of the event."""
+        if self._data is None:
+            self._data = self._model.model_validate(self.raw['data'])
+        return self._data
+
+    @property
+    def validated(self) -> bool:
+        """Whether `data` has been validated."""
+        return self._data is not None
+
+    def __getitem__(self, key: str) -> Any:
+        return self.raw[key]
+
+    def __repr__(self) -> str:
+        data = self.raw['data']
+        return f"WebhookEvent({self.name}, {data['type']} {data['id']})"
+
+
+class EventRouter:
+    """Dispatch table from event names to handlers.
+
+    Handlers are registered per event name, or for every event with `'*'`,
+    and receive the `WebhookEvent`. Batch handlers registered with
+    `on_batch` receive lists of events instead, see `EventBatcher`. Events
+    without handlers are dropped without their `data` ever being validated.
+    """
+
+    def __init__(self) -> None:
+        self._table: dict[str, list[EventHandler]] = {}
+        self._batch_table: dict[str, list[EventBatcher]] = {}
+        self._batchers: list[EventBatcher] = []
+        self._failure_callbacks: list[FailureCallback] = []
+        self._success_callbacks: list[SuccessCallback] = []
+
+    def on(
+            self,
+            *events: Events | str,
+    ) -> Callable[[EventHandler], EventHandler]:
+        """Register a handler for events, or for every event with `'*'`."""
+        def register(handler: EventHandler) -> EventHandler:
+            for event in events or ('*',):
+                self._table.setdefault(event, []).append(handler)
+            return handler
+        return register
+
+    def on_batch(
+            self,
+            *events: Events | str,
+            max_size: int = 100,
+            max_latency: float = 0.5,
+            max_retries: int = 3,
+    ) -> Callable[[BatchHandler], BatchHandler]:
+        """Register a batch handler for events, or for every event with `'*'`.
+
+        Args:
+            `max_size`: (Optional) Maximum number of events in a batch.
+            `max_latency`: (Optional) Maximum number of seconds an event
+            waits for its batch to be delivered.
+            `max_retries`: (Optional) Number of times a failed event is
+            retried.
+        """
+        def register(handler: BatchHandler) -> BatchHandler:
+            batcher = EventBatcher(
+                handler,
+                max_size=max_size,
+                max_latency=max_latency,
+                max_retries=max_retries,
+                on_failure=self._batch_failed,
+            )
+            self._batchers.append(batcher)
+            for event in events or ('*',):
+                self._batch_table.setdefault(event, []).append(batcher)
+            return handler
+        return register
+
+    def on_failure(self, callback: FailureCallback) -> FailureCallback:
+        """Register a callback for events a batch handler failed for good."""
+        self._failure_callbacks.append(callback)
+        return callback
+
+    def on_success(self, callback: SuccessCallback) -> SuccessCallback:
+        """Register a callback for events every handler succeeded for.
+
+        Events buffered for batch handlers count as handled once buffered.
+        """
+        self._success_callbacks.append(callback)
+        return callback
+
+    def _batch_failed(self, event: WebhookEvent, error: Exception) -> None:
+        for callback in self._failure_callbacks:
+            callback(event, error)
+
+    def handlers(self, event: str) -> tuple[EventHandler, ...]:
+        """The handlers of `event`, followed by those of every event."""
+        return (*self._table.get(event, ()), *self._table.get('*', ()))
+
+    def batchers(self, event: str) -> tuple[EventBatcher, ...]:
+        """The batchers of the batch handlers of `event`."""
+        return (
+            *self._batch_table.get(event, ()),
+            *self._batch_table.get('*', ()),
+        )
+
+    def wants(self, event: str) -> bool:
+        return any(
+            event in table or '*' in table
+            for table in (self._table, self._batch_table)
+        )
+
+    async def flush(self) -> None:
+        """Deliver the events buffered for batch handlers now."""
+        for batcher in self._batchers:
+            await batcher.flush()
+        await self.drain()
+
+    async def drain(self) -> None:
+        """Wait until the events buffered for batch handlers are delivered."""
+        for batcher in self._batchers:
+            await batcher.drain()
+
+    async def dispatch(
+            self,
+            event: WebhookEvent | Mapping[str, Any],
+    ) -> list[Exception]:
+        """Run the handlers of an event.
+
+        Coroutine functions run on the event loop, other functions in a
+        thread. Every handler runs even if a previous one fails; if none
+        does, the `on_success` callbacks are called. Events for batch
+        handlers are buffered; their failures are reported to the
+        `on_failure` callbacks instead.
+
+        Returns:
+            The exceptions raised by the handlers.
+        """
+        if not isinstance(event, WebhookEvent):
+            event = WebhookEvent(event)
+        for batcher in self.batchers(event.name):
+            await batcher.push(event)
+        errors = []
+        for handler in self.handlers(event.name):
+            try:
+                if inspect.iscoroutinefunction(handler):
+                    await handler(event)
+                else:
+                    await asyncio.to_thread(handler, event)
+            except Exception as exc:
+                errors.append(exc)
+        if not errors:
+            for callback in self._success_callbacks:
+                callback(event)
+        return errors
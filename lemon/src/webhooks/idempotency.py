@@ -0,0 +1,329 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Protocol, TypedDict
+
+
+class IdempotencyStats(TypedDict):
+    claims: int
+    duplicates: int
+    bloom_negatives: int
+    entries: int
+
+
+def event_key(payload: Mapping[str, Any]) -> str:
+    """Identity of a webhook event.
+
+    Deliveries of the same event share the key: the event name, the type
+    and id of its object and the `updated_at` of the object, or a hash of
+    the object for objects without one.
+    """
+    data = payload['data']
+    version = (data.get('attributes') or {}).get('updated_at')
+    if version is None:
+        version = hashlib.blake2b(
+            json.dumps(data, sort_keys=True, separators=(',', ':')).encode(),
+            digest_size=16
+        ).hexdigest()
+    event = payload['meta']['event_name']
+    return f"{event}:{data['type']}:{data['id']}:{version}"
+
+
+class BloomFilter:
+    """Set of strings answering membership with false positives only.
+
+    Sized for `capacity` keys at a false positive rate of `error_rate`.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 1e-6) -> None:
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.size = max(8, bits)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        return [(a + i * b) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class IdempotencyBackend(Protocol):
+    """Shared record of the claimed event keys of an `IdempotencyStore`.
+
+    Backends doing I/O set `blocking` so that `aclaim` and `arelease` call
+    them from a thread rather than on the event loop.
+    """
+
+    blocking: bool
+
+    def add(self, key: str, expires_at: float) -> bool:
+        """Record `key` until `expires_at`.
+
+        Returns:
+            `False` if `key` is already recorded and has not expired.
+        """
+        ...
+
+    def discard(self, key: str) -> None:
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+
+class SQLiteIdempotencyBackend:
+    """Event keys stored in a SQLite database shared by the host's processes.
+
+    Expired keys are purged every `purge_interval` seconds. Its methods
+    block on disk and on the locks of other processes, so use the `aclaim`
+    and `arelease` methods of the store on an event loop.
+    """
+
+    blocking = True
+
+    def __init__(
+            self,
+            path: str | os.PathLike,
+            timeout: float = 5.0,
+            purge_interval: float = 60.0,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.purge_interval = purge_interval
+        self._purged_at = 0.0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS events "
+            "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+
+    def add(self, key: str, expires_at: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if now - self._purged_at >= self.purge_interval:
+                    self._db.execute(
+                        "DELETE FROM events WHERE expires_at <= ?",
+                        (now,)
+                    )
+                    self._purged_at = now
+                else:
+                    self._db.execute(
+                        "DELETE FROM events WHERE key = ? AND expires_at <= ?",
+                        (key, now)
+                    )
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO events VALUES (?, ?)",
+                    (key, expires_at)
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return cursor.rowcount > 0
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM events WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+class IdempotencyStore:
+    """Drop webhook events that were already handled.
+
+    `claim` returns `True` the first time an event key is seen within
+    `window` seconds and `False` for its duplicates. Keys are kept in a
+    time-windowed LRU of at most `max_entries` keys.
+
+    With `bloom_capacity` set, a Bloom filter of the keys claimed during the
+    window sits in front of the LRU: a key it does not hold is new and is
+    claimed without looking it up, while a key it holds, possibly a false
+    positive, is confirmed against the LRU and the backend. The filter thus
+    never drops a new event.
+
+    With a `backend`, e.g. a `SQLiteIdempotencyBackend`, keys are shared
+    with other processes, and duplicates of keys evicted from the LRU are
+    still detected; the in-memory LRU answers for the keys this process has
+    claimed without querying the backend. On an event loop, use `aclaim`
+    and `arelease`, which query a blocking backend from a thread.
+    """
+
+    def __init__(
+            self,
+            window: float = 24 * 3600,
+            max_entries: int = 100_000,
+            bloom_capacity: int | None = None,
+            bloom_error_rate: float = 1e-6,
+            backend: IdempotencyBackend | None = None,
+    ) -> None:
+        """
+        Args:
+            window: (Optional) Number of seconds during which duplicates of
+            an event are dropped.
+            max_entries: (Optional) Maximum number of keys held in memory.
+            bloom_capacity: (Optional) Number of keys claimed per window
+            that the Bloom filter is sized for.
+            bloom_error_rate: (Optional) False positive rate of the Bloom
+            filter.
+            backend: (Optional) Shared record of the claimed keys.
+        """
+        self.window = window
+        self.max_entries = max_entries
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.backend = backend
+        self._keys: OrderedDict[str, float] = OrderedDict()
+        # Bloom filters of the keys claimed during the current and previous
+        # windows, with the time each window started.
+        self._blooms: list[tuple[float, BloomFilter]] = []
+        self._claims = 0
+        self._duplicates = 0
+        self._bloom_negatives = 0
+
+    def claim(self, key: str) -> bool:
+        """Record the event `key`.
+
+        Returns:
+            `True` if the event should be handled, `False` if it is a
+            duplicate.
+        """
+        now = time.time()
+        if self._seen(key, now):
+            return False
+        expires_at = now + self.window
+        if self.backend is not None and not self.backend.add(key, expires_at):
+            self._duplicates += 1
+            return False
+        self._record(key, now, expires_at)
+        return True
+
+    async def aclaim(self, key: str) -> bool:
+        """Record the event `key` without blocking the event loop.
+
+        Returns:
+            `True` if the event should be handled, `False` if it is a
+            duplicate.
+        """
+        backend = self.backend
+        if backend is None or not getattr(backend, 'blocking', False):
+            return self.claim(key)
+        now = time.time()
+        if self._seen(key, now):
+            return False
+        expires_at = now + self.window
+        if not await asyncio.to_thread(backend.add, key, expires_at):
+            self._duplicates += 1
+            return False
+        self._record(key, now, expires_at)
+        return True
+
+    def _seen(self, key: str, now: float) -> bool:
+        """Whether this process claimed `key` and still holds it."""
+        self._expire(now)
+        if self.bloom_capacity is not None and not any(
+            key in bloom for _, bloom in self._blooms
+        ):
+            self._bloom_negatives += 1
+            return False
+        if key in self._keys:
+            self._duplicates += 1
+            return True
+        return False
+
+    def _record(self, key: str, now: float, expires_at: float) -> None:
+        self._keys[key] = expires_at
+        while len(self._keys) > self.max_entries:
+            self._keys.popitem(last=False)
+        if self.bloom_capacity is not None:
+            self._bloom(now).add(key)
+        self._claims += 1
+
+    def release(self, key: str) -> None:
+        """Forget `key` so a later delivery of the event is handled again.
+
+        Call it when handling the event failed. The key stays in the Bloom
+        filter, but is no longer confirmed by the LRU or the backend.
+        """
+        self._keys.pop(key, None)
+        if self.backend is not None:
+            self.backend.discard(key)
+
+    async def arelease(self, key: str) -> None:
+        """Forget `key` without blocking the event loop, see `release`."""
+        backend = self.backend
+        if backend is None or not getattr(backend, 'blocking', False):
+            return self.release(key)
+        self._keys.pop(key, None)
+        await asyncio.to_thread(backend.discard, key)
+
+    def _expire(self, now: float) -> None:
+        # Keys are inserted in time order with the same window, so the
+        # oldest ones come first.
+        while self._keys:
+            key, expires_at = next(iter(self._keys.items()))
+            if expires_at > now:
+                break
+            del self._keys[key]
+        # A Bloom filter holds keys claimed up to `window` seconds after it
+        # was started, which must be remembered `window` seconds longer.
+        self._blooms = [
+            (started_at, bloom) for started_at, bloom in self._blooms
+            if now - started_at < 2 * self.window
+        ]
+
+    def _bloom(self, now: float) -> BloomFilter:
+        """The Bloom filter receiving the keys claimed at `now`."""
+        if not self._blooms or now - self._blooms[0][0] >= self.window:
+            bloom = BloomFilter(self.bloom_capacity or 1, self.bloom_error_rate)
+            self._blooms = [(now, bloom), *self._blooms[:1]]
+        return self._blooms[0][1]
+
+    def stats(self) -> IdempotencyStats:
+        return {
+            'claims': self._claims,
+            'duplicates': self._duplicates,
+            'bloom_negatives': self._bloom_negatives,
+            'entries': len(self._keys),
+        }
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
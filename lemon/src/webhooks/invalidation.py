@@ -0,0 +1,92 @@
+from collections.abc import Mapping
+from typing import Any, cast
+
+from ..internal.request import send, FetchOptions, ResponseCache
+from ..internal.utils import CONFIG_KEY, get_kv
+from .types import Events
+
+# Resource type of the objects referenced by an id attribute of an event.
+RELATED_RESOURCES: dict[str, str] = {
+    'subscription_id': 'subscriptions',
+    'order_id': 'orders',
+    'customer_id': 'customers',
+}
+
+# For each event, the id attributes of its object whose resources it makes
+# stale, besides the object itself.
+EVENT_RELATED: dict[Events, tuple[str, ...]] = {
+    'order_created': ('customer_id',),
+    'order_refunded': ('customer_id',),
+    'subscription_created': ('order_id', 'customer_id'),
+    'subscription_updated': ('customer_id',),
+    'subscription_cancelled': ('customer_id',),
+    'subscription_resumed': ('customer_id',),
+    'subscription_expired': ('customer_id',),
+    'subscription_paused': ('customer_id',),
+    'subscription_unpaused': ('customer_id',),
+    'subscription_payment_success': ('subscription_id', 'customer_id'),
+    'subscription_payment_failed': ('subscription_id', 'customer_id'),
+    'subscription_payment_recovered': ('subscription_id', 'customer_id'),
+    'subscription_payment_refunded': ('subscription_id', 'customer_id'),
+    'license_key_created': ('order_id', 'customer_id'),
+    'license_key_updated': (),
+}
+
+
+def stale_resources(payload: Mapping[str, Any]) -> list[tuple[str, str]]:
+    """The `(type, id)` of the resources a webhook event makes stale.
+
+    Args:
+        payload: The body of a webhook request.
+
+    Returns:
+        The event object followed by its related resources.
+    """
+    event = payload['meta']['event_name']
+    data = payload['data']
+    attributes = data.get('attributes') or {}
+    resources = [(data['type'], str(data['id']))]
+    for attribute in EVENT_RELATED.get(event, ()):
+        if (id := attributes.get(attribute)) is not None:
+            resources.append((RELATED_RESOURCES[attribute], str(id)))
+    return resources
+
+async def invalidate_from_webhook(
+        payload: Mapping[str, Any],
+        cache: ResponseCache | None = None,
+        refresh: bool = False,
+) -> int:
+    """Evict the cached responses made stale by a webhook event.
+
+    The responses of the event object, of its related resources (e.g. the
+    customer of an updated subscription) and the list queries of their
+    resource types are evicted.
+
+    Args:
+        `payload`: The body of a webhook request.
+        `cache`: (Optional) The cache to evict from. Defaults to the cache
+        passed to `lemon_squeezy_setup`.
+        `refresh`: (Optional) Fetch the event object again once evicted so
+        the cache holds its latest state.
+
+    Returns:
+        The number of evicted responses.
+    """
+    if cache is None:
+        config = cast(dict, get_kv(CONFIG_KEY) or {})
+        cache = config.get('cache')
+    if cache is None:
+        return 0
+
+    evicted = 0
+    for resource, id in stale_resources(payload):
+        evicted += await cache.invalidate(resource=resource, id=id)
+
+    if refresh:
+        resource, id = stale_resources(payload)[0]
+        path = f"/v1/{resource}/{id}"
+        if cache.ttl_for(resource) > 0:
+            response, size = await send(FetchOptions(path=path))
+            if response["error"] is None:
+                await cache.set(cache.key(path), response, size)
+    return evicted
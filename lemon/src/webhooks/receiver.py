@@ -0,0 +1,361 @@
+import asyncio
+import logging
+
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, TypedDict
+
+from pydantic import TypeAdapter, ValidationError
+
+from .batch import BatchHandler
+from .coalesce import EventCoalescer
+from .events import EVENT_MODELS, EventHandler, EventRouter, WebhookEvent
+from .idempotency import IdempotencyStore, event_key
+from .signature import SignatureVerifier
+from .types import Events, WebhookPayload
+
+type Scope = dict[str, Any]
+type Receive = Callable[[], Awaitable[dict[str, Any]]]
+type Send = Callable[[dict[str, Any]], Awaitable[None]]
+# A queued payload with its idempotency key.
+type Queued = tuple[WebhookPayload, str | None]
+
+logger = logging.getLogger(__name__)
+
+_payload = TypeAdapter(WebhookPayload)
+
+
+class ReceiverStats(TypedDict):
+    received: int
+    accepted: int
+    rejected: int
+    duplicates: int
+    ignored: int
+    dropped: int
+    processed: int
+    failed: int
+    queue_depth: int
+    max_queue_depth: int
+    workers: int
+
+
+class WebhookReceiver:
+    """ASGI application receiving Lemon Squeezy webhook deliveries.
+
+    Each delivery is verified against the webhook secrets, validated into a
+    `WebhookPayload` and put on a bounded in-process queue, and answered
+    with `200` as soon as it is queued. A pool of workers then runs the
+    handlers registered for its event with `on`, or on the `router` passed
+    in, with a `WebhookEvent`. Slow handlers thus never delay the response
+    and Lemon Squeezy does not retry the delivery. Events without handlers,
+    or unknown to the SDK, are acknowledged without being queued.
+
+    When the queue is full deliveries are answered with `503` so that
+    Lemon Squeezy retries them later instead of the process buffering an
+    unbounded backlog.
+
+    The application works with any ASGI server or framework able to mount
+    an ASGI app. Workers start with the `lifespan` protocol, or on the first
+    delivery for servers that do not support it::
+
+        receiver = WebhookReceiver(secret)
+
+        @receiver.on('subscription_created')
+        async def provision(event: WebhookEvent):
+            ...
+    """
+
+    def __init__(
+            self,
+            secrets: str | bytes | Iterable[str | bytes] | SignatureVerifier,
+            max_queue: int = 1000,
+            workers: int = 4,
+            max_body: int = 2**20,
+            idempotency: IdempotencyStore | None = None,
+            router: EventRouter | None = None,
+            coalesce: float | None = None,
+    ) -> None:
+        """
+        Args:
+            secrets: The secret of the webhook, its active secrets, or a
+            `SignatureVerifier`.
+            max_queue: (Optional) Maximum number of deliveries waiting for a
+            worker.
+            workers: (Optional) Number of deliveries handled concurrently.
+            max_body: (Optional) Maximum size in bytes of a delivery.
+            idempotency: (Optional) Store recording the handled events.
+            Duplicate deliveries are acknowledged without being queued, and
+            an event whose handlers fail is released so a later delivery is
+            handled again.
+            router: (Optional) The dispatch table of the handlers.
+            coalesce: (Optional) Hold events for this many seconds and only
+            handle the latest event of each name per object, see
+            `EventCoalescer`.
+        """
+        if not isinstance(secrets, SignatureVerifier):
+            secrets = SignatureVerifier(secrets)
+        self.verifier = secrets
+        self.max_queue = max_queue
+        self.workers = workers
+        self.max_body = max_body
+        self.idempotency = idempotency
+        self.router = router or EventRouter()
+        self.router.on_failure(self._batch_failed)
+        self.coalescer: EventCoalescer | None = None
+        if coalesce is not None:
+            self.coalescer = EventCoalescer(self._handle, coalesce)
+        self._queue: asyncio.Queue[Queued] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._releases: set[asyncio.Task] = set()
+        self._received = 0
+        self._accepted = 0
+        self._rejected = 0
+        self._duplicates = 0
+        self._ignored = 0
+        self._dropped = 0
+        self._processed = 0
+        self._failed = 0
+        self._max_depth = 0
+
+    def on(
+            self,
+            *events: Events | str,
+    ) -> Callable[[EventHandler], EventHandler]:
+        """Register a handler for events, or for every event with `'*'`.
+
+        Handlers receive the `WebhookEvent` of the delivery. Coroutine
+        functions run on the event loop, other functions in a thread.
+        """
+        return self.router.on(*events)
+
+    def on_batch(
+            self,
+            *events: Events | str,
+            max_size: int = 100,
+            max_latency: float = 0.5,
+            max_retries: int = 3,
+    ) -> Callable[[BatchHandler], BatchHandler]:
+        """Register a batch handler for events, see `EventRouter.on_batch`.
+
+        Events a batch handler fails for good are counted as failed and, with
+        an idempotency store, released so that their redelivery is handled.
+        """
+        return self.router.on_batch(
+            *events,
+            max_size=max_size,
+            max_latency=max_latency,
+            max_retries=max_retries,
+        )
+
+    async def start(self) -> None:
+        """Start the workers, unless already running."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(self.max_queue)
+        self._tasks = [
+            asyncio.ensure_future(self._work()) for _ in range(self.workers)
+        ]
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the workers.
+
+        Args:
+            drain: (Optional) Wait for the queued deliveries to be handled
+            first.
+        """
+        if self._queue is not None and drain:
+            await self._queue.join()
+            if self.coalescer is not None:
+                await self.coalescer.flush()
+            await self.router.flush()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self) -> None:
+        """Wait until every queued delivery has been handled."""
+        if self._queue is not None:
+            await self._queue.join()
+        if self.coalescer is not None:
+            await self.coalescer.drain()
+        await self.router.drain()
+        if self._releases:
+            await asyncio.gather(*self._releases)
+
+    def stats(self) -> ReceiverStats:
+        return {
+            'received': self._received,
+            'accepted': self._accepted,
+            'rejected': self._rejected,
+            'duplicates': self._duplicates,
+            'ignored': self._ignored,
+            'dropped': self._dropped,
+            'processed': self._processed,
+            'failed': self._failed,
+            'queue_depth': 0 if self._queue is None else self._queue.qsize(),
+            'max_queue_depth': self._max_depth,
+            'workers': len(self._tasks),
+        }
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        while True:
+            payload, key = await self._queue.get()
+            try:
+                event = WebhookEvent(payload)
+                event.key = key
+                if self.coalescer is not None:
+                    await self.coalescer.push(event)
+                else:
+                    await self._handle(event)
+            except Exception:
+                # Handler errors are caught by the router; this is e.g. the
+                # idempotency backend failing. The worker must keep going.
+                self._failed += 1
+                logger.exception("Webhook delivery could not be handled")
+            finally:
+                self._queue.task_done()
+
+    async def _handle(self, event: WebhookEvent) -> None:
+        if not await self.dispatch(event) and event.key is not None:
+            assert self.idempotency is not None
+            await self.idempotency.arelease(event.key)
+
+    def _wants(self, event: str) -> bool:
+        return event in EVENT_MODELS and self.router.wants(event)
+
+    async def submit(self, payload: WebhookPayload) -> bool:
+        """Queue a payload received other than as a delivery.
+
+        The payload goes through the same pipeline as deliveries, including
+        deduplication, but waits for room in the queue instead of being
+        dropped when it is full.
+
+        Returns:
+            Whether the payload was queued, i.e. it was wanted and not a
+            duplicate.
+        """
+        if not self._wants(payload['meta']['event_name']):
+            self._ignored += 1
+            return False
+        key = None
+        if self.idempotency is not None:
+            key = event_key(payload)
+            if not await self.idempotency.aclaim(key):
+                self._duplicates += 1
+                return False
+        await self.start()
+        assert self._queue is not None
+        await self._queue.put((payload, key))
+        self._accepted += 1
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+        return True
+
+    def _batch_failed(self, event: WebhookEvent, error: Exception) -> None:
+        self._failed += 1
+        if event.key is not None and self.idempotency is not None:
+            # Called from the batcher, so the release runs in the background.
+            task = asyncio.ensure_future(self.idempotency.arelease(event.key))
+            self._releases.add(task)
+            task.add_done_callback(self._releases.discard)
+
+    async def dispatch(self, event: WebhookEvent | WebhookPayload) -> bool:
+        """Run the handlers registered for an event.
+
+        Returns:
+            Whether every handler succeeded.
+        """
+        errors = await self.router.dispatch(event)
+        self._failed += len(errors)
+        self._processed += 1
+        return not errors
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['method'] != 'POST':
+            return await _respond(send, 405)
+        self._received += 1
+        body = await self._body(receive)
+        if body is None:
+            self._rejected += 1
+            return await _respond(send, 413)
+
+        signature = None
+        for name, value in scope['headers']:
+            if name == b'x-signature':
+                signature = value
+                break
+        if not self.verifier.verify(body, signature):
+            self._rejected += 1
+            return await _respond(send, 401)
+        try:
+            payload = _payload.validate_json(body)
+        except ValidationError:
+            self._rejected += 1
+            return await _respond(send, 400)
+
+        if not self._wants(payload['meta']['event_name']):
+            self._ignored += 1
+            return await _respond(send, 200)
+        key = None
+        if self.idempotency is not None:
+            key = event_key(payload)
+            if not await self.idempotency.aclaim(key):
+                self._duplicates += 1
+                return await _respond(send, 200)
+
+        await self.start()
+        assert self._queue is not None
+        try:
+            self._queue.put_nowait((payload, key))
+        except asyncio.QueueFull:
+            if key is not None and self.idempotency is not None:
+                await self.idempotency.arelease(key)
+            self._dropped += 1
+            return await _respond(send, 503, [(b'retry-after', b'30')])
+        self._accepted += 1
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+        await _respond(send, 200)
+
+    async def _body(self, receive: Receive) -> bytes | bytearray | None:
+        """The request body, or `None` if larger than `max_body`."""
+        message = await receive()
+        body = message.get('body', b'')
+        if not message.get('more_body'):
+            return body if len(body) <= self.max_body else None
+        chunks = bytearray(body)
+        while message.get('more_body'):
+            message = await receive()
+            chunks += message.get('body', b'')
+            if len(chunks) > self.max_body:
+                return None
+        return chunks
+
+
+async def _respond(
+        send: Send,
+        status: int,
+        headers: list[tuple[bytes, bytes]] = [],
+) -> None:
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-length', b'0'), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': b''})
@@ -0,0 +1,239 @@
+from collections.abc import Awaitable, Callable, Mapping, MutableMapping
+from datetime import UTC, datetime
+from typing import Any, TypedDict
+
+from ..internal.request import paginate_pages
+from ..subscriptions import list_subscriptions
+from ..types.response import LazyRecords
+from .events import EventRouter, WebhookEvent
+from .receiver import WebhookReceiver
+from .types import Events, WebhookPayload
+
+type ListFunction = Callable[[dict], Awaitable[dict]]
+type EventName = Callable[[dict[str, Any], bool], Events]
+
+SUBSCRIPTION_EVENTS: tuple[Events, ...] = (
+    'subscription_created',
+    'subscription_updated',
+    'subscription_cancelled',
+    'subscription_resumed',
+    'subscription_expired',
+    'subscription_paused',
+    'subscription_unpaused',
+)
+
+# Events implied by the status of a subscription that changed while no
+# delivery was received. Other statuses are reported as updates.
+_STATUS_EVENTS: dict[str, Events] = {
+    'cancelled': 'subscription_cancelled',
+    'expired': 'subscription_expired',
+    'paused': 'subscription_paused',
+}
+
+
+def _subscription_event(record: dict[str, Any], created: bool) -> Events:
+    if created:
+        return 'subscription_created'
+    return _STATUS_EVENTS.get(
+        record['attributes']['status'],
+        'subscription_updated'
+    )
+
+
+async def _list_subscriptions(params: dict) -> dict:
+    return await list_subscriptions(params, lazy=True)
+
+
+# List function and event naming of each resource backfilled.
+SOURCES: dict[str, tuple[ListFunction, EventName]] = {
+    'subscriptions': (_list_subscriptions, _subscription_event),
+}
+
+
+class ReconcileReport(TypedDict):
+    scanned: int
+    missed: int
+    delivered: int
+    skipped: int
+    failed: int
+    events: dict[str, int]
+
+
+def _parse(timestamp: str) -> datetime:
+    return datetime.fromisoformat(timestamp)
+
+
+def _aware(moment: datetime) -> datetime:
+    return moment if moment.tzinfo else moment.replace(tzinfo=UTC)
+
+
+class Reconciler:
+    """Backfill webhook events missed while the receiver was unreachable.
+
+    The reconciler keeps the `updated_at` of the last version seen of each
+    object, fed by the events handled successfully, see `track`.
+    `reconcile` then pages through the list endpoints, concurrently, and
+    synthesises an event for every object updated during a time window
+    whose version is newer than the last one seen. The events go through
+    the same pipeline as deliveries, so after an outage only the objects
+    that changed are handled again instead of resyncing everything::
+
+        reconciler = Reconciler(receiver)
+        reconciler.track()
+        ...
+        await reconciler.reconcile(since=outage_started_at)
+
+    Synthesised events carry the current state of their object, and the
+    event implied by it, e.g. `subscription_cancelled` for a cancelled
+    subscription. They have no `webhook_id`.
+
+    When the target is a receiver, events are handled by its workers after
+    being queued, so the version of their object is only recorded once
+    every handler succeeded, by `track`: it must be called for the state to
+    move.
+    """
+
+    def __init__(
+            self,
+            target: WebhookReceiver | EventRouter,
+            state: MutableMapping[str, str] | None = None,
+            store_id: int | str | None = None,
+            page_size: int = 100,
+            concurrency: int = 4,
+            sources: Mapping[str, tuple[ListFunction, EventName]] = SOURCES,
+    ) -> None:
+        """
+        Args:
+            target: The receiver, or router, handling the events.
+            state: (Optional) The last `updated_at` seen of each object,
+            keyed by `'type:id'`, e.g. a `shelve` for state surviving
+            restarts.
+            store_id: (Optional) Only backfill the objects of this store.
+            page_size: (Optional) Number of records per page, at most 100.
+            concurrency: (Optional) Maximum number of pages requested at
+            once.
+            sources: (Optional) The list function and event naming of each
+            resource backfilled.
+        """
+        self.target = target
+        self.state: MutableMapping[str, str] = {} if state is None else state
+        self.store_id = store_id
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.sources = sources
+
+    def track(self) -> None:
+        """Observe the events `target` handled successfully."""
+        router = (
+            self.target.router
+            if isinstance(self.target, WebhookReceiver)
+            else self.target
+        )
+        router.on_success(self._handled)
+
+    def _handled(self, event: WebhookEvent) -> None:
+        if event.name in SUBSCRIPTION_EVENTS:
+            self._see(event['data'])
+
+    async def observe(self, event: WebhookEvent) -> None:
+        """Record the version of the object of a handled event."""
+        self._see(event['data'])
+
+    def _see(self, record: Mapping[str, Any]) -> None:
+        updated_at = (record.get('attributes') or {}).get('updated_at')
+        if updated_at is None:
+            return
+        key = f"{record['type']}:{record['id']}"
+        seen = self.state.get(key)
+        if seen is None or _parse(seen) < _parse(updated_at):
+            self.state[key] = updated_at
+
+    def missed(self, record: Mapping[str, Any]) -> bool:
+        """Whether `record` is newer than the last version seen."""
+        seen = self.state.get(f"{record['type']}:{record['id']}")
+        return seen is None or (
+            _parse(seen) < _parse(record['attributes']['updated_at'])
+        )
+
+    async def reconcile(
+            self,
+            since: datetime,
+            until: datetime | None = None,
+    ) -> ReconcileReport:
+        """Synthesise the events missed during a time window.
+
+        List endpoints cannot be filtered on `updated_at`, so every page is
+        read, but only the objects updated within the window and newer than
+        the last version seen are handled.
+
+        Args:
+            since: Start of the window, e.g. when the receiver went down.
+            until: (Optional) End of the window, by default now.
+
+        Returns:
+            The number of objects scanned and missed, of events delivered
+            (queued, for a receiver), skipped by the receiver as unwanted or
+            duplicates, and failed, and of events delivered by name.
+
+        Raises:
+            `RuntimeError`: If the response of a page holds an error.
+        """
+        since = _aware(since)
+        until = datetime.now(UTC) if until is None else _aware(until)
+        report: ReconcileReport = {
+            'scanned': 0,
+            'missed': 0,
+            'delivered': 0,
+            'skipped': 0,
+            'failed': 0,
+            'events': {},
+        }
+        params = {}
+        if self.store_id is not None:
+            params['filter'] = {'store_id': self.store_id}
+        for list_fn, event_name in self.sources.values():
+            async for response in paginate_pages(
+                list_fn,
+                params,
+                page_size=self.page_size,
+                concurrency=self.concurrency,
+            ):
+                records = response['data']['data']
+                if isinstance(records, LazyRecords):
+                    records = records.raw
+                for record in records:
+                    report['scanned'] += 1
+                    attributes = record['attributes']
+                    if not since <= _parse(attributes['updated_at']) < until:
+                        continue
+                    if not self.missed(record):
+                        continue
+                    report['missed'] += 1
+                    created = (
+                        f"{record['type']}:{record['id']}" not in self.state
+                        and since <= _parse(attributes['created_at'])
+                    )
+                    name = event_name(record, created)
+                    payload: WebhookPayload = {
+                        'meta': {
+                            'event_name': name,
+                            'test_mode': attributes.get('test_mode', False),
+                        },
+                        'data': record,
+                    }
+                    if isinstance(self.target, WebhookReceiver):
+                        # Recorded by `track` once handled.
+                        if not await self.target.submit(payload):
+                            report['skipped'] += 1
+                            continue
+                    elif await self.target.dispatch(payload):
+                        report['failed'] += 1
+                        continue
+                    else:
+                        self._see(record)
+                    report['delivered'] += 1
+                    events = report['events']
+                    events[name] = events.get(name, 0) + 1
+        if isinstance(self.target, WebhookReceiver):
+            await self.target.join()
+        return report
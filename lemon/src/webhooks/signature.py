@@ -0,0 +1,117 @@
+import functools
+import hashlib
+import hmac
+
+from collections.abc import Iterable
+
+type Body = bytes | bytearray | memoryview
+
+SIGNATURE_HEADER = 'X-Signature'
+
+
+@functools.lru_cache(maxsize=64)
+def _keyed(secret: bytes) -> 'hmac.HMAC':
+    """HMAC-SHA256 state with `secret` already absorbed.
+
+    Copying it skips hashing the padded key again for every delivery.
+    """
+    return hmac.new(secret, digestmod=hashlib.sha256)
+
+
+def _secret(secret: str | bytes) -> bytes:
+    return secret.encode() if isinstance(secret, str) else bytes(secret)
+
+
+def _digest(signature: str | bytes) -> bytes | None:
+    """The digest encoded in hex by an `X-Signature` header."""
+    if isinstance(signature, bytes):
+        signature = signature.decode('ascii', 'replace')
+    try:
+        digest = bytes.fromhex(signature.strip())
+    except ValueError:
+        return None
+    return digest if len(digest) == hashlib.sha256().digest_size else None
+
+
+def sign(body: Body, secret: str | bytes) -> str:
+    """The `X-Signature` Lemon Squeezy sends with `body` for `secret`."""
+    mac = _keyed(_secret(secret)).copy()
+    mac.update(body)
+    return mac.hexdigest()
+
+
+class SignatureVerifier:
+    """Verify the `X-Signature` header of webhook deliveries.
+
+    The signature is the hex encoded HMAC-SHA256 of the raw request body,
+    keyed with the `secret` of the webhook. The body is hashed as received,
+    including from a `memoryview`, without being decoded or copied, and
+    digests are compared in constant time.
+
+    Several secrets can be active at once so a webhook secret can be rotated
+    without rejecting the deliveries signed with the previous one: add the
+    new secret, update the webhook, then remove the old secret. Secrets are
+    tried in the order they were added.
+    """
+
+    def __init__(self, secrets: str | bytes | Iterable[str | bytes]) -> None:
+        """
+        Args:
+            secrets: The secret of the webhook, or its active secrets.
+        """
+        if isinstance(secrets, (str, bytes)):
+            secrets = [secrets]
+        self._secrets: dict[bytes, hmac.HMAC] = {}
+        for secret in secrets:
+            self.add_secret(secret)
+
+    def add_secret(self, secret: str | bytes) -> None:
+        key = _secret(secret)
+        self._secrets[key] = _keyed(key)
+
+    def remove_secret(self, secret: str | bytes) -> None:
+        self._secrets.pop(_secret(secret), None)
+
+    def verify(self, body: Body, signature: str | bytes | None) -> bool:
+        """Check that `signature` was produced from `body` by an active secret.
+
+        Args:
+            `body`: The raw request body.
+            `signature`: The value of the `X-Signature` header.
+
+        Returns:
+            Whether the signature is valid. Missing or malformed signatures
+            are invalid.
+        """
+        if signature is None:
+            return False
+        expected = _digest(signature)
+        if expected is None:
+            return False
+        for keyed in self._secrets.values():
+            mac = keyed.copy()
+            mac.update(body)
+            if hmac.compare_digest(mac.digest(), expected):
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._secrets)
+
+
+def verify_signature(
+        body: Body,
+        signature: str | bytes | None,
+        secrets: str | bytes | Iterable[str | bytes],
+) -> bool:
+    """Check the `X-Signature` of a webhook delivery.
+
+    Args:
+        `body`: The raw request body.
+        `signature`: The value of the `X-Signature` header.
+        `secrets`: The secret of the webhook, or its active secrets.
+
+    Returns:
+        Whether the signature is valid.
+    """
+    return SignatureVerifier(secrets).verify(body, signature)
@@ -0,0 +1,316 @@
+import asyncio
+import hashlib
+import hmac
+
+from collections.abc import Iterable, Mapping, MutableMapping
+from typing import Any, Literal, NamedTuple
+
+from ..internal.request import paginate
+from .types import Events, NewWebhook
+from .webhook import (
+    create_webhook,
+    delete_webhook,
+    list_webhooks,
+    update_webhook,
+)
+
+type Action = Literal['create', 'update', 'delete']
+
+
+class WebhookChange(NamedTuple):
+    """A mutation needed to bring the webhooks of a store to their spec.
+
+    Attributes:
+        `action`: `'create'`, `'update'` or `'delete'`.
+        `store_id`: The store of the webhook.
+        `url`: The URL of the webhook.
+        `webhook_id`: The webhook updated or deleted.
+        `fields`: The fields that differ, for updates.
+        `spec`: The desired webhook, for creations and updates.
+    """
+    action: Action
+    store_id: str
+    url: str
+    webhook_id: str | None = None
+    fields: tuple[str, ...] = ()
+    spec: NewWebhook | None = None
+
+    def __str__(self) -> str:
+        sign = {'create': '+', 'update': '~', 'delete': '-'}[self.action]
+        target = f" webhook {self.webhook_id}" if self.webhook_id else ''
+        fields = f" ({', '.join(self.fields)})" if self.fields else ''
+        return f"{sign} store {self.store_id}{target} {self.url}{fields}"
+
+
+class WebhookResult(NamedTuple):
+    change: WebhookChange
+    webhook_id: str | None
+    error: Any
+
+
+def fingerprint(secret: str, key: str | bytes) -> str:
+    """Keyed digest of a webhook secret, to detect changes without storing it.
+
+    Args:
+        secret: The webhook secret.
+        key: A key kept locally, apart from the fingerprints, so that they
+        cannot be used to guess the secrets.
+    """
+    if isinstance(key, str):
+        key = key.encode()
+    return hmac.new(key, secret.encode(), hashlib.sha256).hexdigest()
+
+
+def _require_key(
+        secrets: Mapping[str, str] | None,
+        key: str | bytes | None,
+) -> None:
+    if secrets is not None and not key:
+        raise ValueError("A fingerprint key is required to compare secrets")
+
+
+async def _current(store_id: str, concurrency: int) -> list[dict[str, Any]]:
+    return [
+        webhook async for webhook in paginate(
+            list_webhooks,
+            {'filter': {'store_id': store_id}},
+            concurrency=concurrency
+        )
+    ]
+
+
+def _diff(
+        store_id: str,
+        specs: Iterable[NewWebhook],
+        webhooks: list[dict[str, Any]],
+        secrets: Mapping[str, str] | None,
+        key: str | bytes | None,
+        prune: bool,
+) -> list[WebhookChange]:
+    specs = list(specs)
+    wanted = {spec['url'] for spec in specs}
+    by_url: dict[str, dict[str, Any]] = {}
+    changes = []
+    for webhook in webhooks:
+        url = webhook['attributes']['url']
+        if url not in by_url:
+            by_url[url] = webhook
+        elif prune or url in wanted:
+            # Duplicates would deliver every event twice. Those of other
+            # integrations are left to them unless pruning.
+            changes.append(
+                WebhookChange('delete', store_id, url, webhook['id'])
+            )
+
+    for spec in specs:
+        webhook = by_url.pop(spec['url'], None)
+        if webhook is None:
+            changes.append(
+                WebhookChange('create', store_id, spec['url'], spec=spec)
+            )
+            continue
+        fields = []
+        current: list[Events] = webhook['attributes']['events'] or []
+        if set(current) != set(spec['events']):
+            fields.append('events')
+        # The API never returns secrets, so they are compared with the
+        # fingerprint of the last secret set, when known.
+        if secrets is not None and key is not None and (
+            secrets.get(webhook['id']) != fingerprint(spec['secret'], key)
+        ):
+            fields.append('secret')
+        if fields:
+            changes.append(WebhookChange(
+                'update',
+                store_id,
+                spec['url'],
+                webhook['id'],
+                tuple(fields),
+                spec
+            ))
+
+    if prune:
+        changes.extend(
+            WebhookChange('delete', store_id, url, webhook['id'])
+            for url, webhook in by_url.items()
+        )
+    return changes
+
+
+async def plan_webhooks(
+        desired: Mapping[str | int, Iterable[NewWebhook]],
+        secrets: Mapping[str, str] | None = None,
+        key: str | bytes | None = None,
+        prune: bool = False,
+        concurrency: int = 8,
+) -> list[WebhookChange]:
+    """The mutations bringing the webhooks of stores to their spec.
+
+    Webhooks are matched on their URL. The current webhooks of every store
+    are listed concurrently.
+
+    Args:
+        `desired`: The webhooks each store should have.
+        `secrets`: (Optional) Fingerprints of the secrets of the webhooks, by
+        webhook id, as recorded by `apply_webhooks`. Secrets are only
+        compared when given, as the API does not return them.
+        `key`: (Optional) The key of the fingerprints, required with
+        `secrets`.
+        `prune`: (Optional) Delete the webhooks of the stores that are not
+        in their spec, including those of other integrations. Duplicates of
+        a webhook in the spec are always deleted.
+        `concurrency`: (Optional) Maximum number of requests made at once.
+
+    Returns:
+        The changes, grouped by store: creations, updates, then deletions.
+
+    Raises:
+        `RuntimeError`: If listing the webhooks of a store fails.
+        `ValueError`: If `secrets` are given without `key`.
+    """
+    _require_key(secrets, key)
+    order = ('create', 'update', 'delete')
+    semaphore = asyncio.Semaphore(concurrency)
+    stores = [str(store_id) for store_id in desired]
+    specs = [list(specs) for specs in desired.values()]
+
+    async def current(store_id: str) -> list[dict[str, Any]]:
+        async with semaphore:
+            return await _current(store_id, concurrency)
+
+    webhooks = await asyncio.gather(*(current(store) for store in stores))
+    plan = []
+    for store_id, store_specs, store_webhooks in zip(stores, specs, webhooks):
+        changes = _diff(
+            store_id,
+            store_specs,
+            store_webhooks,
+            secrets,
+            key,
+            prune
+        )
+        plan.extend(sorted(
+            changes,
+            key=lambda change: order.index(change.action)
+        ))
+    return plan
+
+
+async def apply_webhooks(
+        plan: Iterable[WebhookChange],
+        secrets: MutableMapping[str, str] | None = None,
+        key: str | bytes | None = None,
+        concurrency: int = 8,
+) -> list[WebhookResult]:
+    """Apply the changes of a plan in parallel.
+
+    Requests go through the configured rate limiter, if any, so a large
+    plan is spread over time instead of being rejected by the API.
+
+    Args:
+        `plan`: The changes, as returned by `plan_webhooks`.
+        `secrets`: (Optional) Fingerprints of the secrets of the webhooks,
+        updated with the secrets set and the webhooks deleted.
+        `key`: (Optional) The key of the fingerprints, required with
+        `secrets`.
+        `concurrency`: (Optional) Maximum number of requests made at once.
+
+    Returns:
+        The result of each change, in plan order, with the id of the webhook
+        created, updated or deleted, and the error of the response, if any.
+
+    Raises:
+        `ValueError`: If `secrets` are given without `key`.
+    """
+    _require_key(secrets, key)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def apply(change: WebhookChange) -> WebhookResult:
+        async with semaphore:
+            match change.action:
+                case 'create':
+                    assert change.spec is not None
+                    response = await create_webhook(
+                        change.store_id,
+                        change.spec
+                    )
+                case 'update':
+                    assert change.spec is not None
+                    response = await update_webhook(
+                        str(change.webhook_id),
+                        {
+                            'url': change.spec['url'],
+                            'events': change.spec['events'],
+                            'secret': change.spec['secret'],
+                        }
+                    )
+                case 'delete':
+                    response = await delete_webhook(str(change.webhook_id))
+        error = response['error']
+        webhook_id = change.webhook_id
+        if error is None and change.action == 'create':
+            webhook_id = response['data']['data']['id']
+        if error is None and secrets is not None and webhook_id is not None:
+            if change.spec is not None:
+                assert key is not None
+                secrets[webhook_id] = fingerprint(change.spec['secret'], key)
+            else:
+                secrets.pop(webhook_id, None)
+        return WebhookResult(change, webhook_id, error)
+
+    return list(await asyncio.gather(*(apply(change) for change in plan)))
+
+
+async def sync_webhooks(
+        desired: Mapping[str | int, Iterable[NewWebhook]],
+        secrets: MutableMapping[str, str] | None = None,
+        key: str | bytes | None = None,
+        prune: bool = False,
+        dry_run: bool = False,
+        concurrency: int = 8,
+) -> tuple[list[WebhookChange], list[WebhookResult]]:
+    """Bring the webhooks of stores to their spec.
+
+    Lists the webhooks of every store concurrently, computes the minimal
+    changes on their URL, events and secret, and applies them in parallel::
+
+        plan, results = await sync_webhooks({
+            store_id: [{'url': url, 'events': events, 'secret': secret}]
+            for store_id in store_ids
+        }, dry_run=True)
+        print(*plan, sep='\\n')
+
+    Args:
+        `desired`: The webhooks each store should have.
+        `secrets`: (Optional) Fingerprints of the secrets of the webhooks, by
+        webhook id, e.g. a `shelve`. Secrets are only compared, and the
+        fingerprints kept up to date, when given.
+        `key`: (Optional) The key of the fingerprints, required with
+        `secrets`. Keep it apart from them, e.g. in the environment.
+        `prune`: (Optional) Delete the webhooks that are not in the spec,
+        including those of other integrations.
+        `dry_run`: (Optional) Only compute the plan.
+        `concurrency`: (Optional) Maximum number of requests made at once.
+
+    Returns:
+        The plan and the results of its changes, none for a dry run.
+
+    Raises:
+        `RuntimeError`: If listing the webhooks of a store fails.
+        `ValueError`: If `secrets` are given without `key`.
+    """
+    plan = await plan_webhooks(
+        desired,
+        secrets,
+        key,
+        prune=prune,
+        concurrency=concurrency
+    )
+    if dry_run:
+        return plan, []
+    return plan, await apply_webhooks(
+        plan,
+        secrets,
+        key,
+        concurrency=concurrency
+    )
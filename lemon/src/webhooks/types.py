@@ -7,6 +7,7 @@ from ..types.response import (
     MetaPage,
     Params,
     Pick,
+    compact_record,
 )
 
 type Events = Literal[
@@ -27,6 +28,18 @@ type Events = Literal[
     "license_key_updated",
 ]
 
+class EventMeta(TypedDict):
+    # Any name is valid so that events added to the API after this release
+    # can be acknowledged, see `Events` for those the SDK knows.
+    event_name: str
+    test_mode: bool
+    webhook_id: NotRequired[str]
+    custom_data: NotRequired[dict[str, Any]]
+
+class WebhookPayload(TypedDict):
+    meta: EventMeta
+    data: dict[str, Any]
+
 class StoreId(TypedDict, total=False):
     store_id: int | str
 
@@ -91,4 +104,6 @@ class ListWebhooks(
         Data[dict[str, Any], Any]
     ]
 ):
-    pass
\ No newline at end of file
+    pass
+
+WebhookRecord = compact_record('WebhookRecord', 'webhooks', Attributes)
@@ -0,0 +1,127 @@
+import unittest
+
+from src.analytics import Categorical, columns
+from src.internal.request import FetchResponse
+from src.prices.types import Attributes as PriceAttributes
+from src.subscriptions.types import (
+    Attributes as SubscriptionAttributes,
+    LazyListSubscriptions,
+    SubscriptionRecord,
+)
+
+from .. import samples
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestColumns(unittest.TestCase):
+    """Test the conversion of list responses into NumPy columns."""
+
+    def setUp(self) -> None:
+        self.pages = [
+            samples.response(samples.page('subscriptions', [
+                samples.subscription(1),
+                samples.subscription(
+                    2,
+                    status='cancelled',
+                    card_brand=None,
+                    ends_at='2024-03-01T00:00:00.000000Z',
+                ),
+            ])),
+            samples.response(samples.page('subscriptions', [
+                samples.subscription(3, status='past_due'),
+            ], number=2, last=2)),
+        ]
+
+    def test_subscription_columns(self):
+        """Columns should be typed after the resource attributes."""
+        result = columns(
+            self.pages,
+            SubscriptionAttributes,
+            ['id', 'status', 'card_brand', 'renews_at', 'ends_at',
+             'cancelled', 'first_subscription_item.price_id', 'user_email'],
+        )
+        np.testing.assert_array_equal(result['id'], [1, 2, 3])
+        self.assertEqual(result['id'].dtype, np.int64)
+
+        status = result['status']
+        self.assertIsInstance(status, Categorical)
+        self.assertEqual(
+            status.decode().tolist(),
+            ['active', 'cancelled', 'past_due']
+        )
+        self.assertEqual(status.counts()['active'], 1)
+        np.testing.assert_array_equal(
+            status.mask('cancelled', 'past_due'),
+            [False, True, True]
+        )
+        self.assertEqual(result['card_brand'].codes[1], -1)
+
+        self.assertEqual(result['renews_at'].dtype, np.dtype('datetime64[us]'))
+        self.assertTrue(np.isnat(result['ends_at'][0]))
+        self.assertEqual(
+            result['ends_at'][1],
+            np.datetime64('2024-03-01T00:00:00')
+        )
+        self.assertEqual(result['cancelled'].dtype, np.bool_)
+        np.testing.assert_array_equal(
+            result['first_subscription_item.price_id'],
+            [30, 30, 30]
+        )
+        self.assertEqual(result['user_email'][2], 'user3@example.com')
+
+    def test_nullable_integers_are_masked(self):
+        """Nullable integer attributes should become masked arrays."""
+        prices = [
+            samples.price(1, unit_price=1000, min_price=None),
+            samples.price(2, unit_price=2500, min_price=500),
+        ]
+        result = columns(prices, PriceAttributes, ['unit_price', 'min_price'])
+        self.assertEqual(result['unit_price'].sum(), 3500)
+        self.assertEqual(result['min_price'].dtype, np.int64)
+        self.assertTrue(result['min_price'].mask[0])
+        self.assertEqual(result['min_price'].sum(), 500)
+
+    def test_nullable_booleans_are_masked(self):
+        """Nullable boolean attributes should not read `None` as `False`."""
+        prices = [
+            samples.price(1, setup_fee_enabled=None),
+            samples.price(2, setup_fee_enabled=False),
+            samples.price(3, setup_fee_enabled=True),
+        ]
+        result = columns(prices, PriceAttributes, ['setup_fee_enabled'])
+        column = result['setup_fee_enabled']
+        self.assertEqual(column.dtype, np.bool_)
+        self.assertEqual(list(column.mask), [True, False, False])
+        self.assertEqual(column.count(), 2)
+
+    def test_error_responses(self):
+        """An error response should give empty columns."""
+        response = {'status_code': 404, 'data': None, 'error': 'Not Found'}
+        result = columns(
+            [response, self.pages[0]], SubscriptionAttributes, ['id']
+        )
+        self.assertEqual(len(result['id']), 2)
+
+    def test_other_record_sources(self):
+        """Lazy and compact records should give the same columns."""
+        lazy = FetchResponse[LazyListSubscriptions](
+            **self.pages[0]
+        ).model_dump()
+        compact = SubscriptionRecord.from_iterable(
+            self.pages[0]['data']['data']
+        )
+        for source in (lazy, compact):
+            result = columns(source, SubscriptionAttributes, ['status'])
+            np.testing.assert_array_equal(result['status'].codes, [1, 6])
+
+    def test_unknown_field(self):
+        """Fields that are not attributes should be rejected."""
+        with self.assertRaises(KeyError):
+            columns(self.pages, SubscriptionAttributes, ['unknown'])
+        with self.assertRaises(KeyError):
+            columns(self.pages, SubscriptionAttributes, ['status.value'])
@@ -0,0 +1,116 @@
+import unittest
+
+from src.analytics import revenue, revenue_movements, subscription_mrr
+
+from .. import samples
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def subscription(id: int, price_id: int, quantity: int = 1, **attributes):
+    record = samples.subscription(id, **attributes)
+    record['attributes']['first_subscription_item'] = {
+        **record['attributes']['first_subscription_item'],
+        'price_id': price_id,
+        'quantity': quantity,
+    }
+    return record
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestRevenue(unittest.TestCase):
+    """Test the computation of recurring revenue metrics."""
+
+    def setUp(self) -> None:
+        self.prices = [
+            samples.price(1, unit_price=1000),
+            samples.price(
+                2, unit_price=12000, renewal_interval_unit='year'
+            ),
+            samples.price(
+                3, scheme='package', unit_price=500, package_size=10
+            ),
+            samples.price(4, scheme='graduated', tiers=[
+                {'last_unit': 2, 'unit_price': 1000, 'unit_price_decimal': None},
+                {'last_unit': 'inf', 'unit_price': 500,
+                 'unit_price_decimal': None},
+            ]),
+            samples.price(5, scheme='volume', tiers=[
+                {'last_unit': 2, 'unit_price': 1000, 'unit_price_decimal': None},
+                {'last_unit': 'inf', 'unit_price': 500,
+                 'unit_price_decimal': None, 'fixed_fee': 100},
+            ]),
+            samples.price(
+                6, unit_price=300, renewal_interval_unit='week',
+                renewal_interval_quantity=2
+            ),
+        ]
+        self.subscriptions = [
+            subscription(1, 1, quantity=2),
+            subscription(2, 2, product_id=11),
+            subscription(3, 3, quantity=25, product_id=11),
+            subscription(4, 4, quantity=5),
+            subscription(5, 5, quantity=5),
+            subscription(6, 6),
+            subscription(7, 1, status='cancelled'),
+            subscription(8, 99),
+        ]
+
+    def test_subscription_mrr(self):
+        """Charges should follow the scheme and be normalised to months."""
+        mrr = subscription_mrr(self.subscriptions, self.prices)
+        np.testing.assert_allclose(mrr['mrr'], [
+            2000,               # 2 units at 10.00
+            1000,               # 120.00 a year
+            1500,               # 3 packages of 10 units at 5.00
+            2 * 1000 + 3 * 500, # graduated tiers
+            5 * 500 + 100,      # every unit at the price of its tier
+            300 / (2 * 12 / 52),
+            0,                  # cancelled
+            0,                  # unknown price
+        ])
+        self.assertEqual(
+            mrr['priced'].tolist(), [True] * 7 + [False]
+        )
+
+    def test_revenue_by_product(self):
+        """MRR and ARR should be summed per group."""
+        totals = revenue(self.subscriptions, self.prices, by='product_id')
+        self.assertEqual(totals['product_id'].tolist(), [10, 11])
+        self.assertEqual(totals['subscriptions'].tolist(), [4, 2])
+        np.testing.assert_allclose(totals['mrr'][1], 2500)
+        np.testing.assert_allclose(totals['arr'], totals['mrr'] * 12)
+        by_status = revenue(self.subscriptions, self.prices, by='status')
+        self.assertEqual(by_status['status'].tolist(), ['active', 'cancelled'])
+        self.assertEqual(by_status['mrr'][1], 0)
+
+    def test_movements(self):
+        """Changes between snapshots should be classified per subscription."""
+        before = [
+            subscription(1, 1, quantity=2),
+            subscription(2, 1, quantity=2),
+            subscription(3, 1, quantity=2),
+            subscription(4, 1, quantity=1, product_id=11),
+        ]
+        after = [
+            subscription(1, 1, quantity=3),
+            subscription(2, 1, quantity=1),
+            subscription(3, 1, quantity=2, status='cancelled'),
+            subscription(4, 1, quantity=1, product_id=11),
+            subscription(5, 1, quantity=1, product_id=11),
+        ]
+        moves = revenue_movements(before, after, self.prices)
+        self.assertEqual(moves['product_id'].tolist(), [10, 11])
+        self.assertEqual(moves['new'].tolist(), [0, 1000])
+        self.assertEqual(moves['expansion'].tolist(), [1000, 0])
+        self.assertEqual(moves['contraction'].tolist(), [1000, 0])
+        self.assertEqual(moves['churn'].tolist(), [2000, 0])
+        self.assertEqual(moves['churned'].tolist(), [1, 0])
+        self.assertEqual(moves['net_new'].tolist(), [-2000, 1000])
+        np.testing.assert_allclose(moves['churn_rate'], [2000 / 6000, 0])
+        np.testing.assert_allclose(
+            moves['mrr_after'] - moves['mrr_before'], moves['net_new']
+        )
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from unittest.mock import patch
+
+from src.catalog import Catalog
+
+from .. import samples
+
+
+class FakeAPI:
+    """Serve the products, variants and prices of two stores."""
+
+    def __init__(self) -> None:
+        self.products = [
+            samples.product(i, store_id=1 if i < 4 else 2)
+            for i in range(1, 6)
+        ]
+        self.variants = [
+            samples.variant(20 + i, product_id=i) for i in range(1, 6)
+        ]
+        self.prices = [
+            samples.price(30 + i, variant_id=20 + i) for i in range(1, 6)
+        ]
+        self.calls: list[str] = []
+
+    async def list_products(self, params: dict = {}, lazy: bool = False):
+        self.calls.append('products')
+        store = params.get('filter', {}).get('store_id')
+        products = [
+            product for product in self.products
+            if store is None or str(product['attributes']['store_id']) == store
+        ]
+        ids = {int(product['id']) for product in products}
+        included = [
+            variant for variant in self.variants
+            if variant['attributes']['product_id'] in ids
+        ]
+        return self._page('products', products, params, included)
+
+    async def list_prices(self, params: dict = {}):
+        self.calls.append('prices')
+        return self._page('prices', self.prices, params)
+
+    def _page(self, resource, records, params, included=None):
+        number, size = params['page']['number'], params['page']['size']
+        last = max(1, -(-len(records) // size))
+        start = (number - 1) * size
+        return samples.response(samples.page(
+            resource,
+            records[start:start + size],
+            number,
+            last,
+            size,
+            included=included
+        ))
+
+    def patch(self):
+        return patch.multiple(
+            'src.catalog.catalog',
+            list_products=self.list_products,
+            list_prices=self.list_prices
+        )
+
+
+class TestCatalog(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `Catalog` class."""
+
+    async def asyncSetUp(self) -> None:
+        self.api = FakeAPI()
+        with self.api.patch():
+            self.catalog = await Catalog.load(store_id=1, page_size=2)
+
+    def test_indexes(self):
+        """Records of the store should be reachable through every index."""
+        self.assertEqual(self.catalog.product(1)['id'], '1')
+        self.assertEqual(self.catalog.product_by_slug('product-2')['id'], '2')
+        self.assertEqual(
+            [p['id'] for p in self.catalog.products_for_store(1)],
+            ['1', '2', '3']
+        )
+        self.assertIsNone(self.catalog.product(4))
+
+    def test_variant_chain(self):
+        """A variant should resolve to its product, price and store."""
+        self.assertEqual(self.catalog.product_for_variant(22)['id'], '2')
+        self.assertEqual(self.catalog.price_for_variant(22)['id'], '32')
+        self.assertEqual(self.catalog.store_for_variant('22'), '1')
+        self.assertIsNone(self.catalog.price_for_variant(24))
+
+    def test_prices_newest_first(self):
+        """The prices of a variant should be ordered newest first."""
+        catalog = Catalog(prices=[
+            samples.price(1, variant_id=5, created_at='2024-01-12T10:00:00Z'),
+            samples.price(2, variant_id=5, created_at='2024-03-12T10:00:00Z'),
+            samples.price(3, variant_id=5, created_at='2024-02-12T10:00:00Z'),
+        ])
+        self.assertEqual(
+            [p['id'] for p in catalog.prices_for_variant(5)], ['2', '3', '1']
+        )
+        self.assertEqual(catalog.price_for_variant('5')['id'], '2')
+
+    async def test_snapshot_round_trip(self):
+        """A saved snapshot should load into an identical catalog."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalog.json')
+            self.catalog.save(path)
+            loaded = Catalog.open(path)
+        self.assertEqual(len(loaded), len(self.catalog))
+        self.assertEqual(loaded.store_id, '1')
+        self.assertEqual(loaded.product_for_variant(23), self.catalog.product(3))
+
+    async def test_refresh_keeps_unchanged_records(self):
+        """A refresh should only swap in the records that changed."""
+        unchanged = self.catalog.product(1)
+        self.api.products[1] = samples.product(2, name='Renamed', store_id=1)
+        del self.api.prices[2]
+        with self.api.patch():
+            changed = await self.catalog.refresh(page_size=2)
+        self.assertEqual(changed, 2)
+        self.assertIs(self.catalog.product(1), unchanged)
+        self.assertEqual(
+            self.catalog.product(2)['attributes']['name'], 'Renamed'
+        )
+        self.assertIsNone(self.catalog.price(33))
+
+    async def test_background_refresh_survives_errors(self):
+        """A failed background refresh should be logged, then retried."""
+        calls = []
+
+        async def refresh():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise KeyError('attributes')
+            return 0
+
+        with patch.object(self.catalog, 'refresh', refresh):
+            with self.assertLogs('src.catalog.catalog', 'ERROR'):
+                task = self.catalog.start_refresh(interval=0.001)
+                while len(calls) < 2:
+                    await asyncio.sleep(0.001)
+            task.cancel()
+
+    def test_unsupported_snapshot(self):
+        """Opening a file that is not a snapshot should raise."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalog.json')
+            with open(path, 'w') as file:
+                file.write('{"version": 0}')
+            with self.assertRaises(ValueError):
+                Catalog.open(path)
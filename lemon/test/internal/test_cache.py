@@ -0,0 +1,319 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from unittest.mock import patch
+
+import httpx
+
+from src.internal.request import (
+    FetchOptions,
+    ResponseCache,
+    SQLiteBackend,
+    cache_key,
+    fetch,
+)
+from src.internal.request.make_request import HTTPVerbEnum
+from src.internal.setup import lemon_squeezy_setup, Config
+from src.internal.utils import clear_kv
+from src.products import get_product, list_products
+
+from .. import samples
+from ..samples import MockAPI
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the response cache."""
+
+    def setUp(self) -> None:
+        self.api = MockAPI()
+        self.cache = ResponseCache(ttl={'products': 60})
+        lemon_squeezy_setup(Config(api_key='key', cache=self.cache))
+
+    def tearDown(self) -> None:
+        clear_kv()
+
+    async def test_get_served_from_cache(self):
+        """Repeated `GET` requests should only reach the API once."""
+        with self.api.patch():
+            first = await get_product(1)
+            second = await get_product(1)
+            await get_product(2)
+
+        self.assertEqual(first, second)
+        self.assertEqual(second['data']['data']['id'], '1')
+        self.assertEqual(len(self.api.requests), 2)
+        stats = await self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['entries'], 2)
+        self.assertGreater(stats['bytes'], 0)
+
+    async def test_params_are_part_of_the_key(self):
+        """Different queries should be cached separately."""
+        with self.api.patch():
+            await list_products({'filter': {'store_id': 1}})
+            await list_products({'filter': {'store_id': 2}})
+            await list_products({'filter': {'store_id': 1}})
+        self.assertEqual(len(self.api.requests), 2)
+
+    async def test_uncached_resources(self):
+        """Resources without a time to live should not be cached."""
+        with self.api.patch():
+            await fetch(FetchOptions(path='/v1/subscriptions/1'))
+            await fetch(FetchOptions(path='/v1/subscriptions/1'))
+        self.assertEqual(len(self.api.requests), 2)
+        self.assertEqual(len(self.cache), 0)
+        with patch.object(self.cache.backend, 'get') as get:
+            await self.cache.lookup('/v1/subscriptions/1')
+        get.assert_not_called()
+
+    async def test_responses_are_copies(self):
+        """Modifying a response should not modify the cached one."""
+        with self.api.patch():
+            first = await get_product(1)
+            first['data']['data']['attributes']['name'] = 'Changed'
+            second = await get_product(1)
+            second['data']['data']['id'] = '2'
+            third = await get_product(1)
+        self.assertNotEqual(
+            third['data']['data']['attributes']['name'], 'Changed'
+        )
+        self.assertEqual(third['data']['data']['id'], '1')
+
+    async def test_expired_entries(self):
+        """Expired entries should be fetched again."""
+        with self.api.patch():
+            await get_product(1)
+            with patch('time.time', return_value=2**40):
+                await get_product(1)
+        self.assertEqual(len(self.api.requests), 2)
+        self.assertEqual((await self.cache.stats())['expirations'], 1)
+
+    async def test_mutations_invalidate(self):
+        """A mutation should evict the object and the list queries."""
+        with self.api.patch():
+            await get_product(1)
+            await get_product(2)
+            await list_products()
+            await fetch(FetchOptions(
+                path='/v1/products/1',
+                method=HTTPVerbEnum.DELETE
+            ))
+        self.assertEqual(self.cache.backend.keys(), ['/v1/products/2'])
+
+    async def test_lru_eviction(self):
+        """The least recently used entries should be evicted first."""
+        cache = ResponseCache(default_ttl=60, max_entries=2, max_bytes=100)
+        await cache.set('/v1/prices/1', {'data': 1}, 10)
+        await cache.set('/v1/prices/2', {'data': 2}, 10)
+        await cache.get('/v1/prices/1')
+        await cache.set('/v1/prices/3', {'data': 3}, 10)
+        self.assertEqual(cache.backend.keys(), ['/v1/prices/1', '/v1/prices/3'])
+
+        await cache.set('/v1/prices/4', {'data': 4}, 95)
+        self.assertEqual(cache.backend.keys(), ['/v1/prices/4'])
+        self.assertEqual((await cache.stats())['evictions'], 3)
+
+        await cache.set('/v1/prices/5', {'data': 5}, 101)
+        self.assertIsNone(await cache.get('/v1/prices/5'))
+
+    async def test_explicit_invalidation(self):
+        """Entries should be evicted by key or by resource."""
+        cache = ResponseCache(default_ttl=60)
+        for key in ('/v1/prices/1', '/v1/prices?page%5Bnumber%5D=1', '/v1/products/1'):
+            await cache.set(key, {}, 1)
+        self.assertEqual(await cache.invalidate(key='/v1/products/1'), 1)
+        self.assertEqual(await cache.invalidate(resource='prices'), 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_cache_key(self):
+        """Keys should not depend on the order of the params."""
+        self.assertEqual(
+            cache_key('/v1/prices', {'b': '2', 'a': '1', 'c': None}),
+            cache_key('/v1/prices', {'a': '1', 'b': '2'}),
+        )
+        self.assertEqual(cache_key('/v1/prices/1', {}), '/v1/prices/1')
+
+
+class TestStaleWhileRevalidate(unittest.IsolatedAsyncioTestCase):
+    """Test serving stale responses while they are refreshed."""
+
+    def setUp(self) -> None:
+        self.api = MockAPI()
+        self.cache = ResponseCache(
+            ttl={'products': 10},
+            stale_while_revalidate=20,
+            max_stale=60,
+        )
+        lemon_squeezy_setup(Config(api_key='key', cache=self.cache))
+
+    def tearDown(self) -> None:
+        clear_kv()
+
+    async def test_stale_entry_served_and_refreshed_once(self):
+        """Stale entries should be served with a single background refresh."""
+        with self.api.patch(), patch('time.time', return_value=1000):
+            await get_product(1)
+        self.assertEqual(len(self.api.requests), 1)
+
+        with self.api.patch(), patch('time.time', return_value=1015):
+            responses = [await get_product(1) for _ in range(3)]
+            self.assertEqual(len(self.api.requests), 1)
+            self.assertEqual(len(self.cache._refreshing), 1)
+            await asyncio.gather(*self.cache._refreshing.values())
+
+        self.assertEqual(responses[0]['data']['data']['id'], '1')
+        self.assertEqual(len(self.api.requests), 2)
+        stats = await self.cache.stats()
+        self.assertEqual((stats['stale_hits'], stats['revalidations']), (3, 1))
+        self.assertEqual(self.cache.backend._entries['/v1/products/1'].stored_at, 1015)
+
+    async def test_failed_refresh_is_logged(self):
+        """A failed background refresh should be logged and the entry kept."""
+        with self.api.patch(), patch('time.time', return_value=1000):
+            await get_product(1)
+
+        async def refresh():
+            raise httpx.ConnectError('unreachable')
+
+        with self.assertLogs('src.internal.request.cache', 'ERROR'):
+            await self.cache.revalidate('/v1/products/1', refresh)
+        self.assertEqual(len(self.cache), 1)
+
+    async def test_fetch_beyond_grace_window(self):
+        """Entries past the grace window should be fetched synchronously."""
+        with self.api.patch(), patch('time.time', return_value=1000):
+            await get_product(1)
+        with self.api.patch(), patch('time.time', return_value=1031):
+            await get_product(1)
+            self.assertEqual(len(self.cache._refreshing), 0)
+        self.assertEqual(len(self.api.requests), 2)
+        self.assertEqual((await self.cache.stats())['stale_hits'], 0)
+
+    async def test_max_stale(self):
+        """Entries older than `max_stale` should never be served."""
+        cache = ResponseCache(
+            default_ttl=10,
+            stale_while_revalidate=100,
+            max_stale=30
+        )
+        with patch('time.time', return_value=1000):
+            await cache.set('/v1/prices/1', {'data': 1}, 1)
+        with patch('time.time', return_value=1020):
+            self.assertEqual(await cache.lookup('/v1/prices/1'), ({'data': 1}, True))
+        with patch('time.time', return_value=1031):
+            self.assertEqual(await cache.lookup('/v1/prices/1'), (None, False))
+
+    async def test_failed_refresh_keeps_entry(self):
+        """A failed refresh should leave the stale entry in place."""
+        cache = ResponseCache(default_ttl=10, stale_while_revalidate=100)
+        with patch('time.time', return_value=1000):
+            await cache.set('/v1/prices/1', {'data': 1, 'error': None}, 1)
+
+        async def failing():
+            raise httpx.ConnectError('offline')
+
+        with patch('time.time', return_value=1020):
+            await cache.revalidate('/v1/prices/1', failing)
+            self.assertEqual((await cache.get('/v1/prices/1'))['data'], 1)
+
+
+class TestSQLiteBackend(unittest.IsolatedAsyncioTestCase):
+    """Test the SQLite backend shared between caches."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.db')
+        self.backends: list[SQLiteBackend] = []
+
+    def tearDown(self) -> None:
+        for backend in self.backends:
+            backend.close()
+        self.directory.cleanup()
+
+    def backend(self, **kwargs) -> SQLiteBackend:
+        backend = SQLiteBackend(self.path, **kwargs)
+        self.backends.append(backend)
+        return backend
+
+    async def test_entries_shared_between_caches(self):
+        """A response cached by one worker should be served to another."""
+        first = ResponseCache(default_ttl=60, backend=self.backend())
+        second = ResponseCache(default_ttl=60, backend=self.backend())
+        body = samples.page('products', [samples.product(i) for i in range(20)])
+
+        await first.set('/v1/products', samples.response(body), 4096)
+        cached = await second.get('/v1/products')
+        self.assertEqual(cached, samples.response(body))
+        self.assertEqual((await second.stats())['hits'], 1)
+        self.assertEqual(len(second), 1)
+        self.assertLess((await second.stats())['bytes'], len(json.dumps(body)))
+
+        await second.invalidate(resource='products', id=3)
+        self.assertIsNone(await first.get('/v1/products'))
+
+    async def test_wal_mode(self):
+        """The database should be in WAL mode."""
+        backend = self.backend()
+        mode, = backend._db.execute("PRAGMA journal_mode").fetchone()
+        self.assertEqual(mode, 'wal')
+
+    async def test_lru_eviction(self):
+        """The least recently used entries should be evicted first."""
+        cache = ResponseCache(
+            default_ttl=60,
+            backend=self.backend(max_entries=2, touch_interval=0)
+        )
+        with patch('time.time', return_value=1000):
+            await cache.set('/v1/prices/1', {'data': 1}, 1)
+        with patch('time.time', return_value=1001):
+            await cache.set('/v1/prices/2', {'data': 2}, 1)
+        with patch('time.time', return_value=1002):
+            await cache.get('/v1/prices/1')
+        with patch('time.time', return_value=1003):
+            await cache.set('/v1/prices/3', {'data': 3}, 1)
+        self.assertEqual(cache.backend.keys(), ['/v1/prices/1', '/v1/prices/3'])
+        self.assertEqual((await cache.stats())['evictions'], 1)
+
+    async def test_expired_entries(self):
+        """Expired entries should be dropped and purgeable."""
+        backend = self.backend()
+        cache = ResponseCache(default_ttl=10, backend=backend)
+        with patch('time.time', return_value=1000):
+            await cache.set('/v1/prices/1', {'data': 1}, 1)
+            await cache.set('/v1/prices/2', {'data': 2}, 1)
+        with patch('time.time', return_value=1020):
+            self.assertIsNone(await cache.get('/v1/prices/1'))
+            self.assertEqual(backend.purge(), 1)
+        self.assertEqual(len(backend), 0)
+
+    async def test_calls_leave_the_event_loop(self):
+        """Backend calls should run in a thread, not on the event loop."""
+        backend = self.backend()
+        cache = ResponseCache(default_ttl=60, backend=backend)
+        threads = []
+        get = backend.get
+
+        def record_thread(key):
+            threads.append(threading.current_thread())
+            return get(key)
+
+        with patch.object(backend, 'get', record_thread):
+            await cache.get('/v1/prices/1')
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    async def test_backend_size_limit(self):
+        """The size limit of the backend should apply, not the default."""
+        cache = ResponseCache(
+            default_ttl=60,
+            max_bytes=10,
+            backend=self.backend(max_bytes=2**20)
+        )
+        await cache.set('/v1/prices/1', {'data': 1}, 4096)
+        self.assertEqual(len(cache), 1)
+        await cache.set('/v1/prices/2', {'data': 2}, 2**21)
+        self.assertEqual(len(cache), 1)
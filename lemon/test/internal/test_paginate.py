@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+
+from src.internal.request import paginate, paginate_pages
+from src.internal.utils import Error
+from src.subscriptions.types import SubscriptionRecord
+
+from .. import samples
+
+
+def list_fn(total: int, size_limit: int = 100, calls: list | None = None):
+    """Fake list function serving `total` subscriptions."""
+    async def list_subscriptions(params: dict = {}):
+        number = params['page']['number']
+        size = min(params['page']['size'], size_limit)
+        if calls is not None:
+            calls.append(number)
+        await asyncio.sleep(0.001 * (number % 3))
+        last = max(1, -(-total // size))
+        start = (number - 1) * size
+        records = [
+            samples.subscription(i)
+            for i in range(start + 1, min(start + size, total) + 1)
+        ]
+        return samples.response(
+            samples.page('subscriptions', records, number, last, size)
+        )
+    return list_subscriptions
+
+
+class TestPaginate(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `paginate` helpers."""
+
+    async def test_pages_are_yielded_in_order(self):
+        """Pages should be yielded in order whatever order they complete in."""
+        calls = []
+        numbers = [
+            response['data']['meta']['page']['currentPage']
+            async for response in paginate_pages(
+                list_fn(95, calls=calls), page_size=10, concurrency=3
+            )
+        ]
+        self.assertEqual(numbers, list(range(1, 11)))
+        self.assertEqual(sorted(calls), list(range(1, 11)))
+
+    async def test_records(self):
+        """Every record should be yielded once."""
+        ids = [
+            record['id']
+            async for record in paginate(list_fn(25), page_size=10)
+        ]
+        self.assertEqual(ids, [str(i) for i in range(1, 26)])
+
+    async def test_compact_records(self):
+        """Records should be converted into the requested record class."""
+        records = [
+            record async for record in paginate(
+                list_fn(12), record=SubscriptionRecord, page_size=5
+            )
+        ]
+        self.assertEqual(len(records), 12)
+        self.assertIsInstance(records[0], SubscriptionRecord)
+        self.assertEqual(records[-1].user_email, 'user12@example.com')
+
+    async def test_error_is_raised(self):
+        """An erroneous page should stop the iteration."""
+        async def failing(params: dict = {}):
+            return {'status_code': 500, 'data': None, 'error': Error('boom')}
+
+        with self.assertRaises(RuntimeError):
+            async for _ in paginate(failing):
+                pass
@@ -0,0 +1,79 @@
+import asyncio
+import time
+import unittest
+
+from unittest.mock import patch
+
+import httpx
+
+from src.internal.request import FetchOptions, RateLimiter, fetch
+from src.internal.request.make_request import _retry_after
+from src.internal.setup import Config, lemon_squeezy_setup
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `RateLimiter` class."""
+
+    async def test_burst_then_rate(self):
+        """Requests past the burst should be spaced out to the rate."""
+        limiter = RateLimiter(rate=100, period=1, burst=5)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(10)))
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.045)
+        self.assertLess(elapsed, 0.5)
+        stats = limiter.stats()
+        self.assertEqual(stats['requests'], 10)
+        self.assertGreater(stats['waits'], 0)
+
+    async def test_pause(self):
+        """Pauses should hold every request."""
+        limiter = RateLimiter()
+        limiter.pause(0.05)
+        start = time.monotonic()
+        await limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+
+    def test_event_loops(self):
+        """A limiter should be usable from successive event loops."""
+        limiter = RateLimiter(rate=100, period=1, burst=1)
+
+        async def requests():
+            await asyncio.gather(limiter.acquire(), limiter.acquire())
+
+        asyncio.run(requests())
+        asyncio.run(requests())
+        self.assertEqual(limiter.stats()['requests'], 4)
+
+    def test_retry_after(self):
+        """Retry-After headers should be read as seconds or as a date."""
+        self.assertEqual(_retry_after('12'), 12)
+        self.assertEqual(_retry_after(None), 60)
+        self.assertEqual(_retry_after('soon'), 60)
+        self.assertEqual(_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        later = time.strftime(
+            '%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 30)
+        )
+        self.assertAlmostEqual(_retry_after(later), 30, delta=2)
+
+    async def test_fetch(self):
+        """Every request should wait for the limiter, 429s pausing it."""
+        limiter = RateLimiter(rate=100, period=1, burst=1)
+        lemon_squeezy_setup(Config(api_key='key', rate_limiter=limiter))
+        transport = httpx.MockTransport(lambda request: httpx.Response(
+            429, json={'errors': [{'detail': 'Too Many Attempts.'}]},
+            headers={'Retry-After': '0.05'}
+        ))
+        client = httpx.AsyncClient
+        with patch(
+            'httpx.AsyncClient',
+            lambda **kwargs: client(transport=transport, **kwargs)
+        ):
+            start = time.monotonic()
+            first = await fetch(FetchOptions(path='/v1/users/me'))
+            await fetch(FetchOptions(path='/v1/users/me'))
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+        self.assertEqual(first['status_code'], 429)
+        self.assertEqual(limiter.stats()['requests'], 2)
+        self.assertEqual(limiter.stats()['pauses'], 2)
+        lemon_squeezy_setup(Config())
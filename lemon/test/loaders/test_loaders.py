@@ -0,0 +1,182 @@
+import asyncio
+import unittest
+
+from unittest.mock import patch
+
+from src.internal.request import Loader
+from src.loaders import Loaders
+
+from .. import samples
+
+
+class TestLoader(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `Loader` class."""
+
+    async def asyncSetUp(self) -> None:
+        self.calls: list[list[str]] = []
+
+        async def batch(keys):
+            self.calls.append(keys)
+            return {key: key.upper() for key in keys if key != 'missing'}
+        self.loader = Loader(batch, key=str)
+
+    async def test_same_tick_lookups_are_batched(self):
+        """Lookups made in the same tick should share one deduplicated call."""
+        values = await asyncio.gather(
+            self.loader.load('a'),
+            self.loader.load('b'),
+            self.loader.load('a'),
+            self.loader.load('missing'),
+        )
+        self.assertEqual(values, ['A', 'B', 'A', None])
+        self.assertEqual(self.calls, [['a', 'b', 'missing']])
+
+    async def test_values_are_memoized(self):
+        """A key should only be requested once per loader."""
+        await self.loader.load('a')
+        self.assertEqual(await self.loader.load_many(['a', 'b']), ['A', 'B'])
+        self.assertEqual(self.calls, [['a'], ['b']])
+
+    async def test_max_batch_size(self):
+        """Batches should be split at `max_batch_size` keys."""
+        self.loader.max_batch_size = 2
+        await self.loader.load_many('abcde')
+        self.assertEqual(self.calls, [['a', 'b'], ['c', 'd'], ['e']])
+
+    async def test_batches_are_referenced(self):
+        """Running batches should be held until they finish."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def batch(keys):
+            started.set()
+            await release.wait()
+            return {key: key for key in keys}
+        loader = Loader(batch)
+        future = loader.load('a')
+        await started.wait()
+        self.assertEqual(len(loader._running), 1)
+        release.set()
+        self.assertEqual(await future, 'a')
+        await asyncio.sleep(0)
+        self.assertEqual(len(loader._running), 0)
+
+    async def test_errors_are_not_memoized(self):
+        """A failed batch should fail its lookups and allow retries."""
+        async def fail(keys):
+            raise RuntimeError('boom')
+        loader = Loader(fail)
+        with self.assertRaises(RuntimeError):
+            await loader.load('a')
+        loader.batch_fn = lambda keys: asyncio.sleep(0, {'a': 1})
+        self.assertEqual(await loader.load('a'), 1)
+
+
+class FakeAPI:
+    """Serve `count` products and their prices, recording each request."""
+
+    def __init__(self, count: int) -> None:
+        self.products = [samples.product(i) for i in range(1, count + 1)]
+        self.prices = [
+            samples.price(100 + i, variant_id=i % 3) for i in range(1, count + 1)
+        ]
+        self.requests: list[str] = []
+
+    async def get_product(self, id, params={}):
+        self.requests.append(f'product {id}')
+        for product in self.products:
+            if product['id'] == str(id):
+                return samples.response({'data': product})
+        return {'status_code': 404, 'data': None, 'error': 'Not Found'}
+
+    async def list_products(self, params={}):
+        self.requests.append('products')
+        return self._page('products', self.products, params)
+
+    async def list_prices(self, params={}):
+        self.requests.append(f"prices {params.get('filter')}")
+        prices = self.prices
+        if (variant := params.get('filter', {}).get('variant_id')) is not None:
+            prices = [
+                price for price in prices
+                if str(price['attributes']['variant_id']) == variant
+            ]
+        return self._page('prices', prices, params)
+
+    def _page(self, resource, records, params):
+        number, size = params['page']['number'], params['page']['size']
+        last = max(1, -(-len(records) // size))
+        start = (number - 1) * size
+        return samples.response(samples.page(
+            resource, records[start:start + size], number, last, size
+        ))
+
+    def patch(self):
+        return patch.multiple(
+            'src.loaders.loaders',
+            get_product=self.get_product,
+            list_products=self.list_products,
+            list_prices=self.list_prices,
+        )
+
+
+class TestLoaders(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `Loaders` class."""
+
+    async def test_many_lookups_list_pages(self):
+        """Many product lookups should cost one request per page."""
+        api = FakeAPI(250)
+        loaders = Loaders()
+        with api.patch():
+            products = await asyncio.gather(*(
+                loaders.products.load(i % 250 + 1) for i in range(1000)
+            ))
+            primed = await loaders.products.load(7)
+        self.assertEqual([p['id'] for p in products[:3]], ['1', '2', '3'])
+        self.assertEqual(primed['id'], '7')
+        self.assertEqual(api.requests, ['products'] * 3)
+
+    async def test_listing_stops_once_found(self):
+        """No page should be requested after every object was found."""
+        api = FakeAPI(250)
+        loaders = Loaders()
+        with api.patch():
+            products = await loaders.products.load_many(range(1, 21))
+        self.assertEqual(len(products), 20)
+        self.assertEqual(api.requests, ['products'])
+
+    async def test_few_lookups_use_get(self):
+        """Small batches should be answered with `get_*` requests."""
+        api = FakeAPI(250)
+        loaders = Loaders()
+        with api.patch():
+            products = await loaders.products.load_many([3, '3', 4, 999])
+        self.assertEqual([p and p['id'] for p in products], ['3', '3', '4', None])
+        self.assertEqual(
+            sorted(api.requests), ['product 3', 'product 4', 'product 999']
+        )
+
+    async def test_prices_by_variant(self):
+        """Lookups by variant should use the `variant_id` filter."""
+        api = FakeAPI(9)
+        loaders = Loaders()
+        with api.patch():
+            prices = await loaders.prices_by_variant.load_many([1, 2, 1])
+            price = await loaders.prices.load(101)
+        self.assertEqual([len(p) for p in prices], [3, 3, 3])
+        self.assertEqual(price['id'], '101')
+        self.assertEqual(
+            sorted(api.requests),
+            ["prices {'variant_id': '1'}", "prices {'variant_id': '2'}"]
+        )
+
+    async def test_prices_by_variant_newest_first(self):
+        """Prices of a variant should be listed most recent first."""
+        api = FakeAPI(9)
+        for i, price in enumerate(api.prices):
+            day = (12, 14, 13)[i // 3]
+            price['attributes']['created_at'] = f'2024-01-{day}T10:00:00Z'
+        loaders = Loaders()
+        with api.patch():
+            prices = await loaders.prices_by_variant.load(1)
+        self.assertEqual([p['id'] for p in prices], ['104', '107', '101'])
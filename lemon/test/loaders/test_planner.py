@@ -0,0 +1,71 @@
+import unittest
+
+from src.loaders import allowed_includes, plan_includes
+from src.products.types import ListProductParams
+
+
+class TestPlanIncludes(unittest.TestCase):
+    """Test the functionality of the `plan_includes` function."""
+
+    def test_allowed_includes(self):
+        """The allowed values should be read from the params model."""
+        self.assertEqual(
+            allowed_includes(ListProductParams), ('store', 'variants')
+        )
+
+    def test_duplicated_fields_need_no_include(self):
+        """Related fields copied into the attributes should cost nothing."""
+        plan = plan_includes(
+            'subscriptions',
+            ['status', 'product.name', 'customer.email', 'variant.id']
+        )
+        self.assertEqual(plan.include, [])
+        self.assertEqual(plan.follow_up, {})
+        self.assertEqual(
+            plan.attributes,
+            ['status', 'product_name', 'user_email', 'variant_id']
+        )
+        self.assertEqual(plan.params({'filter': {'store_id': 1}}), {
+            'filter': {'store_id': 1}
+        })
+
+    def test_related_objects_are_included(self):
+        """Relationships cheaper to include than to fetch should be included."""
+        plan = plan_includes('subscriptions', ['store.currency', 'customer'])
+        self.assertEqual(plan.include, ['store', 'customer'])
+        self.assertEqual(plan.params()['include'], ['store', 'customer'])
+        self.assertEqual(plan.requests, 0)
+
+    def test_batched_follow_up(self):
+        """Shared objects repeated on many pages should be fetched in batches."""
+        plan = plan_includes('subscriptions', ['product.slug'], records=10_000)
+        self.assertEqual(plan.include, [])
+        self.assertEqual(plan.follow_up, {'product': None})
+        self.assertEqual(plan.requests, 4)
+
+    def test_references(self):
+        """Objects that cannot be included should be fetched by reference."""
+        plan = plan_includes('subscriptions', ['price.unit_price'])
+        self.assertEqual(
+            plan.follow_up, {'price': 'first_subscription_item.price_id'}
+        )
+
+    def test_nested_attributes(self):
+        """Fields of object attributes should cost nothing."""
+        plan = plan_includes(
+            'subscriptions',
+            ['first_subscription_item.price_id', 'urls.customer_portal']
+        )
+        self.assertEqual(plan.include, [])
+        self.assertEqual(plan.follow_up, {})
+        self.assertEqual(
+            plan.attributes,
+            ['first_subscription_item.price_id', 'urls.customer_portal']
+        )
+
+    def test_unknown_fields(self):
+        """Fields that are neither attributes nor relationships should raise."""
+        with self.assertRaises(KeyError):
+            plan_includes('webhooks', ['customer.email'])
+        with self.assertRaises(KeyError):
+            plan_includes('orders', ['status'])
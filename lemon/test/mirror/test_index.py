@@ -0,0 +1,149 @@
+import asyncio
+import unittest
+
+from unittest.mock import patch
+
+from src.mirror import ENTITLED_STATUSES, SubscriptionIndex
+from src.webhooks import EventRouter
+
+from .. import samples
+from .test_mirror import LATER, FakeAPI, payload
+
+
+class TestSubscriptionIndex(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `SubscriptionIndex` class."""
+
+    def setUp(self) -> None:
+        self.api = FakeAPI([
+            samples.subscription(
+                i,
+                status='active' if i % 3 else 'past_due',
+                variant_id=20 + i % 2,
+                customer_id=100 + i % 5,
+            )
+            for i in range(1, 26)
+        ])
+        self.index = SubscriptionIndex(page_size=10)
+
+    async def test_backfill_and_lookups(self):
+        """Lookups should be answered from the index."""
+        with self.api.patch():
+            self.assertEqual(await self.index.backfill(), 25)
+        self.assertEqual(self.api.pages, 3)
+        self.assertEqual(len(self.index), 25)
+        self.assertIn(3, self.index)
+        self.assertEqual(self.index.get('3').status, 'past_due')
+        self.assertIsNone(self.index.get(99))
+        self.assertEqual(
+            [e.id for e in self.index.lookup('user_email', 'USER7@example.com')],
+            ['7']
+        )
+        self.assertEqual(len(self.index.lookup('customer_id', '101')), 5)
+        self.assertEqual(self.index.lookup('order_id', 207)[0].id, '7')
+        self.assertEqual(
+            sorted(int(e.id) for e in self.index.find(
+                status='past_due', variant_id=21
+            )),
+            [3, 9, 15, 21]
+        )
+        self.assertEqual(self.index.find(status='expired'), [])
+        with self.assertRaises(TypeError):
+            self.index.lookup('user_name', 'User 1')
+        with self.assertRaises(TypeError):
+            self.index.find(user_name='User 1')
+        self.assertIsNotNone(self.index.synced_at)
+
+    async def test_entitled(self):
+        """Entitlements should follow the status of the subscriptions."""
+        with self.api.patch():
+            await self.index.backfill()
+        self.assertTrue(self.index.entitled(user_email='User1@example.com'))
+        self.assertTrue(self.index.entitled(customer_id=101, variant_id=21))
+        self.assertFalse(self.index.entitled(customer_id=101, product_id=11))
+        self.assertFalse(self.index.entitled(user_email='nobody@example.com'))
+        self.assertFalse(self.index.entitled(
+            user_email='user3@example.com', statuses=('active',)
+        ))
+        with self.assertRaises(TypeError):
+            self.index.entitled()
+
+    async def test_webhook_events(self):
+        """Webhook events should move subscriptions between buckets."""
+        router = EventRouter()
+        self.index.track(router)
+        await router.dispatch(
+            payload('subscription_created', samples.subscription(1))
+        )
+        await router.dispatch(payload(
+            'subscription_updated',
+            samples.subscription(
+                1, user_email='new@example.com', updated_at=LATER
+            )
+        ))
+        # A late delivery of an older version is ignored.
+        await router.dispatch(
+            payload('subscription_updated', samples.subscription(1))
+        )
+        self.assertEqual(self.index.lookup('user_email', 'user1@example.com'), [])
+        self.assertEqual(len(self.index.lookup('user_email', 'new@example.com')), 1)
+        self.assertIsNotNone(self.index.event_at)
+
+    async def test_statuses(self):
+        """Subscriptions leaving the indexed statuses should be dropped."""
+        index = SubscriptionIndex(statuses=ENTITLED_STATUSES)
+        self.assertEqual(index.apply([
+            samples.subscription(1),
+            samples.subscription(2, status='expired'),
+        ]), 1)
+        self.assertEqual(index.apply([
+            samples.subscription(1, status='expired', updated_at=LATER)
+        ]), 1)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.lookup('status', 'active'), [])
+        # The expired subscription is not brought back by an older version.
+        self.assertEqual(index.apply([samples.subscription(1)]), 0)
+        self.assertFalse(index.entitled(user_email='user1@example.com'))
+
+    def test_dropped_versions_are_forgotten(self):
+        """Dropped subscriptions should only be remembered for a while."""
+        index = SubscriptionIndex(statuses=ENTITLED_STATUSES, dropped_ttl=60)
+        index.apply([samples.subscription(1)])
+        # Subscriptions that were never indexed are not remembered.
+        index.apply([
+            samples.subscription(2, status='expired', updated_at=LATER)
+        ])
+        self.assertEqual(len(index._dropped), 0)
+        with patch('src.mirror.index.time.monotonic', return_value=0):
+            index.apply([
+                samples.subscription(1, status='expired', updated_at=LATER)
+            ])
+        self.assertEqual(len(index._dropped), 1)
+        with patch('src.mirror.index.time.monotonic', return_value=61):
+            index.apply([])
+        self.assertEqual(len(index._dropped), 0)
+
+    async def test_background_sync_survives_errors(self):
+        """A failed background sweep should be logged, then retried."""
+        calls = []
+
+        async def sweep():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise KeyError('attributes')
+            return 0
+
+        with patch.object(self.index, 'sweep', sweep):
+            with self.assertLogs('src.mirror.index', 'ERROR'):
+                task = self.index.start_sync(interval=0.001)
+                while len(calls) < 2:
+                    await asyncio.sleep(0.001)
+            task.cancel()
+
+    def test_store(self):
+        """Subscriptions of other stores should not be indexed."""
+        index = SubscriptionIndex(store_id='2')
+        index.apply([
+            samples.subscription(1),
+            samples.subscription(2, store_id=2),
+        ])
+        self.assertEqual([e.id for e in index.find()], ['2'])
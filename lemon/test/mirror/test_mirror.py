@@ -0,0 +1,152 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from unittest.mock import patch
+
+from src.mirror import SubscriptionMirror
+from src.webhooks import EventRouter
+
+from .. import samples
+
+LATER = '2024-01-13T10:00:00.000000Z'
+
+
+class FakeAPI:
+    """Serve subscriptions from memory, ten per page."""
+
+    def __init__(self, subscriptions: list[dict]) -> None:
+        self.subscriptions = subscriptions
+        self.pages = 0
+
+    async def list_subscriptions(self, params: dict = {}, lazy: bool = False):
+        self.pages += 1
+        number, size = params['page']['number'], params['page']['size']
+        records = self.subscriptions[(number - 1) * size:number * size]
+        last = max(1, -(-len(self.subscriptions) // size))
+        return samples.response(
+            samples.page('subscriptions', records, number, last, size)
+        )
+
+    def patch(self):
+        return patch(
+            'src.mirror.mirror.list_subscriptions',
+            self.list_subscriptions
+        )
+
+
+def payload(event: str, data: dict) -> dict:
+    return {'meta': {'event_name': event, 'test_mode': True}, 'data': data}
+
+
+class TestSubscriptionMirror(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `SubscriptionMirror` class."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'subscriptions.db')
+        self.api = FakeAPI([
+            samples.subscription(
+                i,
+                status='active' if i % 3 else 'past_due',
+                variant_id=20 + i % 2,
+                created_at=f'2024-01-{i:02d}T10:00:00.000000Z',
+            )
+            for i in range(1, 26)
+        ])
+        self.mirror = SubscriptionMirror(self.path, page_size=10)
+
+    def tearDown(self) -> None:
+        self.mirror.close()
+        self.directory.cleanup()
+
+    async def test_backfill_and_queries(self):
+        """Queries should be answered from the mirror."""
+        with self.api.patch():
+            self.assertEqual(await self.mirror.backfill(), 25)
+        self.assertEqual(self.api.pages, 3)
+        self.assertEqual(len(self.mirror), 25)
+        self.assertEqual(self.mirror.get(3)['attributes']['status'], 'past_due')
+        self.assertIsNone(self.mirror.get(99))
+        past_due = self.mirror.find(status='past_due', variant_id=21)
+        self.assertEqual([s['id'] for s in past_due], ['21', '15', '9', '3'])
+        self.assertEqual(
+            [s['id'] for s in self.mirror.find(limit=2, offset=1)],
+            ['24', '23']
+        )
+        self.assertEqual(
+            self.mirror.count(user_email='USER7@example.com'), 1
+        )
+        with self.assertRaises(TypeError):
+            self.mirror.find(user_name='User 1')
+        self.assertIsNotNone(self.mirror.watermark.synced_at)
+
+    async def test_sweep_only_writes_changes(self):
+        """Sweeps should only write the subscriptions that changed."""
+        with self.api.patch():
+            await self.mirror.backfill()
+            self.assertEqual(await self.mirror.sweep(), 0)
+            self.api.subscriptions[4] = samples.subscription(
+                5, status='cancelled', updated_at=LATER
+            )
+            self.assertEqual(await self.mirror.sweep(), 1)
+        self.assertEqual(self.mirror.count(status='cancelled'), 1)
+        self.assertEqual(self.mirror.watermark.updated_at, LATER)
+
+    async def test_webhook_events(self):
+        """Webhook events should update the mirror, never rolling back."""
+        router = EventRouter()
+        self.mirror.track(router)
+        await router.dispatch(payload(
+            'subscription_cancelled',
+            samples.subscription(1, status='cancelled', updated_at=LATER)
+        ))
+        # A late delivery of an older version is ignored.
+        await router.dispatch(
+            payload('subscription_updated', samples.subscription(1))
+        )
+        self.assertEqual(self.mirror.get(1)['attributes']['status'], 'cancelled')
+        self.assertIsNotNone(self.mirror.watermark.event_at)
+        self.assertIsNone(self.mirror.watermark.synced_at)
+
+        # Other processes see the changes.
+        other = SubscriptionMirror(self.path)
+        self.assertEqual(len(other), 1)
+        other.close()
+
+    async def test_writes_leave_the_event_loop(self):
+        """Database writes should run in a thread, not on the event loop."""
+        threads = []
+        apply = self.mirror.apply
+
+        def record_thread(records):
+            threads.append(threading.current_thread())
+            return apply(records)
+
+        with patch.object(self.mirror, 'apply', record_thread):
+            with self.api.patch():
+                await self.mirror.sweep()
+            await self.mirror.observe(payload(
+                'subscription_updated', samples.subscription(1)
+            ))
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    async def test_background_sync_survives_errors(self):
+        """A failed background sweep should be logged, then retried."""
+        calls = []
+
+        async def sweep():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise KeyError('attributes')
+            return 0
+
+        with patch.object(self.mirror, 'sweep', sweep):
+            with self.assertLogs('src.mirror.mirror', 'ERROR'):
+                task = self.mirror.start_sync(interval=0.001)
+                while len(calls) < 2:
+                    await asyncio.sleep(0.001)
+            task.cancel()
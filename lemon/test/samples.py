@@ -0,0 +1,224 @@
+"""Sample Lemon Squeezy API objects used by the offline tests."""
+import functools
+import json
+
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+
+API = "https://api.lemonsqueezy.com/v1"
+
+
+def relationships(resource: str, id: str | int, keys: list[str]) -> dict:
+    return {
+        key: {
+            'links': {
+                'related': f"{API}/{resource}/{id}/{key}",
+                'self': f"{API}/{resource}/{id}/relationships/{key}",
+            }
+        } for key in keys
+    }
+
+
+def subscription(id: int, **attributes: Any) -> dict:
+    return {
+        'type': 'subscriptions',
+        'id': str(id),
+        'attributes': {
+            'store_id': 1,
+            'customer_id': 100 + id,
+            'order_id': 200 + id,
+            'order_item_id': 300 + id,
+            'product_id': 10,
+            'variant_id': 20,
+            'product_name': 'Lemonade',
+            'variant_name': 'Default',
+            'user_name': f'User {id}',
+            'user_email': f'user{id}@example.com',
+            'status': 'active',
+            'status_formatted': 'Active',
+            'card_brand': 'visa',
+            'card_last_four': '4242',
+            'pause': None,
+            'cancelled': False,
+            'trial_ends_at': None,
+            'billing_anchor': 12,
+            'first_subscription_item': {
+                'id': 400 + id,
+                'subscription_id': id,
+                'price_id': 30,
+                'quantity': 1,
+                'is_usage_based': False,
+                'created_at': '2024-01-12T10:00:00.000000Z',
+                'updated_at': '2024-01-12T10:00:00.000000Z',
+            },
+            'urls': {
+                'update_payment_method': f'https://example.com/{id}/update',
+                'customer_portal': f'https://example.com/{id}/portal',
+                'customer_portal_update_subscription':
+                    f'https://example.com/{id}/portal/update',
+            },
+            'renews_at': '2024-02-12T10:00:00.000000Z',
+            'ends_at': None,
+            'created_at': '2024-01-12T10:00:00.000000Z',
+            'updated_at': '2024-01-12T10:00:00.000000Z',
+            'test_mode': True,
+            **attributes,
+        },
+        'relationships': relationships('subscriptions', id, [
+            'store',
+            'customer',
+            'order',
+            'order-item',
+            'product',
+            'variant',
+            'subscription-items',
+            'subscription-invoices',
+        ]),
+        'links': {'self': f"{API}/subscriptions/{id}"},
+    }
+
+
+def product(id: int, **attributes: Any) -> dict:
+    return {
+        'type': 'products',
+        'id': str(id),
+        'attributes': {
+            'store_id': 1,
+            'name': f'Product {id}',
+            'slug': f'product-{id}',
+            'description': '<p>A product.</p>',
+            'status': 'published',
+            'status_formatted': 'Published',
+            'thumb_url': None,
+            'large_thumb_url': None,
+            'price': 999,
+            'price_formatted': '$9.99',
+            'from_price': None,
+            'from_price_formatted': None,
+            'to_price': None,
+            'to_price_formatted': None,
+            'pay_what_you_want': False,
+            'buy_now_url': f'https://example.com/buy/{id}',
+            'created_at': '2024-01-12T10:00:00.000000Z',
+            'updated_at': '2024-01-12T10:00:00.000000Z',
+            'test_mode': True,
+            **attributes,
+        },
+        'relationships': relationships('products', id, ['store', 'variants']),
+        'links': {'self': f"{API}/products/{id}"},
+    }
+
+
+def variant(id: int, product_id: int, **attributes: Any) -> dict:
+    return {
+        'type': 'variants',
+        'id': str(id),
+        'attributes': {
+            'product_id': product_id,
+            'name': f'Variant {id}',
+            'slug': f'variant-{id}',
+            'status': 'published',
+            'created_at': '2024-01-12T10:00:00.000000Z',
+            'updated_at': '2024-01-12T10:00:00.000000Z',
+            **attributes,
+        },
+        'relationships': relationships('variants', id, ['product']),
+        'links': {'self': f"{API}/variants/{id}"},
+    }
+
+
+def price(id: int, **attributes: Any) -> dict:
+    return {
+        'type': 'prices',
+        'id': str(id),
+        'attributes': {
+            'variant_id': 20,
+            'category': 'subscription',
+            'scheme': 'standard',
+            'usage_aggregation': None,
+            'unit_price': 999,
+            'unit_price_decimal': None,
+            'setup_fee_enabled': False,
+            'setup_fee': None,
+            'package_size': 1,
+            'tiers': None,
+            'renewal_interval_unit': 'month',
+            'renewal_interval_quantity': 1,
+            'trial_interval_unit': None,
+            'trial_interval_quantity': None,
+            'min_price': None,
+            'suggested_price': None,
+            'tax_code': 'saas',
+            'created_at': '2024-01-12T10:00:00.000000Z',
+            'updated_at': '2024-01-12T10:00:00.000000Z',
+            **attributes,
+        },
+        'relationships': relationships('prices', id, ['variant']),
+        'links': {'self': f"{API}/prices/{id}"},
+    }
+
+
+def page(
+        resource: str,
+        records: list[dict],
+        number: int = 1,
+        last: int = 1,
+        size: int = 10,
+        included: list[dict] | None = None
+) -> dict:
+    body = {
+        'jsonapi': {'version': '1.0'},
+        'links': {
+            'first': f"{API}/{resource}?page[number]=1&page[size]={size}",
+            'last': f"{API}/{resource}?page[number]={last}&page[size]={size}",
+        },
+        'meta': {
+            'page': {
+                'currentPage': number,
+                'from': (number - 1) * size + 1,
+                'lastPage': last,
+                'perPage': size,
+                'to': (number - 1) * size + len(records),
+                'total': (last - 1) * size + len(records),
+            }
+        },
+        'data': records,
+    }
+    if included is not None:
+        body['included'] = included
+    return body
+
+
+def response(body: dict | None, status_code: int = 200) -> dict:
+    return {'status_code': status_code, 'data': body, 'error': None}
+
+
+class MockAPI:
+    """Serve products from memory in place of the Lemon Squeezy API."""
+
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.method != 'GET':
+            return httpx.Response(204)
+        parts = request.url.path.strip('/').split('/')
+        if len(parts) > 2:
+            body = {
+                'jsonapi': {'version': '1.0'},
+                'links': {'self': str(request.url)},
+                'data': product(int(parts[2])),
+            }
+        else:
+            body = page('products', [product(1)])
+        return httpx.Response(200, content=json.dumps(body).encode())
+
+    def patch(self):
+        client = functools.partial(
+            httpx.AsyncClient,
+            transport=httpx.MockTransport(self.handler)
+        )
+        return patch.object(httpx, 'AsyncClient', client)
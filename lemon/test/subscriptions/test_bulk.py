@@ -0,0 +1,127 @@
+import asyncio
+import csv
+import os
+import tempfile
+import unittest
+
+from unittest.mock import patch
+
+from src.subscriptions import bulk_update_subscriptions, read_journal
+
+from .. import samples
+
+
+class FakeAPI:
+    """Update and cancel subscriptions, failing on demand."""
+
+    def __init__(self, failures: dict[str, list[int]] | None = None) -> None:
+        # Status codes returned by the next calls for a subscription.
+        self.failures = failures or {}
+        self.calls: list[tuple[str, str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _respond(self, action: str, subscription_id: str) -> dict:
+        self.calls.append((action, subscription_id))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        failures = self.failures.get(subscription_id)
+        if failures:
+            return {
+                'status_code': failures.pop(0),
+                'data': None,
+                'error': RuntimeError('failed'),
+            }
+        return samples.response({'data': samples.subscription(1)})
+
+    async def update_subscription(self, subscription_id, update):
+        return await self._respond('update', subscription_id)
+
+    async def cancel_subscription(self, subscription_id):
+        return await self._respond('cancel', subscription_id)
+
+    def patch(self):
+        return patch.multiple(
+            'src.subscriptions.bulk',
+            update_subscription=self.update_subscription,
+            cancel_subscription=self.cancel_subscription,
+        )
+
+
+class TestBulkUpdateSubscriptions(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `bulk_update_subscriptions` function."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.directory.name, 'journal.jsonl')
+        self.items = [(i, {'variant_id': 2}) for i in range(1, 21)]
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    async def test_concurrency(self):
+        """Every item should be applied, at most `concurrency` at a time."""
+        api = FakeAPI()
+        with api.patch():
+            results = await bulk_update_subscriptions(
+                [*self.items, (21, 'cancel')],
+                concurrency=4
+            )
+        self.assertEqual(len(results), 21)
+        self.assertTrue(all(r.status == 'succeeded' for r in results))
+        self.assertEqual(api.max_in_flight, 4)
+        self.assertIn(('cancel', '21'), api.calls)
+
+    async def test_retries(self):
+        """Only transient errors should be retried."""
+        api = FakeAPI({'1': [503, 429], '2': [422], '3': [500, 500, 500]})
+        with api.patch():
+            results = await bulk_update_subscriptions(
+                self.items[:3], max_retries=2, backoff=0.001
+            )
+        by_id = {result.subscription_id: result for result in results}
+        self.assertEqual(by_id['1'].status, 'succeeded')
+        self.assertEqual(by_id['1'].attempts, 3)
+        self.assertEqual(by_id['2'].status, 'failed')
+        self.assertEqual(by_id['2'].attempts, 1)
+        self.assertEqual(by_id['2'].status_code, 422)
+        self.assertEqual(by_id['3'].status, 'failed')
+        self.assertEqual(by_id['3'].attempts, 3)
+
+    async def test_resume(self):
+        """A run should resume from the journal of a crashed run."""
+        api = FakeAPI({'5': [422]})
+        with api.patch():
+            await bulk_update_subscriptions(self.items[:10], self.journal)
+        with open(self.journal, 'a') as journal:
+            journal.write('{"subscription_id": "11", "act')
+        api.calls.clear()
+        report = os.path.join(self.directory.name, 'report.csv')
+        with api.patch():
+            results = await bulk_update_subscriptions(
+                self.items, self.journal, report
+            )
+        self.assertEqual(
+            sorted(int(id) for _, id in api.calls),
+            [*range(11, 21)]
+        )
+        self.assertEqual(sum(result.resumed for result in results), 10)
+        self.assertEqual(len(read_journal(self.journal)), 20)
+        with open(report, newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(
+            [row['status'] for row in rows if row['subscription_id'] == '5'],
+            ['failed']
+        )
+
+        # Failed items are only retried on demand.
+        api.calls.clear()
+        with api.patch():
+            await bulk_update_subscriptions(
+                self.items, self.journal, retry_failed=True
+            )
+        self.assertEqual(api.calls, [('update', '5')])
+        self.assertEqual(read_journal(self.journal)['5'].status, 'succeeded')
@@ -0,0 +1,54 @@
+import sys
+import unittest
+
+from src.prices.types import PriceRecord
+from src.subscriptions.types import SubscriptionData, SubscriptionRecord
+
+from .. import samples
+
+
+class TestCompactRecord(unittest.TestCase):
+    """Test the compact record classes generated from `Attributes`."""
+
+    def test_record_holds_attributes(self):
+        """Every attribute should be held in a slot of the record."""
+        raw = samples.subscription(7)
+        record = SubscriptionRecord.from_raw(raw)
+
+        self.assertEqual(record.id, '7')
+        self.assertEqual(record.type, 'subscriptions')
+        self.assertEqual(record['status'], 'active')
+        self.assertEqual(record.attributes(), raw['attributes'])
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_record_from_model(self):
+        """A validated model and its raw object give equal records."""
+        raw = samples.subscription(3)
+        self.assertEqual(
+            SubscriptionRecord.from_raw(SubscriptionData.model_validate(raw)),
+            SubscriptionRecord.from_raw(raw),
+        )
+
+    def test_enumerated_strings_are_interned(self):
+        """Literal and formatted attributes should share a single string."""
+        self.assertIn('status', SubscriptionRecord.interned)
+        self.assertIn('card_brand', SubscriptionRecord.interned)
+        self.assertIn('status_formatted', SubscriptionRecord.interned)
+        self.assertNotIn('user_email', SubscriptionRecord.interned)
+        self.assertIn('renewal_interval_unit', PriceRecord.interned)
+
+        first, second = SubscriptionRecord.from_iterable([
+            samples.subscription(1, status=''.join(['act', 'ive'])),
+            samples.subscription(2, status=''.join(['ac', 'tive'])),
+        ])
+        self.assertIs(first.status, second.status)
+        self.assertIs(first.status, sys.intern('active'))
+
+    def test_relationship_links_are_derived(self):
+        """Relationship links should match those sent by the API."""
+        raw = samples.subscription(5)
+        record = SubscriptionRecord.from_raw(raw)
+        self.assertEqual(
+            record.links('order-item'),
+            raw['relationships']['order-item']['links']
+        )
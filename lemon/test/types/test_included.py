@@ -0,0 +1,80 @@
+import unittest
+
+from src.internal.request import FetchResponse
+from src.products.types import ProductData
+from src.subscriptions.types import ListSubscriptions
+from src.types.response import IncludedMap
+
+from .. import samples
+
+
+def customer(id: int) -> dict:
+    return {
+        'type': 'customers',
+        'id': str(id),
+        'attributes': {'name': f'Customer {id}'},
+        'relationships': {},
+        'links': {'self': f'{samples.API}/customers/{id}'},
+    }
+
+
+def with_linkage(record: dict, key: str, type: str, id: int) -> dict:
+    record['relationships'][key]['data'] = {'type': type, 'id': str(id)}
+    return record
+
+
+class TestIncludedMap(unittest.TestCase):
+    """Test the identity map over `included` resources."""
+
+    def setUp(self) -> None:
+        self.pages = [
+            samples.page(
+                'subscriptions',
+                [
+                    with_linkage(samples.subscription(1), 'customer', 'customers', 7),
+                    with_linkage(samples.subscription(2), 'product', 'products', 10),
+                ],
+                included=[customer(7), samples.product(10)],
+            ),
+            samples.page(
+                'subscriptions',
+                [with_linkage(samples.subscription(3), 'customer', 'customers', 7)],
+                number=2,
+                included=[customer(7)],
+            ),
+        ]
+
+    def test_resources_deduplicated_across_pages(self):
+        """A resource included on several pages should be stored once."""
+        included = IncludedMap()
+        for page in self.pages:
+            included.add_response(samples.response(page))
+        self.assertEqual(len(included), 2)
+        self.assertIn(('customers', '7'), included)
+
+    def test_resolve_relationships(self):
+        """Relationships should resolve to a single shared instance."""
+        included = IncludedMap({'products': ProductData})
+        records = []
+        for page in self.pages:
+            response = FetchResponse[ListSubscriptions](
+                **samples.response(page)
+            ).model_dump()
+            included.add_response(response)
+            records.extend(response['data']['data'])
+
+        first = included.resolve(records[0], 'customer')
+        self.assertEqual(first['attributes']['name'], 'Customer 7')
+        self.assertIs(included.resolve(records[2], 'customer'), first)
+        self.assertIsInstance(included.resolve(records[1], 'product'), ProductData)
+        self.assertIsNone(included.resolve(records[0], 'product'))
+        self.assertIsNone(included.get('customers', 8))
+
+    def test_resolve_models(self):
+        """Validated records should resolve the same way as dictionaries."""
+        included = IncludedMap()
+        response = ListSubscriptions.model_validate(self.pages[0])
+        included.add(response.included)
+        self.assertEqual(
+            included.resolve(response.data[0], 'customer').id, '7'
+        )
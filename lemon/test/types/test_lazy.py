@@ -0,0 +1,74 @@
+import unittest
+
+from unittest.mock import AsyncMock, patch
+
+from src.products import list_products
+from src.subscriptions import list_subscriptions
+from src.internal.request import FetchResponse
+from src.subscriptions.types import LazyListSubscriptions, SubscriptionData
+from src.types.response import LazyRecords
+
+from .. import samples
+
+
+class TestLazyRecords(unittest.IsolatedAsyncioTestCase):
+    """Test the lazily validated list responses."""
+
+    async def test_records_validated_on_access(self):
+        """Only the records that are read should be validated."""
+        body = samples.page(
+            'subscriptions',
+            [samples.subscription(i) for i in range(1, 4)]
+        )
+        with patch(
+            'src.subscriptions.subscription.fetch',
+            AsyncMock(return_value=samples.response(body))
+        ):
+            response = await list_subscriptions(lazy=True)
+
+        self.assertEqual(response.get('status_code'), 200)
+        self.assertIsNone(response.get('error'))
+        records = response['data']['data']
+        self.assertIsInstance(records, LazyRecords)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(response['data']['meta']['page']['total'], 3)
+        self.assertTrue(all(record is None for record in records._cache))
+
+        second = records[1]
+        self.assertIsInstance(second, SubscriptionData)
+        self.assertEqual(second['attributes']['status'], 'active')
+        self.assertIs(records[1], second)
+        self.assertEqual(
+            [record is not None for record in records._cache],
+            [False, True, False]
+        )
+
+    async def test_invalid_record_fails_on_access(self):
+        """A malformed record should only raise once it is read."""
+        broken = samples.product(2)
+        del broken['attributes']['slug']
+        body = samples.page('products', [samples.product(1), broken])
+        with patch(
+            'src.products.product.fetch',
+            AsyncMock(return_value=samples.response(body))
+        ):
+            response = await list_products(lazy=True)
+
+        records = response['data']['data']
+        self.assertEqual(records[0]['attributes']['slug'], 'product-1')
+        with self.assertRaises(ValueError):
+            records[1]
+
+    def test_json_serialisation_uses_raw_records(self):
+        """Dumping to JSON should not require validating the records."""
+        body = samples.page('subscriptions', [samples.subscription(1)])
+        response = FetchResponse[LazyListSubscriptions](
+            **samples.response(body)
+        )
+        records = response.model_dump()['data']['data']
+        self.assertIsInstance(records, LazyRecords)
+        self.assertEqual(
+            response.model_dump(mode='json')['data']['data'],
+            body['data']
+        )
+        self.assertIsNone(records._cache[0])
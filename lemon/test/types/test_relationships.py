@@ -0,0 +1,65 @@
+import unittest
+
+from src.types.response import RelationshipLinks
+from src.subscriptions.types import SubscriptionData
+
+from .. import samples
+
+
+class TestLazyRelationships(unittest.TestCase):
+    """Test the lazily materialised relationships of resource objects."""
+
+    def test_relationships_materialised_on_access(self):
+        """A relationship should only be validated once it is read."""
+        raw = samples.subscription(1)
+        data = SubscriptionData.model_validate(raw)
+        self.assertIsNone(data.relationships._links)
+        # Nothing but the owner is stored for links derived from it.
+        self.assertIsNone(data.relationships.root)
+
+        order = data.relationships['order']
+        self.assertIsInstance(order, RelationshipLinks)
+        self.assertEqual(order.links, raw['relationships']['order']['links'])
+        self.assertIs(data.relationships['order'], order)
+        self.assertEqual(list(data.relationships._links), ['order'])
+
+    def test_missing_links_are_derived(self):
+        """Links absent from the JSON should be derived from the owner."""
+        raw = samples.subscription(4)
+        raw['relationships'] = {key: {} for key in raw['relationships']}
+        data = SubscriptionData.model_validate(raw)
+        self.assertEqual(
+            data.relationships['variant']['links'],
+            samples.relationships('subscriptions', 4, ['variant'])['variant']['links']
+        )
+
+    def test_missing_relationship_fails(self):
+        """Every relationship of the resource should be present."""
+        raw = samples.subscription(1)
+        del raw['relationships']['store']
+        with self.assertRaises(ValueError):
+            SubscriptionData.model_validate(raw)
+
+    def test_linkage_is_kept(self):
+        """The linkage of included relationships should be kept."""
+        raw = samples.subscription(3)
+        customer = {'type': 'customers', 'id': '7'}
+        raw['relationships']['customer']['data'] = customer
+        data = SubscriptionData.model_validate(raw)
+        self.assertEqual(data.relationships.root, {'customer': customer})
+        self.assertEqual(data.relationships['customer'].data, customer)
+        self.assertIsNone(data.relationships['order'].data)
+
+    def test_dump_returns_validated_relationships(self):
+        """Dumping should return the relationships as validated models."""
+        raw = samples.subscription(2)
+        data = SubscriptionData.model_validate(raw)
+        self.assertEqual(list(data.relationships), list(raw['relationships']))
+        self.assertEqual(data.model_dump()['relationships'], {
+            key: RelationshipLinks.model_validate(value).model_dump()
+            for key, value in raw['relationships'].items()
+        })
+        dumped = data.model_dump()
+        self.assertEqual(
+            SubscriptionData.model_validate(dumped).model_dump(), dumped
+        )
@@ -0,0 +1,170 @@
+import unittest
+
+import httpx
+
+from src.webhooks import (
+    BatchFailed,
+    EventBatcher,
+    EventRouter,
+    IdempotencyStore,
+    WebhookEvent,
+    WebhookReceiver,
+    sign,
+)
+
+from .. import samples
+from .test_receiver import SECRET, delivery
+
+
+def event(id: int, name: str = 'subscription_updated') -> WebhookEvent:
+    return WebhookEvent({
+        'meta': {'event_name': name, 'test_mode': True},
+        'data': samples.subscription(id),
+    })
+
+
+class TestEventBatcher(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `EventBatcher` class."""
+
+    async def test_size_threshold(self):
+        """Full batches should be delivered at once."""
+        batches = []
+
+        async def handler(events):
+            batches.append([e['data']['id'] for e in events])
+
+        batcher = EventBatcher(handler, max_size=3, max_latency=60)
+        for i in range(7):
+            await batcher.push(event(i))
+        self.assertEqual(batches, [['0', '1', '2'], ['3', '4', '5']])
+        self.assertEqual(batcher.stats()['pending'], 1)
+        await batcher.flush()
+        self.assertEqual(batches[-1], ['6'])
+
+    async def test_latency_threshold(self):
+        """Partial batches should be delivered once their latency expires."""
+        batches = []
+
+        async def handler(events):
+            batches.append(len(events))
+
+        batcher = EventBatcher(handler, max_size=100, max_latency=0.01)
+        await batcher.push(event(1))
+        await batcher.push(event(2))
+        self.assertEqual(batches, [])
+        await batcher.drain()
+        self.assertEqual(batches, [2])
+
+    async def test_only_failed_events_are_retried(self):
+        """Events reported as failed should be retried on their own."""
+        batches = []
+
+        async def handler(events):
+            ids = [e['data']['id'] for e in events]
+            batches.append(ids)
+            if len(batches) == 1:
+                return [e for e in events if e['data']['id'] == '2']
+
+        batcher = EventBatcher(handler, max_size=10, max_latency=0.01)
+        for i in range(1, 4):
+            await batcher.push(event(i))
+        await batcher.drain()
+        self.assertEqual(batches, [['1', '2', '3'], ['2']])
+        stats = batcher.stats()
+        self.assertEqual(stats['retried'], 1)
+        self.assertEqual(stats['failed'], 0)
+
+    async def test_on_failure(self):
+        """Events should be given up on after `max_retries` retries."""
+        failures = []
+        attempts = []
+
+        async def handler(events):
+            attempts.append(len(events))
+            return {events[0]: ValueError('bad')}
+
+        batcher = EventBatcher(
+            handler,
+            max_latency=0.01,
+            max_retries=2,
+            on_failure=lambda e, error: failures.append((e, error)),
+        )
+        failed = event(1)
+        await batcher.push(failed)
+        await batcher.drain()
+        self.assertEqual(attempts, [1, 1, 1])
+        self.assertEqual(len(failures), 1)
+        self.assertIs(failures[0][0], failed)
+        self.assertEqual(str(failures[0][1]), 'bad')
+
+    async def test_raising_fails_the_batch(self):
+        """A handler raising should fail every event of the batch."""
+        failures = []
+
+        async def handler(events):
+            raise RuntimeError('down')
+
+        batcher = EventBatcher(
+            handler,
+            max_latency=0.01,
+            max_retries=0,
+            on_failure=lambda e, error: failures.append(error),
+        )
+        await batcher.push(event(1))
+        await batcher.push(event(2))
+        await batcher.drain()
+        self.assertEqual([str(error) for error in failures], ['down', 'down'])
+
+    async def test_router(self):
+        """Routers should buffer events for batch handlers."""
+        router = EventRouter()
+        batches = []
+        failures = []
+
+        @router.on_batch('subscription_updated', max_size=2, max_retries=0)
+        async def handler(events):
+            batches.append([e['data']['id'] for e in events])
+            return events[1:]
+
+        router.on_failure(lambda e, error: failures.append(error))
+        self.assertTrue(router.wants('subscription_updated'))
+        self.assertFalse(router.wants('order_created'))
+        for i in range(3):
+            self.assertEqual(await router.dispatch(event(i)), [])
+        await router.flush()
+        self.assertEqual(batches, [['0', '1'], ['2']])
+        self.assertEqual(len(failures), 1)
+        self.assertIsInstance(failures[0], BatchFailed)
+
+
+class TestReceiverBatches(unittest.IsolatedAsyncioTestCase):
+    """Test the delivery of events to batch handlers by the receiver."""
+
+    async def test_failed_events_are_released(self):
+        """Events failed for good should be redelivered and handled."""
+        receiver = WebhookReceiver(SECRET, idempotency=IdempotencyStore())
+        batches = []
+
+        @receiver.on_batch('subscription_created', max_latency=0.01,
+                           max_retries=0)
+        async def handler(events):
+            batches.append(len(events))
+            if len(batches) == 1:
+                raise RuntimeError('retry me')
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=receiver),
+            base_url='http://test'
+        ) as client:
+            for _ in range(2):
+                body = delivery()
+                response = await client.post(
+                    '/', content=body, headers={'X-Signature': sign(body, SECRET)}
+                )
+                self.assertEqual(response.status_code, 200)
+                await receiver.join()
+        await receiver.stop()
+        self.assertEqual(batches, [1, 1])
+        self.assertEqual(receiver.stats()['failed'], 1)
+        self.assertEqual(receiver.stats()['duplicates'], 0)
+
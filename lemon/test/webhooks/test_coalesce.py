@@ -0,0 +1,113 @@
+import json
+import unittest
+
+import httpx
+
+from src.webhooks import EventCoalescer, WebhookEvent, WebhookReceiver, sign
+
+from .. import samples
+
+
+def event(name: str, updated_at: str, id: int = 1, **attributes) -> WebhookEvent:
+    data = samples.subscription(id, updated_at=updated_at, **attributes)
+    if name.startswith('subscription_payment'):
+        data = {
+            'type': 'subscription-invoices',
+            'id': str(900 + int(updated_at[-1])),
+            'attributes': {'subscription_id': id, 'updated_at': updated_at},
+        }
+    return WebhookEvent({
+        'meta': {'event_name': name, 'test_mode': True},
+        'data': data,
+    })
+
+
+class TestEventCoalescer(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `EventCoalescer` class."""
+
+    async def asyncSetUp(self) -> None:
+        self.delivered: list[WebhookEvent] = []
+
+        async def deliver(event):
+            self.delivered.append(event)
+        self.coalescer = EventCoalescer(deliver, window=0.05)
+
+    def names(self):
+        return [(e.name, e['data']['id']) for e in self.delivered]
+
+    async def test_bursts_are_coalesced(self):
+        """Only the latest event of each name should be delivered in order."""
+        first = event('subscription_updated', '2024-01-01T00:00:01')
+        await self.coalescer.push(first)
+        await self.coalescer.push(
+            event('subscription_payment_success', '2024-01-01T00:00:02')
+        )
+        # Received out of order; the later update still wins.
+        last = event('subscription_updated', '2024-01-01T00:00:03', status='past_due')
+        await self.coalescer.push(last)
+        await self.coalescer.push(
+            event('subscription_updated', '2024-01-01T00:00:00', id=2)
+        )
+        self.assertEqual(self.delivered, [])
+        self.assertEqual(self.coalescer.pending, 4)
+        await self.coalescer.drain()
+        self.assertCountEqual(self.names(), [
+            ('subscription_payment_success', '902'),
+            ('subscription_updated', '1'),
+            ('subscription_updated', '2'),
+        ])
+        ours = [e for e in self.delivered if e['data']['id'] != '2']
+        self.assertEqual(
+            [e.name for e in ours],
+            ['subscription_payment_success', 'subscription_updated']
+        )
+        self.assertIs(ours[1], last)
+        self.assertEqual(ours[1].coalesced, (first,))
+        self.assertEqual(self.coalescer.superseded, 1)
+
+    async def test_terminal_events_are_delivered_at_once(self):
+        """A terminal event should close the window of its object."""
+        await self.coalescer.push(event('subscription_updated', '2024-01-01T00:00:01'))
+        await self.coalescer.push(event('subscription_expired', '2024-01-01T00:00:02'))
+        self.assertEqual(self.names(), [
+            ('subscription_updated', '1'),
+            ('subscription_expired', '1'),
+        ])
+        self.assertEqual(self.coalescer.pending, 0)
+
+    async def test_flush(self):
+        """`flush` should deliver every open window immediately."""
+        self.coalescer.window = 60
+        await self.coalescer.push(event('subscription_updated', '2024-01-01T00:00:01'))
+        await self.coalescer.flush()
+        self.assertEqual(self.names(), [('subscription_updated', '1')])
+
+
+class TestReceiverCoalescing(unittest.IsolatedAsyncioTestCase):
+    """Test the coalescing of deliveries by the receiver."""
+
+    async def test_burst_is_handled_once(self):
+        """A burst of updates should reach the handler once."""
+        receiver = WebhookReceiver('secret', coalesce=0.05)
+        statuses = []
+
+        @receiver.on('subscription_updated')
+        async def updated(event):
+            statuses.append(event['data']['attributes']['status'])
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=receiver),
+            base_url='http://test'
+        ) as client:
+            for second, status in enumerate(('active', 'past_due', 'unpaid')):
+                body = json.dumps(event(
+                    'subscription_updated',
+                    f'2024-01-01T00:00:0{second}',
+                    status=status
+                ).raw).encode()
+                await client.post('/', content=body, headers={
+                    'X-Signature': sign(body, 'secret')
+                })
+            await receiver.join()
+        await receiver.stop()
+        self.assertEqual(statuses, ['unpaid'])
@@ -0,0 +1,94 @@
+import json
+import unittest
+
+from pydantic import ValidationError
+
+from src.subscriptions.types import SubscriptionData
+from src.webhooks import EventRouter, WebhookEvent
+
+from .. import samples
+
+
+def payload(event: str, data: dict) -> dict:
+    return {'meta': {'event_name': event, 'test_mode': True}, 'data': data}
+
+
+class TestWebhookEvent(unittest.TestCase):
+    """Test the functionality of the `WebhookEvent` class."""
+
+    def test_data_is_validated_on_access(self):
+        """The event object should be validated only when read."""
+        event = WebhookEvent.parse(json.dumps(
+            payload('subscription_updated', samples.subscription(1))
+        ))
+        self.assertEqual(event.name, 'subscription_updated')
+        self.assertEqual(event['data']['id'], '1')
+        self.assertFalse(event.validated)
+        self.assertIsInstance(event.data, SubscriptionData)
+        self.assertIs(event.data, event.data)
+        self.assertEqual(event.data.attributes['status'], 'active')
+
+    def test_invalid_data_raises_on_access(self):
+        """Invalid event objects should only fail once validated."""
+        event = WebhookEvent(
+            payload('subscription_created', {'type': 'subscriptions', 'id': '1'})
+        )
+        with self.assertRaises(ValidationError):
+            event.data
+
+    def test_invalid_envelope(self):
+        """Invalid envelopes should be rejected eagerly."""
+        with self.assertRaises(ValidationError):
+            WebhookEvent({'meta': {'event_name': 'order_created'}, 'data': {}})
+
+    def test_unknown_event(self):
+        """Unknown event names should be accepted with a generic model."""
+        event = WebhookEvent(payload('unknown', samples.subscription(1)))
+        self.assertEqual(event.name, 'unknown')
+        self.assertEqual(event.data.id, '1')
+
+
+class TestEventRouter(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `EventRouter` class."""
+
+    async def test_dispatch(self):
+        """Handlers should run for their events, then catch-all handlers."""
+        router = EventRouter()
+        calls = []
+
+        @router.on('subscription_created', 'subscription_updated')
+        async def subscription(event):
+            calls.append(('subscription', event.data.id))
+
+        @router.on('*')
+        def every(event):
+            calls.append(('every', event.name))
+
+        @router.on('order_created')
+        async def fail(event):
+            raise ValueError(event.name)
+
+        errors = await router.dispatch(
+            payload('subscription_updated', samples.subscription(2))
+        )
+        self.assertEqual(errors, [])
+        errors = await router.dispatch(
+            payload('order_created', {'type': 'orders', 'id': '3'})
+        )
+        self.assertEqual([str(error) for error in errors], ['order_created'])
+        self.assertEqual(calls, [
+            ('subscription', '2'),
+            ('every', 'subscription_updated'),
+            ('every', 'order_created'),
+        ])
+
+    async def test_unrouted_events_are_not_validated(self):
+        """Events without handlers should never be validated."""
+        router = EventRouter()
+        router.on('order_created')(lambda event: None)
+        event = WebhookEvent(
+            payload('subscription_updated', samples.subscription(1))
+        )
+        self.assertFalse(router.wants(event.name))
+        self.assertEqual(await router.dispatch(event), [])
+        self.assertFalse(event.validated)
@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from unittest.mock import patch
+
+import httpx
+
+from src.webhooks import (
+    BloomFilter,
+    IdempotencyStore,
+    SQLiteIdempotencyBackend,
+    WebhookReceiver,
+    event_key,
+    sign,
+)
+
+from .. import samples
+from .test_receiver import SECRET, delivery
+
+
+class TestIdempotencyStore(unittest.TestCase):
+    """Test the functionality of the `IdempotencyStore` class."""
+
+    def test_event_key(self):
+        """Keys should identify the event name, object and its version."""
+        payload = {
+            'meta': {'event_name': 'subscription_updated'},
+            'data': samples.subscription(1),
+        }
+        self.assertEqual(
+            event_key(payload),
+            'subscription_updated:subscriptions:1:2024-01-12T10:00:00.000000Z'
+        )
+        payload['data'] = {'type': 'license-keys', 'id': '1', 'attributes': {}}
+        other = {**payload, 'data': {**payload['data'], 'attributes': {'a': 1}}}
+        self.assertNotEqual(event_key(payload), event_key(other))
+
+    def test_duplicates_are_dropped(self):
+        """Only the first claim of a key should succeed."""
+        store = IdempotencyStore()
+        self.assertTrue(store.claim('a'))
+        self.assertFalse(store.claim('a'))
+        store.release('a')
+        self.assertTrue(store.claim('a'))
+        self.assertEqual(store.stats()['duplicates'], 1)
+
+    def test_window(self):
+        """Keys should be forgotten once the window has passed."""
+        store = IdempotencyStore(window=10)
+        with patch('time.time', return_value=1000):
+            store.claim('a')
+        with patch('time.time', return_value=1009):
+            self.assertFalse(store.claim('a'))
+        with patch('time.time', return_value=1011):
+            self.assertTrue(store.claim('a'))
+
+    def test_bloom_filter_front(self):
+        """New keys should skip the lookup and hits be confirmed."""
+        store = IdempotencyStore(bloom_capacity=1000)
+        for i in range(100):
+            self.assertTrue(store.claim(str(i)))
+        self.assertEqual(store.stats()['bloom_negatives'], 100)
+        self.assertFalse(store.claim('0'))
+        # A released key stays in the filter but is no longer confirmed.
+        store.release('1')
+        self.assertTrue(store.claim('1'))
+        self.assertEqual(store.stats()['duplicates'], 1)
+
+    def test_bloom_false_positives_are_claimed(self):
+        """A key the filter wrongly holds should still be handled."""
+        store = IdempotencyStore(bloom_capacity=1)
+        store.claim('a')
+        with patch.object(BloomFilter, '__contains__', return_value=True):
+            self.assertTrue(store.claim('b'))
+        self.assertEqual(store.stats()['duplicates'], 0)
+
+    def test_bloom_hits_are_confirmed_by_the_backend(self):
+        """Keys evicted from memory should be confirmed by the backend."""
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SQLiteIdempotencyBackend(
+                os.path.join(directory, 'events.db')
+            )
+            store = IdempotencyStore(
+                max_entries=10, bloom_capacity=1000, backend=backend
+            )
+            for i in range(100):
+                store.claim(str(i))
+            self.assertEqual(len(store), 10)
+            self.assertFalse(store.claim('0'))
+            backend.close()
+
+    def test_bloom_filter(self):
+        """The filter should hold its keys at about its error rate."""
+        bloom = BloomFilter(10_000, error_rate=1e-3)
+        for i in range(10_000):
+            bloom.add(f"key {i}")
+        self.assertTrue(all(f"key {i}" in bloom for i in range(10_000)))
+        false_positives = sum(f"other {i}" in bloom for i in range(10_000))
+        self.assertLess(false_positives, 50)
+
+    def test_sqlite_backend_is_shared(self):
+        """Stores sharing a database should see each other's claims."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.db')
+            first = SQLiteIdempotencyBackend(path)
+            second = SQLiteIdempotencyBackend(path)
+            a = IdempotencyStore(backend=first)
+            b = IdempotencyStore(backend=second)
+            self.assertTrue(a.claim('event'))
+            self.assertFalse(b.claim('event'))
+            a.release('event')
+            self.assertTrue(b.claim('event'))
+            self.assertEqual(len(second), 1)
+            first.close()
+            second.close()
+
+
+class TestReceiverIdempotency(unittest.IsolatedAsyncioTestCase):
+    """Test the deduplication of deliveries by the receiver."""
+
+    async def test_duplicates_are_not_handled(self):
+        """Duplicate deliveries should be acknowledged but not handled."""
+        receiver = WebhookReceiver(SECRET, idempotency=IdempotencyStore())
+        handled = []
+        attempts = []
+
+        @receiver.on('subscription_created')
+        async def created(payload):
+            handled.append(payload['data']['id'])
+
+        @receiver.on('subscription_updated')
+        async def updated(payload):
+            attempts.append(payload['data']['id'])
+            if len(attempts) == 1:
+                raise RuntimeError('retry me')
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=receiver),
+            base_url='http://test'
+        ) as client:
+            for body in (
+                delivery(),
+                delivery(),
+                delivery('subscription_updated'),
+            ):
+                response = await client.post(
+                    '/', content=body, headers={'X-Signature': sign(body, SECRET)}
+                )
+                self.assertEqual(response.status_code, 200)
+            await receiver.join()
+            # The failed event was released, so its replay is handled.
+            body = delivery('subscription_updated')
+            await client.post(
+                '/', content=body, headers={'X-Signature': sign(body, SECRET)}
+            )
+            await receiver.join()
+        await receiver.stop()
+        self.assertEqual(handled, ['1'])
+        self.assertEqual(attempts, ['1', '1'])
+        self.assertEqual(receiver.stats()['duplicates'], 1)
+
+    async def test_shared_backend_leaves_the_event_loop(self):
+        """Claims and releases should reach the database from a thread."""
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SQLiteIdempotencyBackend(
+                os.path.join(directory, 'events.db')
+            )
+            store = IdempotencyStore(backend=backend)
+            threads = []
+            add, discard = backend.add, backend.discard
+
+            def record_add(key, expires_at):
+                threads.append(threading.current_thread())
+                return add(key, expires_at)
+
+            def record_discard(key):
+                threads.append(threading.current_thread())
+                discard(key)
+
+            with patch.multiple(
+                backend, add=record_add, discard=record_discard
+            ):
+                self.assertTrue(await store.aclaim('event'))
+                self.assertFalse(await store.aclaim('event'))
+                await store.arelease('event')
+                self.assertTrue(await store.aclaim('event'))
+            backend.close()
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    async def test_release_errors_do_not_stop_workers(self):
+        """A failing release should be logged and the worker keep going."""
+        store = IdempotencyStore()
+        receiver = WebhookReceiver(SECRET, workers=1, idempotency=store)
+        handled = []
+
+        @receiver.on('subscription_created', 'subscription_updated')
+        async def handler(payload):
+            handled.append(payload['meta']['event_name'])
+            if len(handled) == 1:
+                raise RuntimeError('retry me')
+
+        async def release(key):
+            raise sqlite3.OperationalError('database is locked')
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=receiver),
+            base_url='http://test'
+        ) as client:
+            with patch.object(store, 'arelease', release):
+                with self.assertLogs('src.webhooks.receiver', 'ERROR'):
+                    for body in (
+                        delivery(),
+                        delivery('subscription_updated'),
+                    ):
+                        await client.post('/', content=body, headers={
+                            'X-Signature': sign(body, SECRET)
+                        })
+                    await receiver.join()
+        self.assertFalse(receiver._tasks[0].done())
+        await receiver.stop()
+        self.assertEqual(
+            handled, ['subscription_created', 'subscription_updated']
+        )
+        self.assertEqual(receiver.stats()['failed'], 2)
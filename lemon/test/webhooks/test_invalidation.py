@@ -0,0 +1,91 @@
+import unittest
+
+from src.internal.request import ResponseCache
+from src.internal.setup import lemon_squeezy_setup, Config
+from src.internal.utils import clear_kv
+from src.webhooks import invalidate_from_webhook, stale_resources
+
+from .. import samples
+from ..samples import MockAPI
+
+
+def event(name: str, data: dict) -> dict:
+    return {
+        'meta': {'event_name': name, 'test_mode': True},
+        'data': data,
+    }
+
+
+class TestWebhookInvalidation(unittest.IsolatedAsyncioTestCase):
+    """Test the eviction of cached responses on webhook events."""
+
+    async def asyncSetUp(self) -> None:
+        self.cache = ResponseCache(default_ttl=3600)
+        for key in (
+            '/v1/subscriptions/1',
+            '/v1/subscriptions/1?include=customer',
+            '/v1/subscriptions/2',
+            '/v1/subscriptions?filter%5Bstore_id%5D=1',
+            '/v1/customers/101',
+            '/v1/customers/102',
+            '/v1/orders/201',
+            '/v1/products/10',
+        ):
+            await self.cache.set(key, {'data': key, 'error': None}, 1)
+
+    def tearDown(self) -> None:
+        clear_kv()
+
+    def test_stale_resources(self):
+        """The event object and its related resources should be stale."""
+        self.assertEqual(
+            stale_resources(event('subscription_updated', samples.subscription(1))),
+            [('subscriptions', '1'), ('customers', '101')]
+        )
+        self.assertEqual(
+            stale_resources(event('subscription_created', samples.subscription(1))),
+            [('subscriptions', '1'), ('orders', '201'), ('customers', '101')]
+        )
+
+    async def test_subscription_event_evicts(self):
+        """An updated subscription should evict itself, its lists and customer."""
+        evicted = await invalidate_from_webhook(
+            event('subscription_updated', samples.subscription(1)),
+            self.cache
+        )
+        self.assertEqual(evicted, 4)
+        self.assertEqual(self.cache.backend.keys(), [
+            '/v1/subscriptions/2',
+            '/v1/customers/102',
+            '/v1/orders/201',
+            '/v1/products/10',
+        ])
+
+    async def test_configured_cache(self):
+        """The configured cache should be used by default."""
+        lemon_squeezy_setup(Config(api_key='key', cache=self.cache))
+        await invalidate_from_webhook(
+            event('order_refunded', {
+                'type': 'orders',
+                'id': '201',
+                'attributes': {'customer_id': 102},
+            })
+        )
+        self.assertNotIn('/v1/orders/201', self.cache.backend.keys())
+        self.assertNotIn('/v1/customers/102', self.cache.backend.keys())
+
+    async def test_refresh(self):
+        """With `refresh`, the event object should be fetched again."""
+        api = MockAPI()
+        lemon_squeezy_setup(Config(api_key='key'))
+        with api.patch():
+            await invalidate_from_webhook(
+                event('subscription_updated', samples.subscription(1)),
+                self.cache,
+                refresh=True,
+            )
+        self.assertEqual(len(api.requests), 1)
+        self.assertEqual(
+            (await self.cache.get('/v1/subscriptions/1'))['status_code'],
+            200
+        )
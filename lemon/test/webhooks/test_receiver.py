@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+import unittest
+
+import httpx
+
+from src.webhooks import WebhookReceiver, sign
+
+from .. import samples
+
+SECRET = 'webhook-secret'
+
+
+def delivery(event: str = 'subscription_created', id: int = 1) -> bytes:
+    return json.dumps({
+        'meta': {'event_name': event, 'test_mode': True},
+        'data': samples.subscription(id),
+    }).encode()
+
+
+class TestWebhookReceiver(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `WebhookReceiver` ASGI app."""
+
+    async def asyncSetUp(self) -> None:
+        self.receiver = WebhookReceiver(SECRET, max_queue=2, workers=1)
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.receiver),
+            base_url='http://test'
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.receiver.stop(drain=False)
+        await self.client.aclose()
+
+    async def post(self, body: bytes, signature: str | None = None):
+        return await self.client.post(
+            '/webhooks',
+            content=body,
+            headers={'X-Signature': signature or sign(body, SECRET)}
+        )
+
+    async def test_deliveries_are_acknowledged_then_handled(self):
+        """Handlers should run after the delivery has been acknowledged."""
+        handled = []
+        release = asyncio.Event()
+
+        @self.receiver.on('subscription_created')
+        async def created(payload):
+            await release.wait()
+            handled.append(payload['data']['id'])
+
+        @self.receiver.on('*')
+        def every(payload):
+            self.assertNotEqual(threading.current_thread(), threading.main_thread())
+            handled.append(payload['meta']['event_name'])
+
+        response = await self.post(delivery())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(handled, [])
+        release.set()
+        await self.receiver.join()
+        self.assertEqual(handled, ['1', 'subscription_created'])
+        self.assertEqual(self.receiver.stats()['processed'], 1)
+
+    async def test_invalid_deliveries_are_rejected(self):
+        """Unsigned, tampered and malformed deliveries should be rejected."""
+        body = delivery()
+        self.assertEqual((await self.post(body, 'ab' * 32)).status_code, 401)
+        self.assertEqual((await self.post(b'{"meta": {}}')).status_code, 400)
+        self.assertEqual(
+            (await self.client.get('/webhooks')).status_code, 405
+        )
+        self.assertEqual(self.receiver.stats()['rejected'], 2)
+
+    async def test_unknown_events_are_ignored(self):
+        """Events the SDK does not know should be acknowledged, not retried."""
+        handled = []
+
+        @self.receiver.on('*')
+        async def every(event):
+            handled.append(event.name)
+
+        response = await self.post(delivery('unknown_event'))
+        self.assertEqual(response.status_code, 200)
+        await self.receiver.join()
+        self.assertEqual(handled, [])
+        self.assertEqual(self.receiver.stats()['ignored'], 1)
+        self.assertEqual(self.receiver.stats()['rejected'], 0)
+
+    async def test_backpressure(self):
+        """A full queue should answer `503` so the delivery is retried."""
+        started, release = asyncio.Event(), asyncio.Event()
+
+        @self.receiver.on()
+        async def slow(payload):
+            started.set()
+            await release.wait()
+
+        statuses = [(await self.post(delivery(id=1))).status_code]
+        await started.wait()
+        statuses += [
+            (await self.post(delivery(id=id))).status_code
+            for id in range(2, 6)
+        ]
+        # One delivery is held by the worker and two wait in the queue.
+        self.assertEqual(statuses, [200, 200, 200, 503, 503])
+        stats = self.receiver.stats()
+        self.assertEqual(stats['dropped'], 2)
+        self.assertEqual(stats['max_queue_depth'], 2)
+        release.set()
+        await self.receiver.join()
+        self.assertEqual(self.receiver.stats()['queue_depth'], 0)
+
+    async def test_failing_handlers_do_not_stop_workers(self):
+        """Errors raised by handlers should be counted, not propagated."""
+        @self.receiver.on('subscription_created')
+        async def fail(payload):
+            raise ValueError(payload['data']['id'])
+
+        for id in (1, 2):
+            await self.post(delivery(id=id))
+        await self.receiver.join()
+        stats = self.receiver.stats()
+        self.assertEqual((stats['processed'], stats['failed']), (2, 2))
@@ -0,0 +1,192 @@
+import unittest
+
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+import httpx
+
+from src.webhooks import (
+    EventRouter,
+    IdempotencyStore,
+    Reconciler,
+    WebhookReceiver,
+    sign,
+)
+
+from .. import samples
+from .test_receiver import SECRET, delivery
+
+BEFORE = '2024-01-01T10:00:00.000000Z'
+DURING = '2024-01-12T10:00:00.000000Z'
+LATER = '2024-01-12T11:00:00.000000Z'
+SINCE = datetime(2024, 1, 10, tzinfo=UTC)
+UNTIL = datetime(2024, 1, 20, tzinfo=UTC)
+
+
+class FakeAPI:
+    """Serve subscriptions from memory, five per page."""
+
+    def __init__(self, subscriptions: list[dict]) -> None:
+        self.subscriptions = subscriptions
+        self.pages: list[int] = []
+
+    async def list_subscriptions(self, params: dict = {}, lazy: bool = False):
+        number = params['page']['number']
+        self.pages.append(number)
+        records = self.subscriptions[(number - 1) * 5:number * 5]
+        last = max(1, -(-len(self.subscriptions) // 5))
+        return samples.response(
+            samples.page('subscriptions', records, number, last, 5)
+        )
+
+    def patch(self):
+        return patch(
+            'src.webhooks.reconcile.list_subscriptions',
+            self.list_subscriptions
+        )
+
+
+class TestReconciler(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `Reconciler` class."""
+
+    def setUp(self) -> None:
+        self.api = FakeAPI([
+            # Untouched since before the outage.
+            samples.subscription(1, created_at=BEFORE, updated_at=BEFORE),
+            # Updated during the outage.
+            samples.subscription(2, created_at=BEFORE, updated_at=DURING),
+            # Cancelled during the outage.
+            samples.subscription(
+                3, created_at=BEFORE, updated_at=DURING, status='cancelled'
+            ),
+            # Created during the outage.
+            samples.subscription(4, created_at=DURING, updated_at=DURING),
+            # Already seen at this version.
+            samples.subscription(5, created_at=BEFORE, updated_at=DURING),
+            *(
+                samples.subscription(i, created_at=BEFORE, updated_at=BEFORE)
+                for i in range(6, 12)
+            ),
+        ])
+
+    async def test_missed_events_are_synthesised(self):
+        """Only objects changed during the window should be handled."""
+        router = EventRouter()
+        handled = []
+
+        @router.on('*')
+        async def handler(event):
+            handled.append((event.name, event['data']['id']))
+
+        reconciler = Reconciler(router, state={
+            'subscriptions:2': BEFORE,
+            'subscriptions:3': BEFORE,
+            'subscriptions:5': DURING,
+        })
+        with self.api.patch():
+            report = await reconciler.reconcile(SINCE, UNTIL)
+        self.assertEqual(sorted(self.api.pages), [1, 2, 3])
+        self.assertEqual(handled, [
+            ('subscription_updated', '2'),
+            ('subscription_cancelled', '3'),
+            ('subscription_created', '4'),
+        ])
+        self.assertEqual(report['scanned'], 11)
+        self.assertEqual(report['missed'], 3)
+        self.assertEqual(report['delivered'], 3)
+        self.assertEqual(reconciler.state['subscriptions:4'], DURING)
+
+        # The state is up to date, so a second run has nothing to do.
+        handled.clear()
+        with self.api.patch():
+            report = await reconciler.reconcile(SINCE, UNTIL)
+        self.assertEqual(handled, [])
+        self.assertEqual(report['missed'], 0)
+
+    async def test_failed_events_are_retried(self):
+        """Events whose handlers failed should be synthesised again."""
+        router = EventRouter()
+        attempts = []
+
+        @router.on('subscription_created')
+        async def handler(event):
+            attempts.append(event['data']['id'])
+            if len(attempts) == 1:
+                raise RuntimeError('retry me')
+
+        reconciler = Reconciler(router, state={
+            f'subscriptions:{i}': DURING for i in (2, 3, 5)
+        })
+        with self.api.patch():
+            first = await reconciler.reconcile(SINCE, UNTIL)
+            second = await reconciler.reconcile(SINCE, UNTIL)
+        self.assertEqual(first['failed'], 1)
+        self.assertEqual(second['delivered'], 1)
+        self.assertEqual(attempts, ['4', '4'])
+
+    async def test_receiver_pipeline(self):
+        """Events should go through the receiver, tracking deliveries."""
+        receiver = WebhookReceiver(SECRET, idempotency=IdempotencyStore())
+        handled = []
+
+        @receiver.on('subscription_created', 'subscription_updated')
+        async def handler(event):
+            handled.append((event.name, event['data']['id']))
+
+        reconciler = Reconciler(receiver)
+        reconciler.track()
+        self.api.subscriptions = [
+            samples.subscription(1, created_at=BEFORE, updated_at=DURING),
+            samples.subscription(2, created_at=BEFORE, updated_at=LATER),
+        ]
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=receiver),
+            base_url='http://test'
+        ) as client:
+            # Subscription 1 was delivered before the receiver went down.
+            body = delivery('subscription_updated')
+            await client.post(
+                '/', content=body, headers={'X-Signature': sign(body, SECRET)}
+            )
+            await receiver.join()
+        self.assertEqual(reconciler.state['subscriptions:1'], DURING)
+        with self.api.patch():
+            report = await reconciler.reconcile(SINCE, UNTIL)
+        await receiver.stop()
+        self.assertEqual(report['missed'], 1)
+        self.assertEqual(handled, [
+            ('subscription_updated', '1'),
+            ('subscription_updated', '2'),
+        ])
+
+    async def test_receiver_failures_are_retried(self):
+        """Only events handled by the receiver should be recorded."""
+        receiver = WebhookReceiver(SECRET, idempotency=IdempotencyStore())
+        attempts = []
+
+        @receiver.on('subscription_updated')
+        async def handler(event):
+            attempts.append(event['data']['id'])
+            if len(attempts) == 1:
+                raise RuntimeError('retry me')
+
+        reconciler = Reconciler(receiver)
+        reconciler.track()
+        self.api.subscriptions = [
+            samples.subscription(1, created_at=BEFORE, updated_at=DURING),
+            samples.subscription(2, created_at=DURING, updated_at=DURING),
+        ]
+        with self.api.patch():
+            first = await reconciler.reconcile(SINCE, UNTIL)
+            self.assertNotIn('subscriptions:1', reconciler.state)
+            second = await reconciler.reconcile(SINCE, UNTIL)
+            self.assertEqual(reconciler.state['subscriptions:1'], DURING)
+            third = await reconciler.reconcile(SINCE, UNTIL)
+        await receiver.stop()
+        # Nothing handles `subscription_created`, so it is never queued.
+        self.assertEqual(first['delivered'], 1)
+        self.assertEqual(first['skipped'], 1)
+        self.assertEqual(first['events'], {'subscription_updated': 1})
+        self.assertEqual(second['delivered'], 1)
+        self.assertEqual(third['delivered'], 0)
+        self.assertEqual(attempts, ['1', '1'])
@@ -0,0 +1,52 @@
+import hashlib
+import hmac
+import json
+import unittest
+
+from src.webhooks import SignatureVerifier, sign, verify_signature
+
+
+class TestSignatureVerifier(unittest.TestCase):
+    """Test the verification of webhook signatures."""
+
+    def setUp(self) -> None:
+        self.body = json.dumps({
+            'meta': {'event_name': 'order_created'},
+            'data': {'type': 'orders', 'id': '1'},
+        }).encode()
+        self.signature = hmac.new(
+            b'old-secret', self.body, hashlib.sha256
+        ).hexdigest()
+
+    def test_sign(self):
+        """`sign` should produce the HMAC-SHA256 hex digest of the body."""
+        self.assertEqual(sign(self.body, 'old-secret'), self.signature)
+
+    def test_verify_raw_bytes(self):
+        """Bodies should verify as bytes, bytearrays and memoryviews."""
+        verifier = SignatureVerifier('old-secret')
+        for body in (self.body, bytearray(self.body), memoryview(self.body)):
+            self.assertTrue(verifier.verify(body, self.signature))
+        self.assertTrue(verifier.verify(self.body, self.signature.encode()))
+        self.assertTrue(verifier.verify(self.body, self.signature.upper()))
+
+    def test_invalid_signatures(self):
+        """Tampered bodies and malformed signatures should not verify."""
+        verifier = SignatureVerifier('old-secret')
+        self.assertFalse(verifier.verify(self.body + b' ', self.signature))
+        self.assertFalse(verifier.verify(self.body, None))
+        self.assertFalse(verifier.verify(self.body, 'not hex'))
+        self.assertFalse(verifier.verify(self.body, self.signature[:-2]))
+
+    def test_rotation(self):
+        """Every active secret should be accepted until removed."""
+        verifier = SignatureVerifier(['new-secret', 'old-secret'])
+        self.assertTrue(verifier.verify(self.body, self.signature))
+        self.assertTrue(
+            verifier.verify(self.body, sign(self.body, 'new-secret'))
+        )
+        verifier.remove_secret('old-secret')
+        self.assertFalse(verifier.verify(self.body, self.signature))
+        self.assertFalse(
+            verify_signature(self.body, self.signature, ['new-secret'])
+        )
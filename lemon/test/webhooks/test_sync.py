@@ -0,0 +1,178 @@
+import unittest
+
+from unittest.mock import patch
+
+from src.webhooks import WebhookChange, fingerprint, sync_webhooks
+
+from .. import samples
+
+URL = 'https://example.com/webhooks'
+KEY = 'fingerprint key'
+EVENTS = ['subscription_created', 'subscription_updated']
+
+
+def webhook(id: int, store_id: int, url: str, events: list[str]) -> dict:
+    return {
+        'type': 'webhooks',
+        'id': str(id),
+        'attributes': {
+            'store_id': store_id,
+            'url': url,
+            'events': events,
+            'last_sent_at': None,
+            'created_at': '2024-01-12T10:00:00.000000Z',
+            'updated_at': '2024-01-12T10:00:00.000000Z',
+            'test_mode': True,
+        },
+    }
+
+
+class FakeAPI:
+    """Serve and mutate the webhooks of several stores from memory."""
+
+    def __init__(self, webhooks: list[dict]) -> None:
+        self.webhooks = {hook['id']: hook for hook in webhooks}
+        self.calls: list[tuple[str, str]] = []
+        self.next_id = 100
+
+    async def list_webhooks(self, params: dict = {}):
+        store = params['filter']['store_id']
+        self.calls.append(('list', store))
+        hooks = [
+            hook for hook in self.webhooks.values()
+            if str(hook['attributes']['store_id']) == store
+        ]
+        return samples.response(samples.page('webhooks', hooks, size=100))
+
+    async def create_webhook(self, store_id, spec):
+        self.calls.append(('create', store_id))
+        self.next_id += 1
+        hook = webhook(self.next_id, int(store_id), spec['url'], spec['events'])
+        self.webhooks[hook['id']] = hook
+        return samples.response({'data': hook}, 201)
+
+    async def update_webhook(self, webhook_id, attributes):
+        self.calls.append(('update', webhook_id))
+        self.webhooks[webhook_id]['attributes']['events'] = attributes['events']
+        return samples.response({'data': self.webhooks[webhook_id]})
+
+    async def delete_webhook(self, webhook_id):
+        self.calls.append(('delete', webhook_id))
+        del self.webhooks[webhook_id]
+        return samples.response(None, 204)
+
+    def patch(self):
+        return patch.multiple(
+            'src.webhooks.sync',
+            list_webhooks=self.list_webhooks,
+            create_webhook=self.create_webhook,
+            update_webhook=self.update_webhook,
+            delete_webhook=self.delete_webhook,
+        )
+
+
+class TestSyncWebhooks(unittest.IsolatedAsyncioTestCase):
+    """Test the functionality of the `sync_webhooks` function."""
+
+    def setUp(self) -> None:
+        self.api = FakeAPI([
+            # Up to date.
+            webhook(1, 1, URL, EVENTS),
+            # Missing an event.
+            webhook(2, 2, URL, EVENTS[:1]),
+            # Not in the spec.
+            webhook(3, 2, 'https://example.com/old', EVENTS),
+            # Duplicate.
+            webhook(4, 1, URL, EVENTS),
+        ])
+        spec = {'url': URL, 'events': EVENTS, 'secret': 'secret'}
+        self.desired = {1: [spec], 2: [spec], 3: [spec]}
+
+    async def test_dry_run(self):
+        """Dry runs should plan the minimal changes without applying them."""
+        with self.api.patch():
+            plan, results = await sync_webhooks(
+                self.desired, prune=True, dry_run=True
+            )
+        self.assertEqual(results, [])
+        self.assertEqual(
+            [(change.action, change.store_id, change.webhook_id)
+             for change in plan],
+            [
+                ('delete', '1', '4'),
+                ('update', '2', '2'),
+                ('delete', '2', '3'),
+                ('create', '3', None),
+            ]
+        )
+        self.assertEqual(plan[1].fields, ('events',))
+        self.assertEqual(
+            str(plan[1]),
+            f"~ store 2 webhook 2 {URL} (events)"
+        )
+        self.assertTrue(all(call[0] == 'list' for call in self.api.calls))
+
+    async def test_apply(self):
+        """Applying the plan should converge, so a second run is empty."""
+        with self.api.patch():
+            plan, results = await sync_webhooks(self.desired, prune=True)
+            self.assertEqual(len(results), 4)
+            self.assertTrue(all(result.error is None for result in results))
+            self.assertEqual(results[-1].webhook_id, '101')
+            plan, _ = await sync_webhooks(self.desired, prune=True)
+        self.assertEqual(plan, [])
+        self.assertEqual(sorted(self.api.webhooks), ['1', '101', '2'])
+
+    async def test_secrets(self):
+        """Secrets should be compared with the fingerprints recorded."""
+        secrets = {
+            '1': fingerprint('secret', KEY),
+            '2': fingerprint('old', KEY),
+        }
+        self.assertNotEqual(fingerprint('secret', 'other key'), secrets['1'])
+        with self.api.patch():
+            with self.assertRaises(ValueError):
+                await sync_webhooks(self.desired, secrets=secrets)
+            plan, _ = await sync_webhooks(
+                {1: self.desired[1], 2: self.desired[2]},
+                secrets=secrets,
+                key=KEY
+            )
+        # Duplicates are deleted even without pruning.
+        self.assertEqual(plan, [
+            WebhookChange('delete', '1', URL, '4'),
+            WebhookChange(
+                'update', '2', URL, '2', ('events', 'secret'),
+                self.desired[2][0]
+            ),
+        ])
+        self.assertEqual(secrets['2'], fingerprint('secret', KEY))
+
+    async def test_no_pruning_by_default(self):
+        """Webhooks missing from the spec should only be deleted on demand."""
+        with self.api.patch():
+            plan, _ = await sync_webhooks(self.desired, dry_run=True)
+        self.assertNotIn(
+            '3', [change.webhook_id for change in plan]
+        )
+
+    async def test_duplicates_of_other_webhooks(self):
+        """Duplicates outside the spec should only be deleted on demand."""
+        other = 'https://other.example.com/hooks'
+        api = FakeAPI([
+            webhook(1, 1, other, EVENTS),
+            webhook(2, 1, other, EVENTS),
+            webhook(3, 1, URL, EVENTS),
+            webhook(4, 1, URL, EVENTS),
+        ])
+        desired = {1: [{'url': URL, 'events': EVENTS, 'secret': 's'}]}
+        with api.patch():
+            plan, _ = await sync_webhooks(desired, dry_run=True)
+            pruned, _ = await sync_webhooks(desired, prune=True, dry_run=True)
+        self.assertEqual([(c.action, c.webhook_id) for c in plan], [
+            ('delete', '4')
+        ])
+        self.assertEqual(
+            sorted(c.webhook_id for c in pruned if c.action == 'delete'),
+            ['1', '2', '4']
+        )